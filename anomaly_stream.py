@@ -0,0 +1,226 @@
+"""
+Streaming anomaly scoring of hourly residuals
+Replaces the batch rules of the notebooks (IsolationForest on the whole
+scaled history in HKL.ipynb, residual < mean - 2.5 std over the whole test
+period in HKL_ML_monitoring.ipynb) with running statistics:
+- the state holds an EWMA mean / variance of residual = actual - predicted
+  per plant and hour of day (HALF_LIFE_DAYS, one update per day and hour)
+- a new row is scored against its bucket before updating it, O(1) per row:
+  is_anomaly when residual < mean - THRESHOLD_STD * std (underproduction only),
+  anomaly_severity = |residual - mean| / std for anomalies, else 0 (notebook columns)
+- buckets with fewer than MIN_SAMPLES rows are not scored yet; residuals beyond
+  THRESHOLD_STD std are clipped before the update so outages do not move the baseline
+Rows are read from the predictions store after each plant's last scored hour
+and written to data/anomalies/ (same partitioning). The state is saved to
+cache/anomaly_state.npz.
+
+Usage:
+    python anomaly_stream.py                    # every plant in data/predictions/
+    python anomaly_stream.py 11838318 --reset   # rescore a plant from its first hour
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediction_store import STORE_DIR, TIMEZONE, list_plants, read_plant, read_range, write_partitioned
+
+
+STATE_PATH = Path('cache/anomaly_state.npz')
+ANOMALY_DIR = Path('data/anomalies')
+
+THRESHOLD_STD = 2.5   # HKL_ML_monitoring.ipynb anomaly_threshold_std
+HALF_LIFE_DAYS = 30
+EWMA_ALPHA = 1 - 0.5 ** (1 / HALF_LIFE_DAYS)
+MIN_SAMPLES = 14      # rows per (plant, hour) bucket before it is scored
+NO_TIME = np.iinfo(np.int64).min
+
+ANOMALY_COLUMNS = ['generation_kwh', 'ml_predicted_kwh', 'residual', 'residual_mean', 'residual_std',
+                   'is_anomaly', 'anomaly_severity']
+
+
+def new_state(plant_ids=()):
+    """Empty state: per plant and hour count / mean / var, and the last scored time (ns)"""
+    n = len(plant_ids)
+    return {
+        'plant_ids': np.asarray(plant_ids, dtype=np.int64),
+        'count': np.zeros((n, 24), dtype=np.int64),
+        'mean': np.zeros((n, 24)),
+        'var': np.zeros((n, 24)),
+        'last_time': np.full(n, NO_TIME, dtype=np.int64),
+    }
+
+
+def add_plants(state, plant_ids):
+    """State with rows for plant_ids not tracked yet"""
+    missing = [p for p in plant_ids if p not in set(state['plant_ids'].tolist())]
+    if not missing:
+        return state
+    extra = new_state(missing)
+    return {key: np.concatenate([state[key], extra[key]]) for key in state}
+
+
+def plant_rows(state, plant_ids):
+    """Row index of each plant in the state arrays"""
+    lookup = {p: i for i, p in enumerate(state['plant_ids'].tolist())}
+    return np.array([lookup[p] for p in plant_ids], dtype=np.int64)
+
+
+def load_state(path=STATE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return new_state()
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def save_state(state, path=STATE_PATH):
+    """Write through a temporary file + rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        np.savez(f, **state)
+    os.replace(tmp, path)
+
+
+def _bucket_ranks(buckets):
+    """Position of every row among the earlier rows of its bucket (rows in time order)"""
+    order = np.argsort(buckets, kind='stable')
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ranks = np.empty(len(buckets), dtype=np.int64)
+    ranks[order] = np.arange(len(buckets)) - np.repeat(starts, np.diff(np.r_[starts, len(buckets)]))
+    return ranks
+
+
+def score_rows(state, rows, hours, residuals):
+    """
+    Score rows (in time order) and update the state in place.
+    rows: state row of each plant (plant_rows), hours: local hour of day.
+    Returns a dict of arrays: residual_mean, residual_std, is_anomaly, anomaly_severity.
+    """
+    residuals = np.asarray(residuals, dtype=np.float64)
+    n = len(residuals)
+    out = {
+        'residual_mean': np.full(n, np.nan),
+        'residual_std': np.full(n, np.nan),
+        'is_anomaly': np.zeros(n, dtype=bool),
+        'anomaly_severity': np.zeros(n),
+    }
+    valid = np.flatnonzero(~np.isnan(residuals))
+    if not len(valid):
+        return out
+
+    count, mean, var = (state[key].reshape(-1) for key in ('count', 'mean', 'var'))
+    buckets = np.asarray(rows, dtype=np.int64)[valid] * 24 + np.asarray(hours, dtype=np.int64)[valid]
+    ranks = _bucket_ranks(buckets)
+
+    # Rows of the same rank hit distinct buckets: one vectorized update per rank (per day of data)
+    order = np.argsort(ranks, kind='stable')
+    bounds = np.flatnonzero(np.r_[True, np.diff(ranks[order]) != 0, True])
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        idx = order[begin:end]
+        b, r = buckets[idx], residuals[valid[idx]]
+        n_b, m = count[b], mean[b]
+        s = np.sqrt(var[b])
+
+        ready = (n_b >= MIN_SAMPLES) & (s > 0)
+        lower = m - THRESHOLD_STD * s
+        anomaly = ready & (r < lower)
+        target = valid[idx]
+        out['residual_mean'][target] = np.where(ready, m, np.nan)
+        out['residual_std'][target] = np.where(ready, s, np.nan)
+        out['is_anomaly'][target] = anomaly
+        out['anomaly_severity'][target] = np.where(anomaly, np.abs(r - m) / np.where(ready, s, 1), 0)
+
+        r = np.where(ready, np.clip(r, lower, m + THRESHOLD_STD * s), r)
+        alpha = np.maximum(EWMA_ALPHA, 1 / (n_b + 1))  # plain running mean while warming up
+        diff = r - m
+        mean[b] = m + alpha * diff
+        var[b] = (1 - alpha) * (var[b] + alpha * diff * diff)
+        count[b] = n_b + 1
+    return out
+
+
+def new_rows(plant_id, last_time, store_dir=STORE_DIR):
+    """Predictions of one plant after last_time (ns, NO_TIME: whole history)"""
+    if last_time == NO_TIME:
+        df = read_plant(plant_id, store_dir)
+    else:
+        since = pd.Timestamp(last_time, tz='UTC').tz_convert(TIMEZONE)
+        df = read_range(plant_id, since.date(), pd.Timestamp.now(tz=TIMEZONE).date(), store_dir)
+        df = df[df.index > since]
+    return df[['generation_kwh', 'ml_predicted_kwh']]
+
+
+def write_anomalies(df, plant_id, root=ANOMALY_DIR):
+    """Append scored rows: the months they touch are rewritten with their earlier rows"""
+    months = df.index.tz_localize(None).to_period('M')
+    existing = read_range(plant_id, months.min().start_time.date(), months.max().end_time.date(), root)
+    if len(existing):
+        df = pd.concat([existing[~existing.index.isin(df.index)], df]).sort_index()
+    return write_partitioned(df[ANOMALY_COLUMNS], plant_id, root)
+
+
+def update_plants(plant_ids, state, store_dir=STORE_DIR, anomaly_dir=ANOMALY_DIR):
+    """
+    Score the rows that arrived since the last run for every plant, in one pass.
+    Returns {plant_id: {'rows', 'anomalies'}} for the plants with new rows.
+    """
+    frames = []
+    for plant_id, last_time in zip(plant_ids, state['last_time'][plant_rows(state, plant_ids)]):
+        df = new_rows(plant_id, last_time, store_dir)
+        if len(df):
+            frames.append(df.assign(plant_id=plant_id))
+    if not frames:
+        return {}
+
+    rows = pd.concat(frames).sort_index(kind='stable')
+    rows['residual'] = rows['generation_kwh'] - rows['ml_predicted_kwh']
+    scored = score_rows(state, plant_rows(state, rows['plant_id'].tolist()), rows.index.hour, rows['residual'])
+    rows = rows.assign(**scored)
+
+    stats = {}
+    for plant_id, df in rows.groupby('plant_id', sort=True):
+        write_anomalies(df, plant_id, anomaly_dir)
+        state['last_time'][plant_rows(state, [plant_id])[0]] = df.index[-1].value
+        stats[plant_id] = {'rows': len(df), 'anomalies': int(df['is_anomaly'].sum())}
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score new hourly residuals for anomalies")
+    parser.add_argument('plant_ids', nargs='*', type=int, help="plants to score (default: every plant in the store)")
+    parser.add_argument('--reset', action='store_true', help="drop the plants' state and rescore from the start")
+    args = parser.parse_args()
+
+    plant_ids = args.plant_ids or list_plants(STORE_DIR)
+
+    print("=" * 80)
+    print(f"🚨 STREAMING ANOMALY SCORING FOR {len(plant_ids)} PLANT(S)")
+    print("=" * 80)
+
+    state = load_state()
+    if args.reset:
+        keep = ~np.isin(state['plant_ids'], plant_ids)
+        state = {key: values[keep] for key, values in state.items()}
+    state = add_plants(state, plant_ids)
+
+    start_time = time.perf_counter()
+    stats = update_plants(plant_ids, state)
+    elapsed = time.perf_counter() - start_time
+    save_state(state)
+
+    for plant_id in plant_ids:
+        if plant_id in stats:
+            s = stats[plant_id]
+            print(f"✅ {plant_id}: {s['rows']:,} new rows, {s['anomalies']} anomalous hours")
+        else:
+            print(f"✅ {plant_id}: no new rows")
+    total = sum(s['rows'] for s in stats.values())
+    print(f"\n⏱️  {total:,} rows scored in {elapsed * 1000:.0f} ms -> {ANOMALY_DIR}/")
@@ -1,6 +1,6 @@
 """
 Solar Plant Monitoring Dashboard
-HKL GGI - 269.28 kWp
+Fleet of plants from data/inverter_plants.csv (default: HKL GGI - 269.28 kWp)
 ML-based production monitoring and anomaly detection
 """
 
@@ -10,20 +10,31 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
-import pickle
 from pathlib import Path
 import matplotlib.pyplot as plt
-import requests
 import json
 import os
 from dotenv import load_dotenv
 
+from daily_metrics import (aggregate_daily_metrics, aggregate_monthly_metrics, apply_alert_threshold,
+                           build_fleet_rollup, fleet_overview, read_fleet_rollup, read_rollup, rollup_paths,
+                           write_fleet_rollup)
+from prediction_store import has_plant, list_plants, plant_version, read_plant, read_range, slice_range
+from plants import load_plants
+from downsampling import DEFAULT_MAX_POINTS, downsample_series
+from performance_metrics import compute_model_performance, file_hash
+from model_bundle import artifact_path, bundle_is_stale, load_artifacts
+from weather_forecast import forecast_model_inputs, get_forecast, upsample_forecast
+from feature_pipeline import (MIN_SUN_ELEVATION, build_feature_matrix, predict_matrix,
+                              solar_terms, validate_feature_columns)
+from generator_runtime import load_runtime
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Page configuration
 st.set_page_config(
-    page_title="Solar Plant Monitoring - HKL GGI",
+    page_title="Solar Plant Monitoring",
     page_icon="☀️",
     layout="wide",
     initial_sidebar_state="expanded"
@@ -63,16 +74,46 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Configuration
-PLANT_CONFIG = {
-    'name': 'HKL GGI',
-    'capacity_kwp': 269.28,
-    #'latitude': 22.3027,
-    'latitude': 24.0223,
-    #'longitude': 114.1772,
-    'longitude': 90.2957,
-    'timezone': 'Asia/Dhaka',
-    'alert_threshold_pct': 20  # Alert if actual < predicted by 20%
-}
+# Plant metadata comes from data/inverter_plants.csv + projects.csv (plants.py);
+# data/predictions.parquet is the single-plant export of DEFAULT_PLANT_ID
+DEFAULT_PLANT_ID = 11838318  # HKL (GGI)
+MODEL_PLANT_ID = 11838318    # the exported model is trained on HKL (GGI)
+TIMEZONE = 'Asia/Dhaka'
+ALERT_THRESHOLD_PCT = 20     # Alert if actual < predicted by 20%
+
+
+@st.cache_data
+def load_fleet():
+    """Plant metadata indexed by plant_id"""
+    return load_plants()
+
+
+def plant_config(plant_id):
+    """
+    Configuration of one plant (name, capacity, location, timezone, alert threshold).
+    Plants missing from inverter_plants.csv use HKL's location and capacity.
+    """
+    fleet = load_fleet()
+    known = plant_id in fleet.index
+    plant = fleet.loc[plant_id if known else DEFAULT_PLANT_ID]
+    return {
+        'plant_id': int(plant_id),
+        'name': plant['plant_name'] if known else str(plant_id),
+        'capacity_kwp': float(plant['plant_capacity']),
+        'latitude': float(plant['latitude']),
+        'longitude': float(plant['longitude']),
+        'timezone': TIMEZONE,
+        'alert_threshold_pct': ALERT_THRESHOLD_PCT,
+    }
+
+
+@st.cache_data(ttl=60)
+def available_plants():
+    """plant_ids with hourly predictions (partitioned store + single-plant export)"""
+    plant_ids = set(list_plants())
+    if Path('data/predictions.parquet').exists():
+        plant_ids.add(DEFAULT_PLANT_ID)
+    return sorted(plant_ids)
 
 
 @st.cache_data
@@ -84,7 +125,8 @@ def load_data():
         if data_path.exists():
             df = pd.read_parquet(data_path)
             df.index = pd.to_datetime(df.index)
-            return df
+            # Sorted index enables binary-search range lookups
+            return df.sort_index()
         else:
             st.warning("⚠️ Predictions file not found. Please run the ML notebook first.")
             return None
@@ -93,72 +135,201 @@ def load_data():
         return None
 
 
-@st.cache_resource
-def load_model():
-    """Load the trained Ridge model"""
+@st.cache_resource(max_entries=2)
+def load_model(model_version):
+    """
+    Trained model, feature columns and exported metrics (models/bundle/, else
+    the legacy pickles). Linear models predict with NumPy, without scikit-learn.
+    """
     try:
-        model_path = Path('models/ridge_model.pkl')
-        if model_path.exists():
-            with open(model_path, 'rb') as f:
-                return pickle.load(f)
-        else:
+        if bundle_is_stale():
+            st.warning("⚠️ models/ridge_model.pkl was rewritten after models/bundle/: using the pickles "
+                       "(run `python model_bundle.py` to refresh the bundle).")
+        artifacts = load_artifacts()
+        if artifacts['model'] is None:
             st.warning("⚠️ Model file not found.")
-            return None
+        return artifacts
     except Exception as e:
         st.error(f"Error loading model: {e}")
         return None
 
 
-def calculate_daily_metrics(df, date):
-    """Calculate daily performance metrics"""
-    daily_data = df[df.index.date == date]
+@st.cache_data(max_entries=2)
+def load_plant_predictions(plant_id):
+    """Whole hourly history of one plant (only the selected plant is kept in memory)"""
+    if has_plant(plant_id):
+        return read_plant(plant_id)
+    if plant_id == DEFAULT_PLANT_ID:
+        return load_data()
+    return None
+
 
-    if len(daily_data) == 0:
+@st.cache_data(max_entries=32)
+def load_range(plant_id, start_date, end_date):
+    """Load one plant's hourly predictions for whole days [start_date, end_date]"""
+    try:
+        # Partitioned store: only the months overlapping the window are read
+        if has_plant(plant_id):
+            return read_range(plant_id, start_date, end_date)
+    except Exception as e:
+        st.warning(f"⚠️ Could not read partitioned predictions, using hourly file: {e}")
+
+    if plant_id != DEFAULT_PLANT_ID:
         return None
+    df = load_data()
+    if df is None:
+        return None
+    return slice_range(df, start_date, end_date)
 
-    metrics = {
-        'actual_total': daily_data['generation_kwh'].sum(),
-        'predicted_total': daily_data['ml_predicted_kwh'].sum(),
-        'clearsky_total': daily_data['clearsky_expected_kwh'].sum(),
-        'actual_peak': daily_data['generation_kwh'].max(),
-        'predicted_peak': daily_data['ml_predicted_kwh'].max(),
-        'num_hours': len(daily_data),
-        'residuals': daily_data['generation_kwh'] - daily_data['ml_predicted_kwh']
-    }
 
-    # Calculate performance ratio
-    if metrics['predicted_total'] > 0:
-        metrics['performance_ratio'] = (metrics['actual_total'] / metrics['predicted_total']) * 100
-    else:
-        metrics['performance_ratio'] = 0
+@st.cache_data
+def _file_hash(path, mtime_ns, size):
+    """File hash memoized on (path, mtime, size) so unchanged files are not re-read"""
+    return file_hash(path)
 
-    # Check for anomalies
-    threshold = PLANT_CONFIG['alert_threshold_pct']
-    metrics['has_anomaly'] = metrics['performance_ratio'] < (100 - threshold)
 
-    return metrics
+def file_version(path):
+    """Content hash of a file ('' if missing)"""
+    path = Path(path)
+    if not path.exists():
+        return ''
+    stat = path.stat()
+    return _file_hash(str(path), stat.st_mtime_ns, stat.st_size)
 
 
-def plot_three_line_comparison(df, start_date=None, end_date=None):
-    """Create 3-line comparison plot (Actual vs ML vs Clear-Sky)"""
-    # Convert date to Timestamp and localize to df's timezone
-    tz = df.index.tz if df.index.tz else None
-    start_ts = pd.Timestamp(start_date)
-    end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+def predictions_version(plant_id):
+    """Version key of one plant's hourly predictions"""
+    version = plant_version(plant_id)
+    if not version and plant_id == DEFAULT_PLANT_ID:
+        version = file_version('data/predictions.parquet')
+    return version
+
+
+@st.cache_data
+def load_model_performance(plant_id, model_version, predictions_version):
+    """
+    Test-set metrics, scatter arrays and error histogram of one plant.
+    Computed once per (plant, model file hash, predictions version).
+    """
+    df = load_plant_predictions(plant_id)
+    if df is None:
+        return None
+
+    performance = compute_model_performance(df)
+    artifacts = load_model(model_version)
+    performance['exported'] = artifacts['metrics'] if artifacts is not None else None
+    return performance
+
+
+@st.cache_data
+def load_generator_daily(plant_id):
+    """Daily generator runtime / energy of one plant (None when not in the log store)"""
+    try:
+        return load_runtime('daily', [plant_id])
+    except Exception:
+        return None
+
+
+@st.cache_data
+def load_fleet_daily(store_version):
+    """
+    Daily totals of every plant (fleet rollup).
+    Rebuilt from the partitioned store, one plant at a time, when missing or
+    older than the store.
+    """
+    path = rollup_paths('data')['fleet_daily']
+    newest = max((int(v.split('-')[1]) for v in store_version if v), default=0)
+    if path.exists() and path.stat().st_mtime_ns >= newest:
+        try:
+            return read_fleet_rollup(path)
+        except Exception as e:
+            st.warning(f"⚠️ Could not read fleet rollup, rebuilding from the store: {e}")
 
-    if tz is not None:
-        start_ts = start_ts.tz_localize(tz)
-        end_ts = end_ts.tz_localize(tz)
+    fleet_daily = build_fleet_rollup()
+    if len(fleet_daily) > 0:
+        write_fleet_rollup(fleet_daily, 'data')
+    return fleet_daily
 
-    mask = (df.index >= start_ts) & (df.index <= end_ts)
-    plot_df = df[mask].copy()
+
+def fleet_store_version():
+    """Version keys of every plant in the partitioned store"""
+    return tuple(plant_version(plant_id) for plant_id in list_plants())
+
+
+@st.cache_data
+def load_daily_metrics(plant_id, store_version):
+    """
+    Daily totals of one plant: its rows of the fleet rollup, else the
+    single-plant rollup, else aggregated from its hourly data
+    """
+    fleet_daily = load_fleet_daily(store_version)
+    plant_daily = fleet_daily[fleet_daily['plant_id'] == plant_id]
+    if len(plant_daily) > 0:
+        return plant_daily.drop(columns='plant_id').set_index('date')
+
+    if plant_id != DEFAULT_PLANT_ID:
+        df = load_plant_predictions(plant_id)
+        return None if df is None else aggregate_daily_metrics(df)
+
+    data_path = Path('data/predictions.parquet')
+    daily_path = rollup_paths('data')['daily']
+
+    # Use the precomputed rollup unless it is older than the hourly predictions
+    if daily_path.exists() and (
+        not data_path.exists() or daily_path.stat().st_mtime >= data_path.stat().st_mtime
+    ):
+        try:
+            return read_rollup(daily_path)
+        except Exception as e:
+            st.warning(f"⚠️ Could not read daily rollup, rebuilding from hourly data: {e}")
+
+    df = load_data()
+    if df is None:
+        return None
+    return aggregate_daily_metrics(df)
+
+
+@st.cache_data
+def load_monthly_metrics(plant_id, daily_totals):
+    """
+    Monthly totals of one plant: the precomputed monthly rollup of the default
+    plant when it is up to date, else rolled up from its daily totals
+    """
+    data_path = Path('data/predictions.parquet')
+    monthly_path = rollup_paths('data')['monthly']
+    if plant_id == DEFAULT_PLANT_ID and monthly_path.exists() and (
+        not data_path.exists() or monthly_path.stat().st_mtime >= data_path.stat().st_mtime
+    ):
+        try:
+            return read_rollup(monthly_path)
+        except Exception as e:
+            st.warning(f"⚠️ Could not read monthly rollup, rebuilding from daily totals: {e}")
+
+    return aggregate_monthly_metrics(daily_totals)
+
+
+def calculate_daily_metrics(daily_totals, alert_threshold_pct):
+    """Calculate daily performance metrics (performance ratio and anomaly flag)"""
+    return apply_alert_threshold(daily_totals, alert_threshold_pct)
+
+
+def plot_three_line_comparison(df, start_date=None, end_date=None, max_points=DEFAULT_MAX_POINTS):
+    """Create 3-line comparison plot (Actual vs ML vs Clear-Sky)"""
+    # Binary-search slice of the requested days (no full-length mask / copy)
+    plot_df = slice_range(df, start_date, end_date)
+
+    # Cap points per trace (LTTB keeps peaks and dips); short ranges stay at full detail
+    traces = {
+        col: downsample_series(plot_df.index, plot_df[col], max_points)
+        for col in ['generation_kwh', 'ml_predicted_kwh', 'clearsky_expected_kwh']
+    }
 
     fig = go.Figure()
 
     # Actual production
     fig.add_trace(go.Scatter(
-        x=plot_df.index,
-        y=plot_df['generation_kwh'],
+        x=traces['generation_kwh'][0],
+        y=traces['generation_kwh'][1],
         name='Actual Production',
         line=dict(color='#1f77b4', width=2),
         mode='lines'
@@ -166,8 +337,8 @@ def plot_three_line_comparison(df, start_date=None, end_date=None):
 
     # ML Prediction
     fig.add_trace(go.Scatter(
-        x=plot_df.index,
-        y=plot_df['ml_predicted_kwh'],
+        x=traces['ml_predicted_kwh'][0],
+        y=traces['ml_predicted_kwh'][1],
         name='ML Predicted',
         line=dict(color='#2ca02c', width=2),
         mode='lines'
@@ -175,8 +346,8 @@ def plot_three_line_comparison(df, start_date=None, end_date=None):
 
     # Clear-Sky (theoretical max)
     fig.add_trace(go.Scatter(
-        x=plot_df.index,
-        y=plot_df['clearsky_expected_kwh'],
+        x=traces['clearsky_expected_kwh'][0],
+        y=traces['clearsky_expected_kwh'][1],
         name='Clear-Sky (Theoretical Max)',
         line=dict(color='#d62728', width=2, dash='dash'),
         mode='lines'
@@ -200,41 +371,37 @@ def plot_three_line_comparison(df, start_date=None, end_date=None):
     return fig
 
 
-def plot_residuals(df, start_date, end_date):
+def plot_residuals(df, start_date, end_date, max_points=DEFAULT_MAX_POINTS,
+                   alert_threshold_pct=ALERT_THRESHOLD_PCT):
     """Plot residuals (Actual - Predicted) with alert threshold"""
-    # Convert date to Timestamp and localize to df's timezone
-    tz = df.index.tz if df.index.tz else None
-    start_ts = pd.Timestamp(start_date)
-    end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    # Binary-search slice of the requested days (no full-length mask / copy)
+    plot_df = slice_range(df, start_date, end_date)
 
-    if tz is not None:
-        start_ts = start_ts.tz_localize(tz)
-        end_ts = end_ts.tz_localize(tz)
-
-    mask = (df.index >= start_ts) & (df.index <= end_ts)
-    plot_df = df[mask].copy()
-
-    plot_df['residual'] = plot_df['generation_kwh'] - plot_df['ml_predicted_kwh']
+    predicted = plot_df['ml_predicted_kwh'].to_numpy()
+    residual = plot_df['generation_kwh'].to_numpy() - predicted
 
     # Avoid division by zero
-    plot_df['residual_pct'] = np.where(
-        plot_df['ml_predicted_kwh'] > 0,
-        (plot_df['residual'] / plot_df['ml_predicted_kwh']) * 100,
-        0
-    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residual_pct = np.where(predicted > 0, residual / predicted * 100, 0)
 
     # Calculate threshold
-    threshold_pct = -PLANT_CONFIG['alert_threshold_pct']
+    threshold_pct = -alert_threshold_pct
+
+    # Cap bars per trace (min/max per bucket keeps the deepest dips)
+    x, residual_pct = downsample_series(plot_df.index, residual_pct, max_points, method='minmax')
 
     fig = go.Figure()
 
     # Color residuals based on threshold
-    colors = ['red' if x < threshold_pct else 'green' if x > 0 else 'orange'
-              for x in plot_df['residual_pct']]
+    colors = np.select(
+        [residual_pct < threshold_pct, residual_pct > 0],
+        ['red', 'green'],
+        default='orange'
+    )
 
     fig.add_trace(go.Bar(
-        x=plot_df.index,
-        y=plot_df['residual_pct'],
+        x=x,
+        y=residual_pct,
         name='Residual %',
         marker_color=colors
     ))
@@ -260,24 +427,13 @@ def plot_residuals(df, start_date, end_date):
     return fig
 
 
-def plot_daily_summary(df, num_days=30):
+def plot_daily_summary(daily_metrics, num_days=30):
     """Plot daily summary for recent days"""
     # Get recent dates
-    recent_dates = sorted(df.index.date)[-num_days:]
-
-    daily_metrics = []
-    for date in recent_dates:
-        metrics = calculate_daily_metrics(df, date)
-        if metrics:
-            daily_metrics.append({
-                'date': date,
-                'actual': metrics['actual_total'],
-                'predicted': metrics['predicted_total'],
-                'performance_ratio': metrics['performance_ratio'],
-                'has_anomaly': metrics['has_anomaly']
-            })
-
-    daily_df = pd.DataFrame(daily_metrics)
+    daily_df = daily_metrics.tail(num_days).rename(columns={
+        'actual_total': 'actual',
+        'predicted_total': 'predicted'
+    }).reset_index()
 
     # Create subplots
     fig = go.Figure()
@@ -310,24 +466,43 @@ def plot_daily_summary(df, num_days=30):
     return fig
 
 
-def plot_performance_ratio_trend(df, num_days=30):
-    """Plot performance ratio trend"""
-    recent_dates = sorted(df.index.date)[-num_days:]
-
-    daily_metrics = []
-    for date in recent_dates:
-        metrics = calculate_daily_metrics(df, date)
-        if metrics:
-            daily_metrics.append({
-                'date': date,
-                'performance_ratio': metrics['performance_ratio'],
-                'has_anomaly': metrics['has_anomaly']
-            })
+def plot_monthly_summary(monthly):
+    """Plot actual vs predicted production per calendar month"""
+    monthly_df = monthly.reset_index()
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=monthly_df['month'],
+        y=monthly_df['actual_total'],
+        name='Actual Monthly Production',
+        marker_color='#1f77b4'
+    ))
+    fig.add_trace(go.Bar(
+        x=monthly_df['month'],
+        y=monthly_df['predicted_total'],
+        name='Predicted Monthly Production',
+        marker_color='#2ca02c',
+        opacity=0.6
+    ))
+
+    fig.update_layout(
+        title='Monthly Production Summary',
+        xaxis_title='Month',
+        yaxis_title='Monthly Energy (kWh)',
+        barmode='group',
+        height=400,
+        hovermode='x unified'
+    )
+
+    return fig
 
-    daily_df = pd.DataFrame(daily_metrics)
+
+def plot_performance_ratio_trend(daily_metrics, num_days=30):
+    """Plot performance ratio trend"""
+    daily_df = daily_metrics.tail(num_days).reset_index()
 
     # Color based on anomaly
-    colors = ['red' if x else 'green' for x in daily_df['has_anomaly']]
+    colors = np.where(daily_df['has_anomaly'], 'red', 'green')
 
     fig = go.Figure()
 
@@ -363,127 +538,47 @@ def fetch_weather_forecast(api_key, lat, lon):
 
     Uses the "5 Day / 3 Hour Forecast" API which is available for all free accounts
     Returns DataFrame with 3-hourly weather predictions (40 data points = 5 days)
+    Served from the on-disk forecast cache (3h TTL, stale fallback when the API is down)
     """
-    try:
-        # OpenWeather 5 Day / 3 Hour Forecast API - Free and available for all accounts
-        url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Parse 3-hourly forecast data
-        forecast_data = []
-
-        for item in data.get('list', []):  # 40 data points (5 days * 8 per day)
-            forecast_data.append({
-                'timestamp': pd.to_datetime(item['dt'], unit='s'),
-                'temperature': item['main']['temp'],
-                'feels_like': item['main']['feels_like'],
-                'pressure': item['main']['pressure'],
-                'humidity': item['main']['humidity'],
-                'dew_point': item['main'].get('dew_point', item['main']['temp'] - 5),  # Estimate if not available
-                'clouds': item['clouds']['all'],
-                'wind_speed': item['wind']['speed'],
-                'wind_deg': item['wind'].get('deg', 0),
-                'weather_main': item['weather'][0]['main'],
-                'weather_description': item['weather'][0]['description'],
-            })
+    df, info = get_forecast(api_key, lat, lon)
 
-        df = pd.DataFrame(forecast_data)
-        df.set_index('timestamp', inplace=True)
+    if df is None:
+        st.error(f"Erreur lors de la récupération des données météo: {info['error']}")
+        return None
 
-        return df
+    fetched_at = info['fetched_at'].tz_convert(TIMEZONE).strftime('%Y-%m-%d %H:%M')
+    if info['error']:
+        st.warning(f"⚠️ OpenWeather unavailable ({info['error']}) - showing cached forecast from {fetched_at}")
+    elif info['source'] == 'stale':
+        st.info(f"ℹ️ Showing cached forecast from {fetched_at} while it refreshes in the background")
 
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erreur lors de la récupération des données météo: {e}")
-        return None
-    except (KeyError, IndexError) as e:
-        st.error(f"Format de réponse inattendu de l'API: {e}")
-        return None
+    return df
 
 
-def create_forecast_features(weather_df, plant_config):
+def create_forecast_features(weather_df, plant_config, feature_columns, history=None):
     """
     Create ML features from weather forecast data
-    Similar to features used during training
+    Same recipe as training (feature_pipeline), built straight into a float32 matrix
+    Returns (forecast DataFrame indexed by local plant time, feature matrix)
     """
-    df = weather_df.copy()
-
-    # Basic time features
-    df['hour'] = df.index.hour
-    df['day_of_year'] = df.index.dayofyear
-    df['month'] = df.index.month
-    df['week_of_year'] = df.index.isocalendar().week
-
-    # Cyclical encoding
-    df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-    df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-    df['day_sin'] = np.sin(2 * np.pi * df['day_of_year'] / 365)
-    df['day_cos'] = np.cos(2 * np.pi * df['day_of_year'] / 365)
-    df['month_sin'] = np.sin(2 * np.pi * df['month'] / 12)
-    df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
-
-    # Estimate GHI (Global Horizontal Irradiance) from cloud cover
-    # Simple estimation: max irradiance * (1 - cloud_cover)
-    # Max GHI varies by season and time of day
-    max_ghi = 1000  # W/m² typical maximum
-
-    # Reduce by cloud cover
-    df['ghi_estimated'] = max_ghi * (1 - df['clouds'] / 100)
-
-    # Zero GHI at night (simple heuristic: hour < 6 or hour > 18)
-    df.loc[(df['hour'] < 6) | (df['hour'] > 18), 'ghi_estimated'] = 0
-
-    # Apply solar angle adjustment (simple model)
-    # GHI is maximum at solar noon (12:00), follows sin curve
-    solar_angle_factor = np.sin(np.pi * (df['hour'] - 6) / 12).clip(0, 1)
-    df['ghi_estimated'] = df['ghi_estimated'] * solar_angle_factor
-
-    # Temperature features
-    df['temp_squared'] = df['temperature'] ** 2
-    df['temp_cubed'] = df['temperature'] ** 3
-
-    # Humidity features
-    df['humidity_squared'] = df['humidity'] ** 2
-
-    # Interaction features
-    df['ghi_temp'] = df['ghi_estimated'] * df['temperature']
-    df['ghi_humidity'] = df['ghi_estimated'] * df['humidity']
-    df['temp_humidity'] = df['temperature'] * df['humidity']
-
-    # Weather condition encoding (simplified)
-    df['is_clear'] = (df['clouds'] < 20).astype(int)
-    df['is_cloudy'] = ((df['clouds'] >= 20) & (df['clouds'] < 80)).astype(int)
-    df['is_overcast'] = (df['clouds'] >= 80).astype(int)
-
-    # Wind features
-    df['wind_speed_squared'] = df['wind_speed'] ** 2
+    inputs = forecast_model_inputs(weather_df, plant_config['timezone'])
+    X = build_feature_matrix(inputs, location=plant_config, history=history, columns=feature_columns)
 
-    return df
+    forecast_df = weather_df.set_axis(inputs.index)
+    forecast_df['elevation'] = solar_terms(inputs.index, plant_config)[:, 0]
+
+    return forecast_df, X
 
 
-def predict_production_forecast(weather_df, model, feature_columns):
+def predict_production_forecast(forecast_df, X, model):
     """
     Predict solar production using weather forecast and trained model
     """
     try:
-        # Ensure all required features exist
-        missing_features = [col for col in feature_columns if col not in weather_df.columns]
-
-        if missing_features:
-            # Add missing features with default values
-            for col in missing_features:
-                weather_df[col] = 0
+        predictions = predict_matrix(model, X)
 
-        # Select only the features used by the model
-        X_forecast = weather_df[feature_columns]
-
-        # Make predictions
-        predictions = model.predict(X_forecast)
-
-        # Ensure non-negative predictions
-        predictions = np.maximum(predictions, 0)
+        # Model is trained on daytime hours only
+        predictions[forecast_df['elevation'].to_numpy() <= MIN_SUN_ELEVATION] = 0
 
         return predictions
 
@@ -546,9 +641,9 @@ def plot_forecast_hourly(forecast_df, selected_date):
     ))
 
     fig.update_layout(
-        title=f'3-Hourly Production Forecast - {selected_date}',
+        title=f'Hourly Production Forecast - {selected_date}',
         xaxis_title='Time',
-        yaxis_title='Energy Production (kWh / 3h)',
+        yaxis_title='Energy Production (kWh / h)',
         height=400,
         hovermode='x unified'
     )
@@ -559,22 +654,37 @@ def plot_forecast_hourly(forecast_df, selected_date):
 def main():
     """Main Streamlit app"""
 
+    # Plant selection (metadata for the whole fleet, hourly data for the selected plant only)
+    st.sidebar.header("⚙️ Configuration")
+    plant_ids = available_plants() or [DEFAULT_PLANT_ID]
+    fleet = load_fleet()
+    plant_id = st.sidebar.selectbox(
+        "🏭 Plant",
+        plant_ids,
+        index=plant_ids.index(DEFAULT_PLANT_ID) if DEFAULT_PLANT_ID in plant_ids else 0,
+        format_func=lambda p: (f"{fleet.at[p, 'plant_name']} ({fleet.at[p, 'plant_capacity']} kWp)"
+                               if p in fleet.index else str(p))
+    )
+    config = plant_config(plant_id)
+
     # Header
     st.markdown('<p class="main-header">☀️ Solar Plant Monitoring Dashboard</p>',
                 unsafe_allow_html=True)
 
     st.markdown(f"""
     <div style='text-align: center; margin-bottom: 2rem;'>
-        <h3>{PLANT_CONFIG['name']} - {PLANT_CONFIG['capacity_kwp']} kWp</h3>
+        <h3>{config['name']} - {config['capacity_kwp']} kWp</h3>
         <p>ML-based Production Monitoring & Anomaly Detection</p>
     </div>
     """, unsafe_allow_html=True)
 
-    # Load data
+    # Load daily rollups (hourly data is only loaded for date-range drill-downs)
     with st.spinner('Loading data...'):
-        df = load_data()
+        store_version = fleet_store_version()
+        fleet_daily = load_fleet_daily(store_version)
+        daily_totals = load_daily_metrics(plant_id, store_version)
 
-    if df is None:
+    if daily_totals is None or len(daily_totals) == 0:
         st.error("❌ Unable to load data. Please ensure the ML notebook has been run.")
         st.info("""
         **To generate predictions:**
@@ -584,12 +694,9 @@ def main():
         """)
         return
 
-    # Sidebar
-    st.sidebar.header("⚙️ Configuration")
-
     # Date range selector
-    min_date = df.index.min().date()
-    max_date = df.index.max().date()
+    min_date = daily_totals.index.min()
+    max_date = daily_totals.index.max()
 
     st.sidebar.subheader("📅 Date Range")
     date_range = st.sidebar.date_input(
@@ -610,21 +717,33 @@ def main():
         "Alert threshold (%)",
         min_value=5,
         max_value=50,
-        value=PLANT_CONFIG['alert_threshold_pct'],
+        value=config['alert_threshold_pct'],
         help="Alert when actual production is below predicted by this percentage"
     )
-    PLANT_CONFIG['alert_threshold_pct'] = alert_threshold
+    config['alert_threshold_pct'] = alert_threshold
+
+    # Daily metrics shared by Overview and Anomaly Detection
+    daily_metrics = calculate_daily_metrics(daily_totals, alert_threshold)
 
     # Display mode
     st.sidebar.subheader("📊 Display Options")
     show_clearsky = st.sidebar.checkbox("Show Clear-Sky Reference", value=True)
     num_recent_days = st.sidebar.slider("Recent days to analyze", 7, 90, 30)
+    max_points = st.sidebar.slider(
+        "Max points per chart trace",
+        min_value=500,
+        max_value=10000,
+        value=DEFAULT_MAX_POINTS,
+        step=500,
+        help="Long date ranges are downsampled (peaks and dips kept); narrow the range for full detail"
+    )
 
     # Load OpenWeather API Key from environment variable
     openweather_api_key = os.getenv('ow_key', '')
 
     # Main content
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    tab0, tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "🏭 Fleet Overview",
         "📊 Overview",
         "📈 Detailed Analysis",
         "🚨 Anomaly Detection",
@@ -632,15 +751,72 @@ def main():
         "🔮 5-Day Forecast"
     ])
 
+    # TAB 0: FLEET OVERVIEW (daily rollup of every plant, no hourly data)
+    with tab0:
+        st.header("🏭 Fleet Overview")
+
+        overview = fleet_overview(fleet_daily, fleet, alert_threshold, num_recent_days)
+
+        if len(overview) == 0:
+            st.info("ℹ️ No plant has predictions in data/predictions/ yet.")
+        else:
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Plants", len(overview))
+            with col2:
+                st.metric("Fleet Capacity", f"{overview['capacity_kwp'].sum():,.1f} kWp")
+            with col3:
+                fleet_predicted = overview['predicted_total'].sum()
+                fleet_ratio = overview['actual_total'].sum() / fleet_predicted * 100 if fleet_predicted > 0 else 0
+                st.metric(f"Fleet Performance ({num_recent_days}d)", f"{fleet_ratio:.1f}%")
+            with col4:
+                st.metric("Plants in Alert (latest day)", int(overview['latest_anomaly'].sum()))
+
+            fleet_df = pd.DataFrame({
+                'Status': np.where(overview['latest_anomaly'], '⚠️', '✅'),
+                'Plant': overview['plant_name'].to_numpy(),
+                'Capacity (kWp)': overview['capacity_kwp'].to_numpy(),
+                'Last Date': overview['last_date'].to_numpy(),
+                'Actual (kWh)': overview['actual_total'].to_numpy(),
+                'Predicted (kWh)': overview['predicted_total'].to_numpy(),
+                'Performance (%)': overview['performance_ratio'].to_numpy(),
+                'Yield (kWh/kWp/day)': overview['specific_yield'].to_numpy(),
+                'Anomalous Days': overview['anomalous_days'].to_numpy(),
+            }, index=pd.Index(overview.index, name='plant_id'))
+
+            st.dataframe(
+                fleet_df.style.format({
+                    'Capacity (kWp)': '{:.1f}',
+                    'Actual (kWh)': '{:.1f}',
+                    'Predicted (kWh)': '{:.1f}',
+                    'Performance (%)': '{:.1f}',
+                    'Yield (kWh/kWp/day)': '{:.2f}'
+                }).background_gradient(subset=['Performance (%)'], cmap='RdYlGn', vmin=50, vmax=100),
+                use_container_width=True
+            )
+
+            fig_fleet = go.Figure(go.Bar(
+                x=fleet_df['Plant'],
+                y=fleet_df['Performance (%)'],
+                marker_color=np.where(fleet_df['Performance (%)'] < 100 - alert_threshold, 'red', 'green')
+            ))
+            fig_fleet.add_hline(y=100 - alert_threshold, line_dash="dash", line_color="red")
+            fig_fleet.update_layout(
+                title=f'Performance Ratio per Plant (Last {num_recent_days} Days)',
+                yaxis_title='Performance Ratio (%)',
+                height=400
+            )
+            st.plotly_chart(fig_fleet, use_container_width=True)
+
     # TAB 1: OVERVIEW
     with tab1:
         st.header("Daily Overview")
 
         # Today's metrics (or most recent day)
-        latest_date = df.index.max().date()
-        today_metrics = calculate_daily_metrics(df, latest_date)
+        if len(daily_metrics) > 0:
+            latest_date = daily_metrics.index[-1]
+            today_metrics = daily_metrics.iloc[-1]
 
-        if today_metrics:
             col1, col2, col3, col4 = st.columns(4)
 
             with col1:
@@ -696,74 +872,89 @@ def main():
 
         # Recent performance trend
         st.subheader(f"📈 Performance Trend (Last {num_recent_days} Days)")
-        fig_perf = plot_performance_ratio_trend(df, num_recent_days)
+        fig_perf = plot_performance_ratio_trend(daily_metrics, num_recent_days)
         st.plotly_chart(fig_perf, use_container_width=True)
 
         # Daily production summary
         st.subheader(f"📊 Daily Production (Last {num_recent_days} Days)")
-        fig_daily = plot_daily_summary(df, num_recent_days)
+        fig_daily = plot_daily_summary(daily_metrics, num_recent_days)
         st.plotly_chart(fig_daily, use_container_width=True)
 
+        # Monthly production (monthly rollup, no hourly data)
+        st.subheader("📅 Monthly Production")
+        fig_monthly = plot_monthly_summary(load_monthly_metrics(plant_id, daily_totals))
+        st.plotly_chart(fig_monthly, use_container_width=True)
+
     # TAB 2: DETAILED ANALYSIS
     with tab2:
         st.header("Detailed Time Series Analysis")
 
-        # Date range summary
-        mask = (df.index.date >= start_date) & (df.index.date <= end_date)
-        period_df = df[mask]
-
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Actual", f"{period_df['generation_kwh'].sum():.1f} kWh")
-        with col2:
-            st.metric("Total Predicted", f"{period_df['ml_predicted_kwh'].sum():.1f} kWh")
-        with col3:
-            perf_ratio = (period_df['generation_kwh'].sum() / period_df['ml_predicted_kwh'].sum()) * 100
-            st.metric("Period Performance", f"{perf_ratio:.1f}%")
-
-        # 3-line comparison
-        st.subheader("Production Comparison")
-        fig_comparison = plot_three_line_comparison(df, start_date, end_date)
-        st.plotly_chart(fig_comparison, use_container_width=True)
-
-        # Residuals
-        st.subheader("Residual Analysis")
-        fig_residuals = plot_residuals(df, start_date, end_date)
-        st.plotly_chart(fig_residuals, use_container_width=True)
+        # Only the selected window is loaded
+        period_df = load_range(plant_id, start_date, end_date)
+
+        if period_df is None:
+            st.warning("⚠️ Hourly predictions not available (data/predictions.parquet).")
+        else:
+            # Date range summary
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Actual", f"{period_df['generation_kwh'].sum():.1f} kWh")
+            with col2:
+                st.metric("Total Predicted", f"{period_df['ml_predicted_kwh'].sum():.1f} kWh")
+            with col3:
+                perf_ratio = (period_df['generation_kwh'].sum() / period_df['ml_predicted_kwh'].sum()) * 100
+                st.metric("Period Performance", f"{perf_ratio:.1f}%")
+
+            if len(period_df) > max_points:
+                st.caption(f"Showing up to {max_points:,} of {len(period_df):,} hourly points per trace. "
+                           "Narrow the date range to see full detail.")
+
+            # 3-line comparison
+            st.subheader("Production Comparison")
+            fig_comparison = plot_three_line_comparison(period_df, start_date, end_date, max_points)
+            st.plotly_chart(fig_comparison, use_container_width=True)
+
+            # Residuals
+            st.subheader("Residual Analysis")
+            fig_residuals = plot_residuals(period_df, start_date, end_date, max_points, alert_threshold)
+            st.plotly_chart(fig_residuals, use_container_width=True)
 
     # TAB 3: ANOMALY DETECTION
     with tab3:
         st.header("🚨 Anomaly Detection")
 
         # Find all anomalous days
-        all_dates = sorted(set(df.index.date))
-        anomalous_days = []
-
-        for date in all_dates:
-            metrics = calculate_daily_metrics(df, date)
-            if metrics and metrics['has_anomaly']:
-                anomalous_days.append({
-                    'Date': date,
-                    'Actual (kWh)': metrics['actual_total'],
-                    'Predicted (kWh)': metrics['predicted_total'],
-                    'Performance (%)': metrics['performance_ratio'],
-                    'Deficit (kWh)': metrics['predicted_total'] - metrics['actual_total']
-                })
-
-        if anomalous_days:
+        anomalous_days = daily_metrics[daily_metrics['has_anomaly']]
+
+        if len(anomalous_days) > 0:
             st.warning(f"⚠️ Found {len(anomalous_days)} anomalous days")
 
-            anomaly_df = pd.DataFrame(anomalous_days)
+            anomaly_df = pd.DataFrame({
+                'Date': anomalous_days.index,
+                'Actual (kWh)': anomalous_days['actual_total'].to_numpy(),
+                'Predicted (kWh)': anomalous_days['predicted_total'].to_numpy(),
+                'Performance (%)': anomalous_days['performance_ratio'].to_numpy(),
+                'Deficit (kWh)': anomalous_days['deficit_kwh'].to_numpy()
+            })
             anomaly_df = anomaly_df.sort_values('Date', ascending=False)
+            formats = {
+                'Actual (kWh)': '{:.1f}',
+                'Predicted (kWh)': '{:.1f}',
+                'Performance (%)': '{:.1f}',
+                'Deficit (kWh)': '{:.1f}'
+            }
+
+            # Generator runs on the same day can explain a shortfall
+            generator_daily = load_generator_daily(plant_id)
+            if generator_daily is not None and len(generator_daily) > 0:
+                runtime = generator_daily.set_index(generator_daily['period'].dt.date)['runtime_h']
+                anomaly_df['Generator Runtime (h)'] = anomaly_df['Date'].map(runtime).fillna(0).to_numpy()
+                formats['Generator Runtime (h)'] = '{:.1f}'
 
             # Format display
             st.dataframe(
-                anomaly_df.style.format({
-                    'Actual (kWh)': '{:.1f}',
-                    'Predicted (kWh)': '{:.1f}',
-                    'Performance (%)': '{:.1f}',
-                    'Deficit (kWh)': '{:.1f}'
-                }).background_gradient(subset=['Performance (%)'], cmap='RdYlGn', vmin=50, vmax=100),
+                anomaly_df.style.format(formats).background_gradient(subset=['Performance (%)'], cmap='RdYlGn', vmin=50, vmax=100),
                 use_container_width=True,
                 height=400
             )
@@ -785,100 +976,103 @@ def main():
     with tab4:
         st.header("📉 Model Performance Metrics")
 
-        # Calculate metrics for test set
-        test_date = pd.Timestamp('2024-12-31')
-        if df.index.tz is not None:
-            test_date = test_date.tz_localize(df.index.tz)
-        test_mask = df.index >= test_date
-        test_df = df[test_mask]
-
-        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-
-        y_true = test_df['generation_kwh']
-        y_pred = test_df['ml_predicted_kwh']
-
-        mae = mean_absolute_error(y_true, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-        r2 = r2_score(y_true, y_pred)
+        # Cached per plant / model / predictions version
+        performance = load_model_performance(
+            plant_id,
+            file_version(artifact_path()),
+            predictions_version(plant_id)
+        )
 
-        # Calculate MAPE avoiding division by zero
-        mask_nonzero = y_true > 0
-        if mask_nonzero.sum() > 0:
-            mape = np.mean(np.abs((y_true[mask_nonzero] - y_pred[mask_nonzero]) / y_true[mask_nonzero])) * 100
+        if performance is None:
+            st.warning("⚠️ Hourly predictions not available (data/predictions.parquet).")
         else:
-            mape = 0
+            metrics = performance['metrics']
+            y_true = performance['y_true']
+            y_pred = performance['y_pred']
 
-        col1, col2, col3, col4 = st.columns(4)
-
-        with col1:
-            st.metric("MAE", f"{mae:.2f} kWh")
-        with col2:
-            st.metric("RMSE", f"{rmse:.2f} kWh")
-        with col3:
-            st.metric("R² Score", f"{r2:.4f}")
-        with col4:
-            st.metric("MAPE", f"{mape:.1f}%")
+            col1, col2, col3, col4 = st.columns(4)
 
-        st.markdown("---")
+            with col1:
+                st.metric("MAE", f"{metrics['mae']:.2f} kWh")
+            with col2:
+                st.metric("RMSE", f"{metrics['rmse']:.2f} kWh")
+            with col3:
+                st.metric("R² Score", f"{metrics['r2']:.4f}")
+            with col4:
+                st.metric("MAPE", f"{metrics['mape']:.1f}%")
+
+            exported = performance['exported']
+            if exported:
+                st.caption(
+                    f"{exported.get('model_name', 'Model')} {exported.get('best_params', '')} | "
+                    f"{exported.get('num_features', '?')} features | "
+                    f"notebook test MAE {exported.get('test_mae', float('nan')):.2f} kWh, "
+                    f"R² {exported.get('test_r2', float('nan')):.4f} | "
+                    f"exported {exported.get('export_date', '?')}"
+                )
 
-        # Scatter plot: Predicted vs Actual
-        st.subheader("Predicted vs Actual (Test Set)")
-
-        fig_scatter = go.Figure()
-
-        fig_scatter.add_trace(go.Scatter(
-            x=y_pred,
-            y=y_true,
-            mode='markers',
-            marker=dict(size=4, color='#1f77b4', opacity=0.6),
-            name='Predictions'
-        ))
-
-        # Perfect prediction line
-        max_val = max(y_true.max(), y_pred.max())
-        fig_scatter.add_trace(go.Scatter(
-            x=[0, max_val],
-            y=[0, max_val],
-            mode='lines',
-            line=dict(color='red', dash='dash'),
-            name='Perfect Prediction'
-        ))
-
-        fig_scatter.update_layout(
-            xaxis_title='Predicted (kWh)',
-            yaxis_title='Actual (kWh)',
-            height=500,
-            hovermode='closest'
-        )
+            st.markdown("---")
+
+            # Scatter plot: Predicted vs Actual
+            st.subheader("Predicted vs Actual (Test Set)")
+
+            fig_scatter = go.Figure()
+
+            fig_scatter.add_trace(go.Scatter(
+                x=y_pred,
+                y=y_true,
+                mode='markers',
+                marker=dict(size=4, color='#1f77b4', opacity=0.6),
+                name='Predictions'
+            ))
+
+            # Perfect prediction line
+            max_val = max(y_true.max(), y_pred.max())
+            fig_scatter.add_trace(go.Scatter(
+                x=[0, max_val],
+                y=[0, max_val],
+                mode='lines',
+                line=dict(color='red', dash='dash'),
+                name='Perfect Prediction'
+            ))
+
+            fig_scatter.update_layout(
+                xaxis_title='Predicted (kWh)',
+                yaxis_title='Actual (kWh)',
+                height=500,
+                hovermode='closest'
+            )
 
-        st.plotly_chart(fig_scatter, use_container_width=True)
+            st.plotly_chart(fig_scatter, use_container_width=True)
 
-        # Error distribution
-        st.subheader("Prediction Error Distribution")
+            # Error distribution
+            st.subheader("Prediction Error Distribution")
 
-        errors = y_true - y_pred
+            # Precomputed bins (no raw errors shipped to the browser)
+            edges = performance['hist_edges']
 
-        fig_hist = go.Figure()
-        fig_hist.add_trace(go.Histogram(
-            x=errors,
-            nbinsx=50,
-            name='Error Distribution',
-            marker_color='#1f77b4'
-        ))
+            fig_hist = go.Figure()
+            fig_hist.add_trace(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=performance['hist_counts'],
+                width=np.diff(edges),
+                name='Error Distribution',
+                marker_color='#1f77b4'
+            ))
 
-        fig_hist.update_layout(
-            xaxis_title='Prediction Error (kWh)',
-            yaxis_title='Frequency',
-            height=400
-        )
+            fig_hist.update_layout(
+                xaxis_title='Prediction Error (kWh)',
+                yaxis_title='Frequency',
+                height=400
+            )
 
-        st.plotly_chart(fig_hist, use_container_width=True)
+            st.plotly_chart(fig_hist, use_container_width=True)
 
-        col1, col2 = st.columns(2)
-        with col1:
-            st.metric("Mean Error", f"{errors.mean():.2f} kWh")
-        with col2:
-            st.metric("Std Error", f"{errors.std():.2f} kWh")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Mean Error", f"{performance['error_mean']:.2f} kWh")
+            with col2:
+                st.metric("Std Error", f"{performance['error_std']:.2f} kWh")
 
     # TAB 5: 5-DAY FORECAST
     with tab5:
@@ -900,21 +1094,28 @@ def main():
                 # Fetch weather forecast
                 weather_forecast = fetch_weather_forecast(
                     openweather_api_key,
-                    PLANT_CONFIG['latitude'],
-                    PLANT_CONFIG['longitude']
+                    config['latitude'],
+                    config['longitude']
                 )
 
             if weather_forecast is not None and len(weather_forecast) > 0:
-                st.success(f"✅ Retrieved {len(weather_forecast)} forecast data points (5 days, 3-hour intervals)")
+                # The model is hourly: interpolate the 3-hourly forecast before scoring
+                hourly_forecast = upsample_forecast(weather_forecast)
+                st.success(f"✅ Retrieved {len(weather_forecast)} forecast data points (5 days, 3-hour intervals), "
+                           f"interpolated to {len(hourly_forecast)} hourly steps")
 
                 # Load model and features
-                model = load_model()
-
-                # Try to load feature columns
-                features_path = Path('models/feature_columns.pkl')
-                if features_path.exists():
-                    with open(features_path, 'rb') as f:
-                        feature_columns = pickle.load(f)
+                artifacts = load_model(file_version(artifact_path())) or {}
+                model = artifacts.get('model')
+
+                # Feature columns exported with the model
+                feature_columns = artifacts.get('feature_columns')
+                if feature_columns is not None:
+                    try:
+                        validate_feature_columns(feature_columns)
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
+                        st.stop()
                 else:
                     st.error("❌ Feature columns file not found. Please run the ML notebook to export the model.")
                     st.stop()
@@ -922,21 +1123,34 @@ def main():
                 if model is not None:
                     # Create features from weather forecast
                     with st.spinner('Creating features and predicting production...'):
-                        forecast_with_features = create_forecast_features(weather_forecast, PLANT_CONFIG)
+                        # The model is trained on one plant: other plants are scaled by capacity
+                        model_scale = config['capacity_kwp'] / fleet.at[MODEL_PLANT_ID, 'plant_capacity']
+
+                        # Last week of actuals for the production lag features
+                        recent = load_range(plant_id, max_date - timedelta(days=8), max_date)
+                        history = recent['generation_kwh'] / model_scale if recent is not None else None
+                        forecast_with_features, X_forecast = create_forecast_features(
+                            hourly_forecast, config, feature_columns, history=history
+                        )
 
                         # Make predictions
-                        predictions = predict_production_forecast(forecast_with_features, model, feature_columns)
+                        predictions = predict_production_forecast(forecast_with_features, X_forecast, model)
 
                         if predictions is not None:
+                            predictions = predictions * model_scale
+                            if plant_id != MODEL_PLANT_ID:
+                                st.caption(f"Model trained on {fleet.at[MODEL_PLANT_ID, 'plant_name']}, "
+                                           f"scaled by capacity (x{model_scale:.2f})")
+
                             forecast_with_features['predicted_kwh'] = predictions
 
                             # Summary metrics
                             st.subheader("📊 Forecast Summary")
 
                             total_5day = forecast_with_features['predicted_kwh'].sum()
-                            num_days = len(forecast_with_features) / 8  # 8 data points per day (every 3 hours)
+                            num_days = len(forecast_with_features) / 24  # hourly steps
                             daily_avg = total_5day / num_days if num_days > 0 else 0
-                            max_3h = forecast_with_features['predicted_kwh'].max()
+                            max_1h = forecast_with_features['predicted_kwh'].max()
 
                             col1, col2, col3 = st.columns(3)
                             with col1:
@@ -944,7 +1158,7 @@ def main():
                             with col2:
                                 st.metric("Daily Average", f"{daily_avg:.1f} kWh/day")
                             with col3:
-                                st.metric("Peak 3h Period", f"{max_3h:.1f} kWh")
+                                st.metric("Peak Hour", f"{max_1h:.1f} kWh")
 
                             # Daily aggregated forecast
                             st.subheader("📅 Daily Production Forecast")
@@ -952,14 +1166,14 @@ def main():
                             st.plotly_chart(fig_daily, use_container_width=True)
 
                             # Detailed daily view
-                            st.subheader("🔍 3-Hourly Forecast Details")
+                            st.subheader("🔍 Hourly Forecast Details")
 
                             # Get unique dates
                             forecast_dates = sorted(set(forecast_with_features.index.date))
 
                             # Date selector
                             selected_date = st.selectbox(
-                                "Select a day to view 3-hourly forecast:",
+                                "Select a day to view hourly forecast:",
                                 forecast_dates,
                                 format_func=lambda x: x.strftime("%A, %B %d, %Y")
                             )
@@ -1012,7 +1226,7 @@ def main():
         <p>Solar Plant Monitoring System | Powered by Ridge Regression ML Model</p>
         <p>Data updated: {}</p>
     </div>
-    """.format(df.index.max().strftime("%Y-%m-%d %H:%M")), unsafe_allow_html=True)
+    """.format(pd.Timestamp(daily_totals['last_timestamp'].max()).strftime("%Y-%m-%d %H:%M")), unsafe_allow_html=True)
 
 
 if __name__ == "__main__":
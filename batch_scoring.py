@@ -0,0 +1,207 @@
+"""
+Batch scoring of hourly production with the exported Ridge model
+Replaces the copy-paste notebook export cell: the model bundle is loaded
+once, the 5-minute generation log is streamed once into hourly totals per
+plant, and each plant is then scored in month-aligned chunks:
+- every chunk is built with HISTORY_HOURS of preceding hours for the lag features
+- daytime rows (same filter and NaN policy as HKL_ML_comparison_v2.ipynb) go
+  through model.predict as one contiguous float32 matrix
+- the chunk is written to the partitioned store before the next one is built
+so a multi-year fleet backfill holds one plant's hourly inputs and one chunk
+of features at a time. Rollups are rebuilt from the store at the end.
+
+Usage:
+    python batch_scoring.py                              # HKL (GGI)
+    python batch_scoring.py 11838318 11605154            # selected plants
+    python batch_scoring.py --all --start 2023-01-01     # every active plant
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import solar_tables
+from daily_metrics import build_fleet_rollup, write_fleet_rollup, write_rollups
+from feature_pipeline import (MIN_SUN_ELEVATION, SOLAR_INPUTS, WEATHER_INPUTS, build_feature_matrix,
+                              fill_missing, predict_matrix, validate_feature_columns)
+from ingestion import GENERATION_5M_PATH, hourly_generation
+from model_bundle import BUNDLE_DIR, load_artifacts
+from plants import load_plants
+from prediction_store import STORE_DIR, read_plant, write_partitioned
+
+
+WEATHER_PATH = 'open_data/gazipur_weather.csv'  # OpenWeather history export used for training
+TIMEZONE = 'Asia/Dhaka'
+
+MODEL_PLANT_ID = 11838318  # the model is trained on HKL (GGI); other plants are scaled by capacity
+DEFAULT_PLANT_ID = 11838318  # data/predictions.parquet belongs to this plant
+TYPICAL_PR = 0.82
+START_DATE = '2024-01-01'
+CHUNK_MONTHS = 3
+HISTORY_HOURS = 8 * 24  # production_lag_168h / 7-day means look one week back
+
+OUTPUT_COLUMNS = ['generation_kwh', 'ml_predicted_kwh', 'clearsky_expected_kwh']
+
+
+def load_model(bundle_dir=BUNDLE_DIR):
+    """Exported model and its feature list (validated against the feature schema)"""
+    artifacts = load_artifacts(bundle_dir)
+    if artifacts['model'] is None or artifacts['feature_columns'] is None:
+        raise FileNotFoundError("No exported model: run the notebook export or model_bundle.py")
+    validate_feature_columns(artifacts['feature_columns'])
+    return artifacts['model'], artifacts['feature_columns']
+
+
+def load_weather_history(path=WEATHER_PATH, tz=TIMEZONE):
+    """Hourly weather history (WEATHER_INPUTS) indexed by local time, duplicates averaged"""
+    weather = pd.read_csv(path, usecols=['dt_iso'] + WEATHER_INPUTS)
+    times = pd.to_datetime(weather['dt_iso'].str.replace(' UTC', ''), utc=True).dt.tz_convert(tz)
+    weather = weather[WEATHER_INPUTS].groupby(times.rename('generation_date')).mean()
+    return weather.sort_index()
+
+
+def plant_inputs(generation, weather):
+    """
+    Hourly model inputs of one plant: generation_kwh + weather joined on the
+    hour, interpolated over the plant's whole history as in the notebook
+    """
+    hourly = generation.set_index('generation_date')[['generation_kwh']]
+    hourly = hourly.join(weather.reindex(hourly.index))
+    for col in ('temp', 'visibility', 'clouds_all'):
+        hourly[col] = hourly[col].interpolate(method='linear', limit_direction='both')
+    hourly['rain_1h'] = hourly['rain_1h'].fillna(0)
+    return hourly
+
+
+def month_chunks(index, chunk_months=CHUNK_MONTHS):
+    """[begin, end) row positions of chunks made of whole local months"""
+    months = index.tz_localize(None).to_period('M')
+    starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])[::chunk_months]
+    return list(zip(starts, np.r_[starts[1:], len(index)]))
+
+
+def daytime_features(hourly, plant, feature_columns):
+    """
+    Features of the daytime rows of an hourly frame (generation_kwh + WEATHER_INPUTS).
+    Returns (daytime rows with SOLAR_INPUTS added, contiguous float32 matrix).
+    """
+    hourly = hourly.copy()
+    solar = solar_tables.lookup(hourly.index, plant['latitude'], plant['longitude'])
+    for i, col in enumerate(SOLAR_INPUTS):
+        hourly[col] = solar[:, i]
+
+    daytime = hourly['elevation'].to_numpy() > MIN_SUN_ELEVATION
+    location = {'latitude': plant['latitude'], 'longitude': plant['longitude'], 'timezone': TIMEZONE}
+    X = build_feature_matrix(hourly, location=location, columns=feature_columns, fill=False)
+    X = np.ascontiguousarray(fill_missing(X[daytime]), dtype=np.float32)
+    return hourly[daytime], X
+
+
+def score_chunk(model, feature_columns, hourly, begin, end, plant, model_scale):
+    """
+    Predictions for the daytime rows of hourly[begin:end]. Features are built
+    from HISTORY_HOURS earlier so the lags see the previous chunk.
+    Returns a DataFrame with OUTPUT_COLUMNS indexed by generation_date.
+    """
+    window = hourly.iloc[max(begin - HISTORY_HOURS, 0):end]
+    window = window.assign(generation_kwh=window['generation_kwh'] / model_scale)
+    scored, X = daytime_features(window, plant, feature_columns)
+
+    in_chunk = scored.index >= hourly.index[begin]
+    out = pd.DataFrame({
+        'generation_kwh': hourly['generation_kwh'].reindex(scored.index[in_chunk]).to_numpy(),
+        'ml_predicted_kwh': predict_matrix(model, X[in_chunk]) * model_scale,
+        'clearsky_expected_kwh': scored['ghi'].to_numpy()[in_chunk] / 1000 * plant['plant_capacity'] * TYPICAL_PR,
+    }, index=scored.index[in_chunk])
+    out.index.name = 'generation_date'
+    return out
+
+
+def score_plants(plant_ids, start=START_DATE, generation_path=GENERATION_5M_PATH,
+                 weather_path=WEATHER_PATH, store_dir=STORE_DIR, chunk_months=CHUNK_MONTHS,
+                 bundle_dir=BUNDLE_DIR):
+    """
+    Score the plants into the partitioned predictions store.
+    Returns {plant_id: {'rows', 'months', 'seconds'}} for the plants with generation data.
+    """
+    model, feature_columns = load_model(bundle_dir)
+    fleet = load_plants()
+    weather = load_weather_history(weather_path)
+    model_capacity = fleet.at[MODEL_PLANT_ID, 'plant_capacity']
+
+    start_time = time.time()
+    generation = hourly_generation(generation_path, plant_ids, TIMEZONE, start)
+    print(f"📥 {len(generation):,} plant-hours from {generation_path} ({time.time() - start_time:.1f}s)")
+
+    stats = {}
+    for plant_id, plant_generation in generation.groupby('plant_id', sort=True):
+        start_time = time.time()
+        plant = fleet.loc[plant_id]
+        hourly = plant_inputs(plant_generation, weather)
+        model_scale = plant['plant_capacity'] / model_capacity
+
+        rows = months = 0
+        for begin, end in month_chunks(hourly.index, chunk_months):
+            chunk = score_chunk(model, feature_columns, hourly, begin, end, plant, model_scale)
+            if len(chunk):
+                months += write_partitioned(chunk, plant_id, store_dir)
+                rows += len(chunk)
+
+        stats[plant_id] = {'rows': rows, 'months': months, 'seconds': time.time() - start_time}
+    return stats
+
+
+def refresh_exports(plant_ids, store_dir=STORE_DIR, data_dir='data'):
+    """Rebuild the fleet rollup, and the single-plant export / rollups when the default plant was scored"""
+    data_dir = Path(data_dir)
+    if DEFAULT_PLANT_ID in plant_ids:
+        df = read_plant(DEFAULT_PLANT_ID, store_dir)[OUTPUT_COLUMNS]
+        df.to_parquet(data_dir / 'predictions.parquet')
+        daily, monthly = write_rollups(df, data_dir)
+        print(f"✅ {data_dir / 'predictions.parquet'}: {len(df):,} rows, {len(daily)} days, {len(monthly)} months")
+
+    fleet_daily = build_fleet_rollup(store_dir)
+    path = write_fleet_rollup(fleet_daily, data_dir)
+    print(f"✅ Fleet rollup written: {path} ({fleet_daily['plant_id'].nunique()} plants, "
+          f"{len(fleet_daily)} plant-days)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score hourly production into data/predictions/")
+    parser.add_argument('plant_ids', nargs='*', type=int, help=f"plants to score (default: {DEFAULT_PLANT_ID})")
+    parser.add_argument('--all', action='store_true', help="score every active plant")
+    parser.add_argument('--start', default=START_DATE, help="first local date to score")
+    parser.add_argument('--generation', default=GENERATION_5M_PATH, help="5-minute generation log")
+    parser.add_argument('--weather', default=WEATHER_PATH, help="OpenWeather history export")
+    parser.add_argument('--chunk-months', type=int, default=CHUNK_MONTHS, help="months scored per chunk")
+    args = parser.parse_args()
+
+    if args.all:
+        fleet = load_plants()
+        plant_ids = fleet.index[fleet['status'] == 'active'].tolist()
+    else:
+        plant_ids = args.plant_ids or [DEFAULT_PLANT_ID]
+
+    print("=" * 80)
+    print(f"🧮 BATCH SCORING {len(plant_ids)} PLANT(S) FROM {args.start}")
+    print("=" * 80)
+
+    start_time = time.time()
+    stats = score_plants(plant_ids, args.start, args.generation, args.weather,
+                         chunk_months=args.chunk_months)
+    elapsed = time.time() - start_time
+
+    for plant_id, s in stats.items():
+        print(f"✅ {plant_id}: {s['rows']:,} rows, {s['months']} months "
+              f"({s['rows'] / max(s['seconds'], 1e-9):,.0f} rows/s)")
+    missing = sorted(set(plant_ids) - set(stats))
+    if missing:
+        print(f"⚠️ No generation data for: {missing}")
+
+    total = sum(s['rows'] for s in stats.values())
+    print(f"\n⏱️  {total:,} rows scored in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    refresh_exports(list(stats))
@@ -0,0 +1,222 @@
+"""
+Daily performance metrics for the Solar Monitoring Dashboard
+Vectorized daily aggregation of the hourly predictions (one grouped pass per dataset)
+and daily / monthly rollup tables persisted next to data/predictions.parquet.
+The fleet rollup holds the daily totals of every plant (plant_id, date) so the
+fleet overview never loads hourly data.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from prediction_store import STORE_DIR, list_plants, read_plant
+
+
+# Rollup files written alongside the hourly predictions
+ROLLUP_FILES = {
+    'daily': 'predictions_daily.parquet',
+    'monthly': 'predictions_monthly.parquet',
+    'fleet_daily': 'predictions_daily_fleet.parquet',
+}
+
+
+# Daily totals produced by aggregate_daily_metrics (threshold independent)
+DAILY_TOTAL_COLUMNS = [
+    'actual_total',
+    'predicted_total',
+    'clearsky_total',
+    'actual_peak',
+    'predicted_peak',
+    'num_hours',
+    'last_timestamp',
+]
+
+
+def aggregate_daily_metrics(df):
+    """
+    Aggregate hourly predictions to one row per local calendar day.
+
+    Uses a single groupby on the normalized DatetimeIndex instead of
+    masking the whole frame once per date.
+    Returns a DataFrame indexed by `date` with DAILY_TOTAL_COLUMNS.
+    """
+    if len(df) == 0:
+        return pd.DataFrame(columns=DAILY_TOTAL_COLUMNS, index=pd.Index([], name='date'))
+
+    daily = _daily_totals(df, [df.index.normalize()])
+    daily.index = pd.Index(daily.index.date, name='date')
+    return daily
+
+
+def _daily_totals(df, keys):
+    """DAILY_TOTAL_COLUMNS per group of `keys` (one grouped pass)"""
+    return df.assign(timestamp=df.index).groupby(keys).agg(
+        actual_total=('generation_kwh', 'sum'),
+        predicted_total=('ml_predicted_kwh', 'sum'),
+        clearsky_total=('clearsky_expected_kwh', 'sum'),
+        actual_peak=('generation_kwh', 'max'),
+        predicted_peak=('ml_predicted_kwh', 'max'),
+        num_hours=('generation_kwh', 'size'),
+        last_timestamp=('timestamp', 'max'),
+    )
+
+
+def fleet_overview(fleet_daily, plants, alert_threshold_pct, num_days=30):
+    """
+    Performance and anomaly status of every plant over its last num_days days.
+
+    fleet_daily: fleet rollup (plant_id, date, DAILY_TOTAL_COLUMNS)
+    plants: load_plants() frame (plant_name, plant_capacity by plant_id)
+    Returns a DataFrame indexed by plant_id: plant_name, capacity_kwp, last_date,
+    num_days, actual_total, predicted_total, performance_ratio (window totals),
+    specific_yield (kWh/kWp/day), anomalous_days, latest_ratio, latest_anomaly.
+    """
+    daily = apply_alert_threshold(fleet_daily, alert_threshold_pct)
+    dates = pd.to_datetime(daily['date'])
+
+    # Window: the last num_days days of each plant
+    last = dates.groupby(daily['plant_id']).transform('max')
+    daily = daily[(dates > last - pd.Timedelta(days=num_days)).to_numpy()]
+    daily = daily.sort_values(['plant_id', 'date'], kind='stable')
+
+    overview = daily.groupby('plant_id').agg(
+        last_date=('date', 'max'),
+        num_days=('date', 'size'),
+        actual_total=('actual_total', 'sum'),
+        predicted_total=('predicted_total', 'sum'),
+        anomalous_days=('has_anomaly', 'sum'),
+        latest_ratio=('performance_ratio', 'last'),
+        latest_anomaly=('has_anomaly', 'last'),
+    )
+
+    actual = overview['actual_total'].to_numpy(dtype=float)
+    predicted = overview['predicted_total'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overview['performance_ratio'] = np.where(predicted > 0, actual / predicted * 100, 0.0)
+
+    meta = plants.reindex(overview.index)
+    overview.insert(0, 'plant_name', meta['plant_name'].fillna(overview.index.to_series().astype(str)))
+    overview.insert(1, 'capacity_kwp', meta['plant_capacity'])
+    overview['specific_yield'] = overview['actual_total'] / overview['capacity_kwp'] / overview['num_days']
+
+    return overview
+
+
+def apply_alert_threshold(daily, alert_threshold_pct):
+    """
+    Add performance ratio and anomaly flag to daily totals.
+
+    performance_ratio = actual / predicted * 100 (0 when nothing was predicted)
+    has_anomaly is True when the ratio is below (100 - alert_threshold_pct)
+    """
+    daily = daily.copy()
+
+    actual = daily['actual_total'].to_numpy(dtype=float)
+    predicted = daily['predicted_total'].to_numpy(dtype=float)
+
+    # Avoid division by zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(predicted > 0, actual / predicted * 100, 0.0)
+
+    daily['performance_ratio'] = ratio
+    daily['has_anomaly'] = ratio < (100 - alert_threshold_pct)
+    daily['deficit_kwh'] = predicted - actual
+
+    return daily
+
+
+def aggregate_monthly_metrics(daily):
+    """
+    Roll daily totals up to calendar months.
+    Returns a DataFrame indexed by `month` (first day of the month).
+    """
+    months = pd.to_datetime(pd.Index(daily.index)).to_period('M')
+
+    monthly = daily.groupby(months).agg(
+        actual_total=('actual_total', 'sum'),
+        predicted_total=('predicted_total', 'sum'),
+        clearsky_total=('clearsky_total', 'sum'),
+        actual_peak=('actual_peak', 'max'),
+        predicted_peak=('predicted_peak', 'max'),
+        num_hours=('num_hours', 'sum'),
+        num_days=('num_hours', 'size'),
+    )
+
+    monthly.index = pd.Index(monthly.index.to_timestamp().date, name='month')
+    return monthly
+
+
+def rollup_paths(data_dir='data'):
+    """Return {'daily', 'monthly', 'fleet_daily'} -> Path for the rollup files in data_dir"""
+    data_dir = Path(data_dir)
+    return {name: data_dir / filename for name, filename in ROLLUP_FILES.items()}
+
+
+def write_rollups(df, data_dir='data'):
+    """
+    Build and write the daily and monthly rollup tables from hourly predictions.
+    Returns (daily, monthly) DataFrames.
+    """
+    paths = rollup_paths(data_dir)
+
+    daily = aggregate_daily_metrics(df)
+    monthly = aggregate_monthly_metrics(daily)
+
+    daily.to_parquet(paths['daily'])
+    monthly.to_parquet(paths['monthly'])
+
+    return daily, monthly
+
+
+def write_fleet_rollup(fleet_daily, data_dir='data'):
+    """Write the fleet daily rollup (plant_id, date, DAILY_TOTAL_COLUMNS)"""
+    path = rollup_paths(data_dir)['fleet_daily']
+    fleet_daily.reset_index(drop=True).to_parquet(path)
+    return path
+
+
+def build_fleet_rollup(store_dir=STORE_DIR):
+    """Fleet rollup from the partitioned predictions store, one plant in memory at a time"""
+    frames = []
+    for plant_id in list_plants(store_dir):
+        daily = aggregate_daily_metrics(read_plant(plant_id, store_dir)).reset_index()
+        daily.insert(0, 'plant_id', plant_id)
+        frames.append(daily)
+
+    if not frames:
+        return pd.DataFrame(columns=['plant_id', 'date'] + DAILY_TOTAL_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def update_fleet_rollup(daily, plant_id, data_dir='data'):
+    """
+    Replace one plant's rows of the fleet rollup with its daily totals
+    (aggregate_daily_metrics output). Returns the updated fleet rollup.
+    """
+    path = rollup_paths(data_dir)['fleet_daily']
+    fleet = read_fleet_rollup(path) if path.exists() else None
+
+    plant_daily = daily.reset_index()
+    plant_daily.insert(0, 'plant_id', int(plant_id))
+    if fleet is not None:
+        plant_daily = pd.concat([fleet[fleet['plant_id'] != int(plant_id)], plant_daily], ignore_index=True)
+
+    plant_daily = plant_daily.sort_values(['plant_id', 'date'], kind='stable').reset_index(drop=True)
+    write_fleet_rollup(plant_daily, data_dir)
+    return plant_daily
+
+
+def read_fleet_rollup(path):
+    """Read the fleet rollup back (date as datetime.date)"""
+    fleet = pd.read_parquet(path)
+    fleet['date'] = pd.to_datetime(fleet['date']).dt.date
+    return fleet
+
+
+def read_rollup(path):
+    """Read a rollup parquet file back with a `date` index"""
+    rollup = pd.read_parquet(path)
+    rollup.index = pd.Index(pd.to_datetime(rollup.index).date, name=rollup.index.name)
+    return rollup
@@ -0,0 +1,105 @@
+"""
+Server-side downsampling for Plotly time-series traces
+Caps the number of points sent to the browser while keeping peaks and dips:
+- LTTB (Largest-Triangle-Three-Buckets) for line traces
+- min/max per bucket for bar traces (residuals)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Default cap per trace (~2 points per pixel on a wide dashboard chart)
+DEFAULT_MAX_POINTS = 2000
+
+
+def _as_float_x(x):
+    """Numeric x axis (nanoseconds for datetimes) for triangle areas"""
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(float)
+    return np.asarray(x, dtype=float)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    First and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the previous pick and the next
+    bucket's average, which preserves the visual shape (peaks and dips).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float_x(x)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+
+    # n_out - 2 buckets between the first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Indices of the min and max of each bucket (about n_out points in total).
+
+    Fully vectorized: points are sorted once by (bucket, value) and the first
+    and last entry of every bucket are kept. NaNs never win a bucket.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    bucket = (np.arange(n) * n_buckets) // n
+    nan = np.isnan(y)
+
+    order_min = np.lexsort((np.where(nan, np.inf, y), bucket))
+    order_max = np.lexsort((np.where(nan, -np.inf, y), bucket))
+
+    sorted_bucket = bucket[order_min]
+    first = np.r_[0, np.flatnonzero(np.diff(sorted_bucket)) + 1]
+    last = np.r_[first[1:] - 1, n - 1]
+
+    return np.unique(np.concatenate([order_min[first], order_max[last]]))
+
+
+def downsample_series(x, y, max_points=DEFAULT_MAX_POINTS, method='lttb'):
+    """
+    Downsample one trace to at most max_points.
+    Returns (x, y) unchanged when the trace already fits (full detail).
+    """
+    if max_points is None or len(y) <= max_points:
+        return x, y
+
+    if method == 'minmax':
+        idx = minmax_indices(y, max_points)
+    else:
+        idx = lttb_indices(x, y, max_points)
+
+    if isinstance(y, pd.Series):
+        return x[idx], y.iloc[idx]
+    return x[idx], np.asarray(y)[idx]
@@ -1,13 +1,28 @@
 """
 Export predictions from ML notebook to Streamlit app format
 Run this after training the model in HKL_ML_comparison_v2.ipynb
+
+Usage:
+    python export_predictions.py             # HKL (GGI)
+    python export_predictions.py 11605154    # predictions.parquet belongs to another plant
+
+Once models/ridge_model.pkl is exported, batch_scoring.py re-scores any plant
+and date range without the notebook.
 """
 
+import sys
+
 import pandas as pd
 import pickle
 from pathlib import Path
 
-def export_predictions_for_streamlit():
+from daily_metrics import build_fleet_rollup, rollup_paths, write_fleet_rollup, write_rollups
+from model_bundle import bundle_is_stale, has_bundle, load_bundle, load_legacy, write_bundle
+from prediction_store import write_partitioned
+
+PLANT_ID = 11838318  # HKL (GGI) in data/inverter_plants.csv
+
+def export_predictions_for_streamlit(plant_id=PLANT_ID):
     """
     Export the test predictions to a format Streamlit can load
     """
@@ -34,6 +49,10 @@ def export_predictions_for_streamlit():
 import pickle
 from pathlib import Path
 
+from daily_metrics import update_fleet_rollup, write_rollups
+from model_bundle import write_bundle
+from prediction_store import write_partitioned
+
 # Create directories
 Path('data').mkdir(exist_ok=True)
 Path('models').mkdir(exist_ok=True)
@@ -58,6 +77,13 @@ export_df = full_predictions_df[required_columns].copy()
 export_df.to_parquet('data/predictions.parquet')
 print(f"✅ Exported {len(export_df)} rows to data/predictions.parquet")
 
+# Export partitioned copy (plant_id / month) and daily / monthly rollups
+write_partitioned(export_df, 11838318, 'data/predictions')  # HKL (GGI)
+daily, _ = write_rollups(export_df, 'data')
+update_fleet_rollup(daily, 11838318, 'data')
+print("✅ Exported rollups to data/predictions_daily.parquet, data/predictions_monthly.parquet "
+      "and data/predictions_daily_fleet.parquet")
+
 # Export the trained model
 with open('models/ridge_model.pkl', 'wb') as f:
     pickle.dump(best_ridge_model, f)
@@ -68,6 +94,27 @@ with open('models/feature_columns.pkl', 'wb') as f:
     pickle.dump(feature_columns, f)
 print("✅ Exported feature columns to models/feature_columns.pkl")
 
+# Export model performance metrics (shown in the dashboard's performance tab)
+metrics_dict = {
+    'model_name': 'Ridge Regression',
+    'test_mae': test_mae_ridge,
+    'test_rmse': test_rmse_ridge,
+    'test_r2': test_r2_ridge,
+    'test_mape': test_mape_ridge,
+    'best_params': best_ridge_params,
+    'num_features': len(feature_columns),
+    'train_samples': len(train_df),
+    'test_samples': len(test_df),
+    'export_date': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+}
+with open('models/model_metrics.pkl', 'wb') as f:
+    pickle.dump(metrics_dict, f)
+print("✅ Exported model metrics to models/model_metrics.pkl")
+
+# Model bundle read by the dashboard (JSON manifest + coefficients, no sklearn needed)
+write_bundle(best_ridge_model, feature_columns, metrics_dict, 'models/bundle')
+print("✅ Exported model bundle to models/bundle/")
+
 print("\\n" + "=" * 80)
 print("EXPORT COMPLETE - Ready for Streamlit!")
 print("=" * 80)
@@ -88,6 +135,23 @@ print("\\nRun: streamlit run app_solar_monitoring.py")
         print(f"   - Rows: {len(df)}")
         print(f"   - Columns: {list(df.columns)}")
         print(f"   - Date range: {df.index.min()} to {df.index.max()}")
+
+        # Rollup stage: rebuild daily / monthly tables from the hourly file
+        daily, monthly = write_rollups(df, data_dir)
+        paths = rollup_paths(data_dir)
+        print(f"✅ Daily rollup written: {paths['daily']} ({len(daily)} days)")
+        print(f"✅ Monthly rollup written: {paths['monthly']} ({len(monthly)} months)")
+
+        # Partitioned store for date-range reads
+        num_months = write_partitioned(df, plant_id, data_dir / 'predictions')
+        print(f"✅ Partitioned store written: {data_dir / 'predictions'}/plant_id={plant_id} "
+              f"({num_months} months)")
+
+        # Fleet rollup: daily totals of every plant in the store
+        fleet_daily = build_fleet_rollup(data_dir / 'predictions')
+        write_fleet_rollup(fleet_daily, data_dir)
+        print(f"✅ Fleet rollup written: {paths['fleet_daily']} "
+              f"({fleet_daily['plant_id'].nunique()} plants, {len(fleet_daily)} plant-days)")
     else:
         print(f"❌ Predictions file not found: {pred_file}")
 
@@ -104,7 +168,17 @@ print("\\nRun: streamlit run app_solar_monitoring.py")
     else:
         print(f"❌ Feature columns file not found: {features_file}")
 
+    # Model bundle: converted from the pickles when missing or older than the pickle
+    if has_bundle(models_dir / 'bundle') and not bundle_is_stale(models_dir / 'bundle'):
+        manifest = load_bundle(models_dir / 'bundle')['manifest']
+        print(f"✅ Model bundle found: {models_dir / 'bundle'} ({manifest['kind']}, {manifest['created']})")
+    elif model_file.exists() and features_file.exists():
+        legacy = load_legacy()
+        manifest = write_bundle(legacy['model'], legacy['feature_columns'], legacy['metrics'],
+                                models_dir / 'bundle')
+        print(f"✅ Model bundle written: {models_dir / 'bundle'} ({manifest['kind']})")
+
     print("\n" + "=" * 80)
 
 if __name__ == "__main__":
-    export_predictions_for_streamlit()
+    export_predictions_for_streamlit(int(sys.argv[1]) if len(sys.argv) > 1 else PLANT_ID)
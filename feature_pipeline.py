@@ -0,0 +1,317 @@
+"""
+Feature pipeline shared by training, batch scoring and the forecast tab
+Builds the Ridge model features (same recipe as HKL_ML_comparison_v2.ipynb)
+in one vectorized pass straight into a float32 matrix.
+
+Calendar terms are memoized per timestamp, so repeated calls (dashboard
+reruns, chunked scoring) only compute timestamps not seen before. Solar
+terms are read from the per-plant lookup table (solar_tables.py).
+"""
+
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import solar_tables
+
+
+TIMEZONE = 'Asia/Dhaka'
+MIN_SUN_ELEVATION = 5  # model is trained on daytime hours only
+
+# Declared schema: feature name -> group it is derived from
+FEATURE_SCHEMA = {
+    # Solar position / clear-sky
+    'elevation': 'solar',
+    'azimuth': 'solar',
+    'ghi': 'solar',
+    # Weather
+    'temp': 'weather',
+    'visibility': 'weather',
+    'rain_1h': 'weather',
+    'clouds_all': 'weather',
+    # Calendar
+    'hour': 'calendar',
+    'day_of_year': 'calendar',
+    'month': 'calendar',
+    'day_of_week': 'calendar',
+    'hour_sin': 'calendar',
+    'hour_cos': 'calendar',
+    'day_sin': 'calendar',
+    'day_cos': 'calendar',
+    # Derived weather / interactions
+    'cloud_impact': 'derived',
+    'has_rain': 'derived',
+    'temp_squared': 'derived',
+    'effective_irradiance': 'derived',
+    'ghi_x_cloud': 'derived',
+    'elevation_x_cloud': 'derived',
+    # Production history
+    'production_lag_24h': 'history',
+    'production_lag_168h': 'history',
+    'production_7d_mean': 'history',
+    'temp_7d_mean': 'history',
+}
+
+FEATURE_COLUMNS = list(FEATURE_SCHEMA)
+
+WEATHER_INPUTS = ['temp', 'visibility', 'rain_1h', 'clouds_all']
+SOLAR_INPUTS = ['elevation', 'azimuth', 'ghi']
+CALENDAR_TERMS = ['hour', 'day_of_year', 'month', 'day_of_week',
+                  'hour_sin', 'hour_cos', 'day_sin', 'day_cos']
+
+HOUR_NS = 3600 * 10**9
+
+
+class _TermCache:
+    """
+    Per-timestamp memo of a block of terms (float64 columns).
+    Keys are int64 epoch nanoseconds kept sorted, lookups are vectorized.
+    """
+
+    def __init__(self, n_terms):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, n_terms))
+        self.lock = threading.Lock()
+
+    def lookup(self, ns, compute):
+        with self.lock:
+            pos = np.searchsorted(self.keys, ns).clip(0, max(len(self.keys) - 1, 0))
+            hit = (len(self.keys) > 0) & (self.keys[pos] == ns) if len(self.keys) else np.zeros(len(ns), bool)
+
+            if not hit.all():
+                missing = np.unique(ns[~hit])
+                keys = np.concatenate([self.keys, missing])
+                values = np.concatenate([self.values, compute(missing)])
+                order = np.argsort(keys, kind='stable')
+                self.keys, self.values = keys[order], values[order]
+                pos = np.searchsorted(self.keys, ns)
+
+            return self.values[pos]
+
+
+_calendar_caches = {}
+_caches_guard = threading.Lock()
+
+
+def _cache_for(caches, key, n_terms):
+    with _caches_guard:
+        return caches.setdefault(key, _TermCache(n_terms))
+
+
+def _compute_calendar(ns, tz):
+    local = pd.DatetimeIndex(ns, tz='UTC').tz_convert(tz)
+    hour = local.hour.to_numpy(dtype=float)
+    day_of_year = local.dayofyear.to_numpy(dtype=float)
+
+    return np.column_stack([
+        hour,
+        day_of_year,
+        local.month.to_numpy(dtype=float),
+        local.dayofweek.to_numpy(dtype=float),
+        np.sin(2 * np.pi * hour / 24),
+        np.cos(2 * np.pi * hour / 24),
+        np.sin(2 * np.pi * day_of_year / 365),
+        np.cos(2 * np.pi * day_of_year / 365),
+    ])
+
+
+def _utc_ns(index):
+    if index.tz is None:
+        raise ValueError("feature pipeline needs a tz-aware DatetimeIndex")
+    return index.tz_convert('UTC').as_unit('ns').asi8
+
+
+def calendar_terms(index, tz=TIMEZONE):
+    """Calendar terms (CALENDAR_TERMS order) for a tz-aware DatetimeIndex, memoized per timestamp"""
+    cache = _cache_for(_calendar_caches, tz, len(CALENDAR_TERMS))
+    return cache.lookup(_utc_ns(index), lambda ns: _compute_calendar(ns, tz))
+
+
+def solar_terms(index, location):
+    """
+    Elevation, azimuth and clear-sky GHI for a tz-aware DatetimeIndex (solar lookup table).
+    location: dict with latitude and longitude (PLANT_CONFIG)
+    """
+    return solar_tables.lookup(index, location['latitude'], location['longitude'])
+
+
+def validate_feature_columns(columns):
+    """Raise ValueError if the model expects features this pipeline does not build"""
+    unknown = [col for col in columns if col not in FEATURE_SCHEMA]
+    if unknown:
+        raise ValueError(f"Unknown feature columns (not in feature_pipeline.FEATURE_SCHEMA): {unknown}")
+
+
+def _lookup_at(ns, series_ns, series_values, offset_ns):
+    """Value of a timestamped series at ns - offset (NaN when that hour is absent)"""
+    target = ns - offset_ns
+    pos = np.searchsorted(series_ns, target).clip(0, max(len(series_ns) - 1, 0))
+    out = np.full(len(ns), np.nan)
+    if len(series_ns):
+        found = series_ns[pos] == target
+        out[found] = series_values[pos[found]]
+    return out
+
+
+def _rolling_7d_mean(ns, series_ns, series_values):
+    """Mean over the trailing 168 hours (min 24 values), as in the training notebook"""
+    series = pd.Series(series_values, index=pd.DatetimeIndex(series_ns, tz='UTC'))
+    rolled = series.rolling('168h', min_periods=24).mean()
+    return _lookup_at(ns, series_ns, rolled.to_numpy(), 0)
+
+
+def _hour_profile(history, tz):
+    """Mean generation per local hour over the last 7 days of history (24 values)"""
+    if history is None or len(history) == 0:
+        return np.full(24, np.nan)
+    recent = history[history.index >= history.index.max() - pd.Timedelta(days=7)]
+    hours = recent.index.tz_convert(tz).hour
+    profile = recent.groupby(hours).mean()
+    return profile.reindex(range(24)).to_numpy(dtype=float)
+
+
+def fill_missing(X):
+    """Column-wise ffill, then bfill, then 0 (training notebook NaN policy)"""
+    n = len(X)
+    if n == 0:
+        return X
+    rows = np.arange(n)[:, None]
+
+    valid = ~np.isnan(X)
+    idx = np.where(valid, rows, 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    X = np.take_along_axis(X, idx, axis=0)
+
+    valid = ~np.isnan(X)
+    idx = np.where(valid, rows, n - 1)
+    idx = np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+    X = np.take_along_axis(X, idx, axis=0)
+
+    return np.nan_to_num(X, nan=0.0)
+
+
+def build_feature_matrix(hourly, location=None, history=None, columns=FEATURE_COLUMNS, fill=True):
+    """
+    Build the model features for hourly rows in one pass.
+
+    hourly: DataFrame indexed by tz-aware hourly timestamps with WEATHER_INPUTS
+            (+ optional SOLAR_INPUTS, + optional generation_kwh for lags)
+    location: PLANT_CONFIG-like dict, required when SOLAR_INPUTS are absent
+    history: optional generation_kwh Series preceding `hourly` (forecast inference).
+             Lags that fall outside the known history use its same-hour 7-day mean.
+    fill: apply the training NaN policy (ffill, bfill, 0)
+
+    Returns a float32 array of shape (len(hourly), len(columns)).
+    """
+    columns = list(columns)
+    validate_feature_columns(columns)
+
+    missing = [col for col in WEATHER_INPUTS if col not in hourly.columns]
+    if missing:
+        raise ValueError(f"Missing weather inputs: {missing}")
+
+    tz = (location or {}).get('timezone', TIMEZONE)
+    index = hourly.index
+    ns = _utc_ns(index)
+    n = len(hourly)
+
+    terms = {col: hourly[col].to_numpy(dtype=float) for col in WEATHER_INPUTS}
+
+    # Solar position / clear-sky
+    if all(col in hourly.columns for col in SOLAR_INPUTS):
+        for col in SOLAR_INPUTS:
+            terms[col] = hourly[col].to_numpy(dtype=float)
+    elif any(FEATURE_SCHEMA[col] in ('solar', 'derived') for col in columns):
+        if location is None:
+            raise ValueError("location is required when elevation / azimuth / ghi are not provided")
+        solar = solar_terms(index, location)
+        for i, col in enumerate(SOLAR_INPUTS):
+            terms[col] = solar[:, i]
+
+    # Calendar
+    if any(FEATURE_SCHEMA[col] == 'calendar' for col in columns):
+        calendar = calendar_terms(index, tz)
+        for i, col in enumerate(CALENDAR_TERMS):
+            terms[col] = calendar[:, i]
+
+    # Derived weather / interactions
+    cloud_impact = 1 - terms['clouds_all'] / 100
+    terms['cloud_impact'] = cloud_impact
+    terms['has_rain'] = (terms['rain_1h'] > 0).astype(float)
+    terms['temp_squared'] = terms['temp'] ** 2
+    if 'ghi' in terms:
+        terms['effective_irradiance'] = terms['ghi'] * cloud_impact
+        terms['ghi_x_cloud'] = terms['ghi'] * cloud_impact
+        terms['elevation_x_cloud'] = terms['elevation'] * cloud_impact
+
+    # Production history (looked up by timestamp, robust to missing hours)
+    if any(FEATURE_SCHEMA[col] == 'history' for col in columns):
+        generation = hourly['generation_kwh'] if 'generation_kwh' in hourly.columns else None
+        parts = [s.dropna() for s in (history, generation) if s is not None]
+        if parts:
+            series = pd.concat(parts)
+            series = series[~series.index.duplicated(keep='last')].sort_index()
+        else:
+            series = pd.Series(dtype=float, index=pd.DatetimeIndex([], tz='UTC'))
+        series_ns = _utc_ns(series.index)
+        series_values = series.to_numpy(dtype=float)
+
+        terms['production_lag_24h'] = _lookup_at(ns, series_ns, series_values, 24 * HOUR_NS)
+        terms['production_lag_168h'] = _lookup_at(ns, series_ns, series_values, 168 * HOUR_NS)
+        terms['production_7d_mean'] = _rolling_7d_mean(ns, series_ns, series_values)
+
+        temp_series = pd.Series(terms['temp'], index=pd.DatetimeIndex(ns, tz='UTC'))
+        terms['temp_7d_mean'] = temp_series.rolling('168h', min_periods=24).mean().to_numpy(copy=True)
+
+        # Forecast horizon: unknown production -> same-hour profile of recent history
+        if history is not None:
+            profile = _hour_profile(history.dropna(), tz)
+            local_hour = terms['hour'].astype(int) if 'hour' in terms else index.tz_convert(tz).hour.to_numpy()
+            for col in ('production_lag_24h', 'production_lag_168h', 'production_7d_mean'):
+                gaps = np.isnan(terms[col])
+                terms[col][gaps] = profile[local_hour[gaps]]
+            gaps = np.isnan(terms['temp_7d_mean'])
+            terms['temp_7d_mean'][gaps] = np.nanmean(terms['temp']) if n else np.nan
+
+    X = np.empty((n, len(columns)), dtype=np.float64)
+    for j, col in enumerate(columns):
+        X[:, j] = terms[col]
+
+    if fill:
+        X = fill_missing(X)
+
+    return X.astype(np.float32, copy=False)
+
+
+def build_feature_frame(hourly, location=None, history=None, columns=FEATURE_COLUMNS, fill=True):
+    """build_feature_matrix wrapped in a DataFrame (same index as hourly)"""
+    X = build_feature_matrix(hourly, location=location, history=history, columns=columns, fill=fill)
+    return pd.DataFrame(X, index=hourly.index, columns=list(columns))
+
+
+def add_model_features(df, location=None, time_column='generation_date'):
+    """
+    Notebook helper: add FEATURE_COLUMNS to an hourly DataFrame with a
+    `generation_date` column (no NaN filling, done after the train/test split).
+    """
+    hourly = df.set_index(time_column)
+    features = build_feature_frame(hourly, location=location, fill=False)
+    features = features.astype(np.float64)
+
+    df = df.copy()
+    for col in FEATURE_COLUMNS:
+        df[col] = features[col].to_numpy()
+    return df
+
+
+def predict_matrix(model, X):
+    """
+    Model predictions for a feature matrix, clipped at 0.
+    The model was fitted on a DataFrame; the matrix columns follow feature_columns.pkl.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        predictions = model.predict(X)
+    return np.maximum(predictions, 0)
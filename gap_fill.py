@@ -0,0 +1,159 @@
+"""
+Fleet gap-fill engine for 5-minute generation
+Generalizes smart_fill_energy (HKL.ipynb) to every plant at once, working on
+a stacked (plant, slot) array:
+- night (sun below the horizon) -> 0
+- short gaps (<= 2 h) between two readings -> linear interpolation
+- medium gaps (<= 7 days) -> clear-sky expectation (GHI x capacity x PR)
+- longer gaps -> left NaN and flagged in a long-gap mask
+Gaps are found by run-length encoding the missing mask, no loop over plants.
+"""
+
+import numpy as np
+import pandas as pd
+
+import solar_tables
+import time_grid
+
+
+SLOT_MINUTES = 5
+SHORT_GAP_SLOTS = 24            # 2 hours
+MEDIUM_GAP_SLOTS = 7 * 24 * 12  # 7 days
+TYPICAL_PR = 0.82
+TIMEZONE = 'Asia/Dhaka'
+
+# fill_method codes
+OBSERVED, NIGHT, INTERPOLATED, CLEARSKY, LONG_GAP = 0, 1, 2, 3, 4
+FILL_METHODS = {OBSERVED: 'observed', NIGHT: 'night', INTERPOLATED: 'interpolated',
+                CLEARSKY: 'clearsky', LONG_GAP: 'long_gap'}
+
+
+def stack_fleet(df, value_column='generation_kwh', time_column='generation_date',
+                slot_minutes=SLOT_MINUTES, tz=TIMEZONE):
+    """
+    Scatter long (plant_id, timestamp, value) rows into a (n_plants, n_slots)
+    array on a common 5-minute grid (NaN where no reading; last row wins on
+    duplicates). Returns (plant_ids, times, values).
+    """
+    grid = time_grid.build_grid(df['plant_id'].to_numpy(), df[time_column], df[value_column],
+                                slot_seconds=slot_minutes * 60)
+    return grid['plant_ids'], time_grid.grid_times(grid, tz), grid['values']
+
+
+def fleet_solar(latitudes, longitudes, times):
+    """
+    Elevation and clear-sky GHI for every plant and slot from the solar lookup
+    tables (one table per location, one fancy index for the whole grid).
+    Returns (elevation, ghi), each (n_plants, n_slots).
+    """
+    coords = np.round(np.column_stack([latitudes, longitudes]).astype(float), 4)
+    unique, plant_table = np.unique(coords, axis=0, return_inverse=True)
+    tables = np.stack([solar_tables.load_table(lat, lon) for lat, lon in unique])
+
+    solar = tables[plant_table.ravel()[:, None], solar_tables.slot_index(times)[None, :]]
+    return solar[..., 0].astype(float), solar[..., 2].astype(float)
+
+
+def _gap_runs(missing):
+    """
+    Run-length encode NaN runs of every row at once.
+    Returns (row, start, length) arrays; runs never span two rows.
+    """
+    n_rows, n_cols = missing.shape
+    padded = np.zeros((n_rows, n_cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = missing
+    edges = np.diff(padded.ravel())
+
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    row = starts // (n_cols + 2)
+    start = starts % (n_cols + 2)
+    return row, start, ends - starts
+
+
+def _slot_runs(row, start, length):
+    """Expand runs to per-slot (row, col, run index) arrays"""
+    run = np.repeat(np.arange(len(length)), length)
+    offset = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+    return row[run], start[run] + offset, run
+
+
+def fill_gaps(energy, elevation, ghi, capacity_kwp, pr=TYPICAL_PR,
+              short_gap=SHORT_GAP_SLOTS, medium_gap=MEDIUM_GAP_SLOTS, slot_minutes=SLOT_MINUTES):
+    """
+    Fill a stacked (n_plants, n_slots) energy array (kWh per slot, NaN = missing).
+
+    Gap length is the length of the outage itself (nights inside an outage
+    count), so a multi-day outage stays a long gap instead of being split
+    into daylight segments.
+
+    capacity_kwp: one value per plant (clear-sky fill = ghi/1000 x kWp x PR x slot hours)
+    Returns a dict with 'energy' (filled), 'fill_method' (int8 codes, see
+    FILL_METHODS) and 'long_gap' (bool mask).
+    """
+    energy = np.array(energy, dtype=float)
+    method = np.zeros(energy.shape, dtype=np.int8)
+
+    # Outage length of every missing slot
+    missing = np.isnan(energy)
+    outage = np.zeros(energy.shape, dtype=np.int64)
+    row, start, length = _gap_runs(missing)
+    r, c, run = _slot_runs(row, start, length)
+    outage[r, c] = length[run]
+
+    # a) Night -> 0 (readings after sunset are kept)
+    night = missing & (elevation < 0)
+    energy[night] = 0
+    method[night] = NIGHT
+
+    # b) Short daylight gaps between two values -> linear interpolation
+    n_cols = energy.shape[1]
+    row, start, length = _gap_runs(np.isnan(energy))
+    r, c, run = _slot_runs(row, start, length)
+    left, right = start[run] - 1, start[run] + length[run]
+    short = ((length[run] <= short_gap) & (left >= 0) & (right < n_cols)
+             & (outage[r, c] <= medium_gap))
+    r, c, left, right = r[short], c[short], left[short], right[short]
+    weight = (c - left) / (right - left)
+    energy[r, c] = energy[r, left] + weight * (energy[r, right] - energy[r, left])
+    method[r, c] = INTERPOLATED
+
+    # c) Remaining gaps of medium outages -> clear-sky expectation
+    capacity = np.broadcast_to(np.asarray(capacity_kwp, dtype=float).reshape(-1, 1), energy.shape)
+    medium = np.isnan(energy) & (outage <= medium_gap)
+    energy[medium] = (ghi[medium] / 1000) * capacity[medium] * pr * (slot_minutes / 60)
+    method[medium] = CLEARSKY
+
+    # d) Long outages -> NaN + mask
+    long_gap = np.isnan(energy)
+    method[long_gap] = LONG_GAP
+
+    return {'energy': energy, 'fill_method': method, 'long_gap': long_gap}
+
+
+def fill_fleet(df, plants, value_column='generation_kwh', time_column='generation_date', **kwargs):
+    """
+    Gap-fill the 5-minute generation of every plant in a long DataFrame.
+
+    plants: load_plants() frame (plant_capacity, latitude, longitude by plant_id)
+    Returns a long DataFrame on the full grid: plant_id, generation_date,
+    generation_kwh (observed), filled_kwh, fill_method, long_gap, elevation, ghi.
+    """
+    plant_ids, times, values = stack_fleet(df, value_column, time_column)
+    meta = plants.loc[plant_ids]
+    elevation, ghi = fleet_solar(meta['latitude'], meta['longitude'], times)
+
+    result = fill_gaps(values, elevation, ghi, meta['plant_capacity'].to_numpy(), **kwargs)
+
+    n_plants, n_slots = values.shape
+    return pd.DataFrame({
+        'plant_id': np.repeat(plant_ids, n_slots),
+        time_column: times[np.tile(np.arange(n_slots), n_plants)],
+        value_column: values.ravel(),
+        'filled_kwh': result['energy'].ravel(),
+        'fill_method': pd.Categorical.from_codes(result['fill_method'].ravel(),
+                                                 list(FILL_METHODS.values())),
+        'long_gap': result['long_gap'].ravel(),
+        'elevation': elevation.ravel(),
+        'ghi': ghi.ravel(),
+    })
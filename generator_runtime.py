@@ -0,0 +1,193 @@
+"""
+Generator run-time and energy from generator_data_logs
+The generator log is a ~5-minute stream of (plant_id, device, state, power)
+samples. One sort by plant, device and time, then a state-transition scan:
+- every sample holds its state and power until the next sample of the same
+  device (at most MAX_SAMPLE_SECONDS, longer silences are not counted)
+- a run is a sequence of 'on' samples without a silence in between
+- hourly / daily tables split the 'on' sample intervals at period boundaries
+The plant-level hourly table joins onto the hourly prediction frame by index.
+
+The tables are derived tables of the log store: log_store.py rebuilds them on
+a full conversion and refreshes the affected days on --incremental.
+
+Usage:
+    python generator_runtime.py          # hourly + daily tables into the log store
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+import log_store
+import time_grid
+
+
+SOURCE = 'generator'
+POWER_TO_KW = 1e-3                    # power is logged in W
+MAX_SAMPLE_SECONDS = 15 * 60          # a sample holds its state for at most 15 minutes
+TABLE_FREQ = {'hourly': 'h', 'daily': 'D'}
+
+SAMPLE_COLUMNS = ['plant_id', 'device', 'state', 'power', 'timestamp']
+JOIN_COLUMNS = {'runtime_h': 'generator_runtime_h', 'energy_kwh': 'generator_energy_kwh'}
+
+
+def _sample_intervals(df):
+    """'on' samples sorted by plant, device and time, with the interval each one covers"""
+    device = df['device'].astype(str).to_numpy()
+    seconds = df['timestamp'].dt.tz_localize(None).dt.as_unit('s').astype('int64').to_numpy()
+    plant = df['plant_id'].to_numpy()
+
+    order = np.lexsort((seconds, device, plant))
+    plant, device, seconds = plant[order], device[order], seconds[order]
+    on = (df['state'].astype(str).to_numpy() == 'on')[order]
+    power = df['power'].to_numpy(dtype=float)[order]
+
+    same_next = np.r_[(plant[1:] == plant[:-1]) & (device[1:] == device[:-1]), False]
+    gap = np.r_[np.diff(seconds), 0]
+    held = np.where(same_next, np.minimum(gap, MAX_SAMPLE_SECONDS), MAX_SAMPLE_SECONDS)
+
+    # A run starts on an 'on' sample whose predecessor is another device,
+    # 'off', or too far back to bridge
+    same_prev = np.r_[False, same_next[:-1]]
+    prev_on = np.r_[False, on[:-1]]
+    bridged = np.r_[False, gap[:-1] <= MAX_SAMPLE_SECONDS]
+    run_start = on & ~(same_prev & prev_on & bridged)
+
+    # Negative readings (-65536, -131072) are sensor errors
+    power_kw = np.where(power >= 0, power, np.nan) * POWER_TO_KW
+
+    return {
+        'plant_id': plant[on],
+        'device': device[on],
+        'start': seconds[on],
+        'end': seconds[on] + held[on],
+        'power_kw': power_kw[on],
+        'run_start': run_start[on],
+        'tz': df['timestamp'].dt.tz,
+    }
+
+
+def _wall_times(seconds, tz):
+    times = pd.to_datetime(seconds, unit='s')
+    return times.tz_localize(tz) if tz is not None else times
+
+
+def run_intervals(df):
+    """
+    Run intervals per device (sorted state-transition scan).
+
+    Returns a DataFrame with plant_id, device, start, end (tz-aware),
+    runtime_h, energy_kwh and mean_kw. Samples without a valid power reading
+    count as runtime but not as energy.
+    """
+    s = _sample_intervals(df)
+    if len(s['start']) == 0:
+        return pd.DataFrame(columns=['plant_id', 'device', 'start', 'end', 'runtime_h', 'energy_kwh', 'mean_kw'])
+
+    first = np.flatnonzero(s['run_start'])
+    last = np.r_[first[1:], len(s['start'])] - 1
+
+    duration = s['end'] - s['start']
+    energy = np.nan_to_num(s['power_kw']) * duration / 3600
+    runtime_h = np.add.reduceat(duration, first) / 3600
+    energy_kwh = np.add.reduceat(energy, first)
+
+    return pd.DataFrame({
+        'plant_id': s['plant_id'][first],
+        'device': s['device'][first],
+        'start': _wall_times(s['start'][first], s['tz']),
+        'end': _wall_times(s['end'][last], s['tz']),
+        'runtime_h': runtime_h,
+        'energy_kwh': energy_kwh,
+        'mean_kw': energy_kwh / runtime_h,
+    })
+
+
+def runtime_table(df, freq='h'):
+    """
+    Runtime and energy per plant, device and period (local wall clock).
+    Returns plant_id, device, period, runtime_h, energy_kwh and starts (runs
+    starting in the period).
+    """
+    s = _sample_intervals(df)
+    width = time_grid.period_seconds(freq)
+    idx, period, overlap = time_grid.split_intervals(s['start'], s['end'], width)
+
+    first_piece = np.r_[True, idx[1:] != idx[:-1]]
+    table = pd.DataFrame({
+        'plant_id': s['plant_id'][idx],
+        'device': s['device'][idx],
+        'period': period,
+        'runtime_h': overlap / 3600,
+        'energy_kwh': np.nan_to_num(s['power_kw'][idx]) * overlap / 3600,
+        'starts': s['run_start'][idx] & first_piece,
+    })
+    out = table.groupby(['plant_id', 'device', 'period'], sort=True).sum().reset_index()
+    out['starts'] = out['starts'].astype(np.int64)
+    out['period'] = _wall_times(out['period'].to_numpy() * width, s['tz'])
+    return out
+
+
+def plant_runtime(table):
+    """Sum a runtime table over the devices of each plant (runtime_h in device-hours)"""
+    grouped = table.groupby(['plant_id', 'period'], sort=True)
+    return grouped.agg(
+        runtime_h=('runtime_h', 'sum'),
+        energy_kwh=('energy_kwh', 'sum'),
+        starts=('starts', 'sum'),
+        devices_running=('device', 'nunique'),
+    ).reset_index()
+
+
+def load_runtime(name='hourly', plant_ids=None, start_date=None, end_date=None,
+                 root=log_store.STORE_DIR):
+    """Plant-level runtime table from the log store (see the __main__ block)"""
+    table = log_store.read_derived(SOURCE, name, plant_ids, start_date, end_date, root=root)
+    if len(table) == 0:
+        return pd.DataFrame(columns=['plant_id', 'period', 'runtime_h', 'energy_kwh', 'starts', 'devices_running'])
+    return plant_runtime(table)
+
+
+def join_generator(predictions, plant_id, hourly):
+    """
+    Add generator_runtime_h / generator_energy_kwh columns to an hourly
+    prediction frame (DatetimeIndex) of one plant; 0 where no generator ran.
+    hourly: plant-level table from plant_runtime / load_runtime
+    """
+    plant = hourly[hourly['plant_id'] == plant_id].set_index('period')[list(JOIN_COLUMNS)]
+    plant = plant.rename(columns=JOIN_COLUMNS)
+    if len(plant) and len(predictions):
+        plant.index = plant.index.tz_convert(predictions.index.tz)
+    joined = plant.reindex(predictions.index).fillna(0)
+    return predictions.join(joined)
+
+
+if __name__ == '__main__':
+    print("=" * 80)
+    print("🛢️ GENERATOR RUNTIME AND ENERGY")
+    print("=" * 80)
+
+    start = time.time()
+    if log_store.source_dir(SOURCE).exists():
+        samples = log_store.read_log(SOURCE, columns=SAMPLE_COLUMNS)
+    else:
+        samples = log_store.read_csv_typed(SOURCE)
+    print(f"\n📥 {len(samples):,} samples ({time.time() - start:.2f}s)")
+
+    for name, freq in TABLE_FREQ.items():
+        start = time.time()
+        table = runtime_table(samples, freq)
+        partitions = log_store.write_derived(table, SOURCE, name)
+        print(f"✅ {name}: {len(table):,} rows -> {partitions} partitions "
+              f"in {log_store.derived_dir(SOURCE, name)} ({time.time() - start:.2f}s)")
+
+    runs = run_intervals(samples)
+    summary = runs.groupby(['plant_id', 'device']).agg(
+        runs=('start', 'size'),
+        runtime_h=('runtime_h', 'sum'),
+        energy_mwh=('energy_kwh', lambda e: e.sum() / 1000),
+        longest_run_h=('runtime_h', 'max'),
+    )
+    print(f"\n{summary.round(2).to_string()}")
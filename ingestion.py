@@ -0,0 +1,230 @@
+"""
+Raw log ingestion
+Streams the inverter 5-minute generation export in chunks so peak memory is
+bounded by one chunk instead of the whole fleet's history: plant filter,
+numeric parsing and UTC -> plant timezone conversion happen per chunk.
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+import time_grid
+
+
+GENERATION_5M_PATH = 'data/inverter_five_minutes_generation_logs.csv'
+TIMEZONE = 'Asia/Dhaka'
+CHUNK_BYTES = 16 << 20  # ~16 MB of CSV per chunk
+
+
+def parse_utc_timestamps(values):
+    """Parse export timestamps ('2025-10-23 09:40:33 UTC', '... 09:40:33.780357 UTC') as UTC"""
+    values = pd.Series(values, dtype='string').str.removesuffix(' UTC')
+    return pd.to_datetime(values, utc=True, format='ISO8601')
+
+
+def parse_amounts(values):
+    """Numbers exported with thousands separators ('1,234.5') as float64"""
+    values = pc.cast(values, pa.string())
+    values = pc.replace_substring(values, pattern=',', replacement='')
+    values = pc.if_else(pc.equal(values, ''), pa.scalar(None, pa.string()), values)
+    return pc.cast(values, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def plant_ids_for_name(plant_name, plants_path='data/inverter_plants.csv'):
+    """plant_id(s) registered under a plant name in inverter_plants.csv"""
+    plants = pd.read_csv(plants_path, usecols=['plant_id', 'plant_name'])
+    return plants.loc[plants['plant_name'] == plant_name, 'plant_id'].tolist()
+
+
+def iter_generation_chunks(path=GENERATION_5M_PATH, plant_ids=None, tz=TIMEZONE,
+                           start=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Stream the 5-minute generation log, yielding one cleaned DataFrame per chunk.
+
+    Columns: plant_id, generation_date (tz-aware, plant timezone),
+    generation_amount (Wh, float) and generation_kwh.
+    Rows of other plants are dropped before any per-row parsing; `start`
+    (plant local time) trims older rows.
+    """
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=chunk_bytes),
+        convert_options=pv.ConvertOptions(
+            include_columns=['plant_id', 'generation_date', 'generation_amount'],
+            column_types={
+                'plant_id': pa.int64(),
+                'generation_date': pa.string(),
+                'generation_amount': pa.string(),
+            },
+        ),
+    )
+    value_set = pa.array(sorted(set(plant_ids)), pa.int64()) if plant_ids is not None else None
+    start_ts = pd.Timestamp(start, tz=tz) if start is not None else None
+
+    for batch in reader:
+        if value_set is not None:
+            batch = batch.filter(pc.is_in(batch['plant_id'], value_set=value_set))
+        if batch.num_rows == 0:
+            continue
+
+        generation_date = parse_utc_timestamps(batch['generation_date'].to_pandas()).dt.tz_convert(tz)
+        amount = parse_amounts(batch['generation_amount'])
+
+        chunk = pd.DataFrame({
+            'plant_id': batch['plant_id'].to_numpy(),
+            'generation_date': generation_date.array,
+            'generation_amount': amount,
+            'generation_kwh': amount / 1000,
+        })
+
+        if start_ts is not None:
+            chunk = chunk[chunk['generation_date'] >= start_ts]
+        if len(chunk):
+            yield chunk
+
+
+def read_generation_5m(path=GENERATION_5M_PATH, plant_ids=None, tz=TIMEZONE,
+                       start=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Cleaned 5-minute generation rows for the selected plants (see iter_generation_chunks),
+    deduplicated on (plant_id, generation_date) keeping the last export row, sorted by time.
+    """
+    chunks = list(iter_generation_chunks(path, plant_ids, tz, start, chunk_bytes))
+    if not chunks:
+        return pd.DataFrame({
+            'plant_id': pd.Series(dtype=np.int64),
+            'generation_date': pd.Series(dtype=f'datetime64[ns, {tz}]'),
+            'generation_amount': pd.Series(dtype=float),
+            'generation_kwh': pd.Series(dtype=float),
+        })
+
+    df = pd.concat(chunks, ignore_index=True)
+    df = df.drop_duplicates(subset=['plant_id', 'generation_date'], keep='last')
+    return df.sort_values(['plant_id', 'generation_date']).reset_index(drop=True)
+
+
+def generation_availability(path=GENERATION_5M_PATH, plant_ids=None, tz=TIMEZONE,
+                            start=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Share of 5-minute slots with a reading, per plant and local day, for the
+    selected plants (all plants by default). See time_grid.daily_availability.
+    """
+    chunks = [chunk[['plant_id', 'generation_date']]
+              for chunk in iter_generation_chunks(path, plant_ids, tz, start, chunk_bytes)]
+    if not chunks:
+        return time_grid.daily_availability(time_grid.build_grid([], pd.DatetimeIndex([], tz=tz), []), tz)
+
+    df = pd.concat(chunks, ignore_index=True)
+    grid = time_grid.build_grid(df['plant_id'].to_numpy(), df['generation_date'],
+                                np.ones(len(df)))
+    return time_grid.daily_availability(grid, tz)
+
+
+BLOCK_SLOTS = 7 * 24 * 3600 // time_grid.SLOT_SECONDS  # one week of 5-minute slots (whole hours)
+PLANTS_PER_PASS = 32  # plants whose week blocks are held in memory at once (~8 KB per plant-week)
+
+
+def generation_plant_ids(path=GENERATION_5M_PATH, chunk_bytes=CHUNK_BYTES):
+    """Sorted plant_ids of the 5-minute generation log (reads the plant_id column only)"""
+    reader = pv.open_csv(
+        path,
+        read_options=pv.ReadOptions(block_size=chunk_bytes),
+        convert_options=pv.ConvertOptions(include_columns=['plant_id'],
+                                          column_types={'plant_id': pa.int64()}),
+    )
+    plant_ids = set()
+    for batch in reader:
+        plant_ids.update(pc.unique(batch['plant_id']).to_pylist())
+    return sorted(plant_ids)
+
+
+def _week_blocks(path, plant_ids, tz, start, chunk_bytes):
+    """{(plant_id, week): float32 5-minute values} of the selected plants, re-exported rows replacing earlier ones"""
+    blocks = {}
+    for chunk in iter_generation_chunks(path, plant_ids, tz, start, chunk_bytes):
+        slots = time_grid.to_slots(chunk['generation_date'])
+        plants = chunk['plant_id'].to_numpy()
+        values = chunk['generation_kwh'].to_numpy(dtype=np.float32)
+
+        # Sorted by plant and slot (input order within a slot): the last row of a slot wins
+        order = np.lexsort((slots, plants))
+        plants, slots, values = plants[order], slots[order], values[order]
+        keep = np.r_[(plants[1:] != plants[:-1]) | (slots[1:] != slots[:-1]), True]
+        plants, slots, values = plants[keep], slots[keep], values[keep]
+
+        block_of = slots // BLOCK_SLOTS
+        starts = np.flatnonzero(np.r_[True, (plants[1:] != plants[:-1]) | (block_of[1:] != block_of[:-1])])
+        for begin, end in zip(starts, np.r_[starts[1:], len(slots)]):
+            key = (int(plants[begin]), int(block_of[begin]))
+            if key not in blocks:
+                blocks[key] = np.full(BLOCK_SLOTS, np.nan, dtype=np.float32)
+            blocks[key][slots[begin:end] - key[1] * BLOCK_SLOTS] = values[begin:end]
+    return blocks
+
+
+def _hourly_frames(blocks, tz):
+    """Fold week blocks into one hourly DataFrame per plant (blocks are consumed)"""
+    slots_per_hour = 3600 // time_grid.SLOT_SECONDS
+    frames = []
+    for plant_id in sorted({plant_id for plant_id, _ in blocks}):
+        plant_blocks = sorted(block for p, block in blocks if p == plant_id)
+        first_block, last_block = plant_blocks[0], plant_blocks[-1]
+        values = np.full((last_block - first_block + 1) * BLOCK_SLOTS, np.nan, dtype=np.float32)
+        for block in plant_blocks:
+            offset = (block - first_block) * BLOCK_SLOTS
+            values[offset:offset + BLOCK_SLOTS] = blocks.pop((plant_id, block))
+
+        hours = values.reshape(-1, slots_per_hour)
+        observed = np.flatnonzero(~np.isnan(hours).all(axis=1))
+        span = slice(observed[0], observed[-1] + 1)
+        first_hour = pd.Timestamp(first_block * BLOCK_SLOTS * time_grid.SLOT_SECONDS, unit='s', tz='UTC')
+        times = pd.date_range(first_hour, periods=len(hours), freq='h').tz_convert(tz)
+
+        frames.append(pd.DataFrame({
+            'plant_id': plant_id,
+            'generation_date': times[span],
+            'generation_kwh': np.nansum(hours[span], axis=1, dtype=np.float64),
+            'num_readings': (~np.isnan(hours[span])).sum(axis=1).astype(np.int8),
+        }))
+    return frames
+
+
+def hourly_generation(path=GENERATION_5M_PATH, plant_ids=None, tz=TIMEZONE,
+                      start=None, chunk_bytes=CHUNK_BYTES, plants_per_pass=PLANTS_PER_PASS):
+    """
+    Hourly generation_kwh per plant, streaming the log (batch scoring).
+
+    5-minute readings are scattered into week-long float32 blocks per plant as
+    the chunks arrive, so a re-exported row replaces the earlier one (same
+    rule as read_generation_5m) without keeping the rows. generation_kwh is
+    the sum of the readings of the hour (0 for hours between each plant's
+    first and last reading without any, as a resample sum); num_readings
+    counts them (12 for a complete hour) so callers can tell logger gaps
+    from low output.
+    The log is read once per `plants_per_pass` plants and their blocks are
+    folded to hours before the next pass, so memory grows with
+    plants_per_pass x history instead of the whole fleet's.
+
+    Returns a DataFrame: plant_id, generation_date (tz-aware hour start),
+    generation_kwh, num_readings.
+    """
+    if plant_ids is None:
+        plant_ids = generation_plant_ids(path, chunk_bytes)
+    plant_ids = sorted(set(plant_ids))
+
+    frames = []
+    for begin in range(0, len(plant_ids), plants_per_pass):
+        blocks = _week_blocks(path, plant_ids[begin:begin + plants_per_pass], tz, start, chunk_bytes)
+        frames.extend(_hourly_frames(blocks, tz))
+
+    if not frames:
+        return pd.DataFrame({
+            'plant_id': pd.Series(dtype=np.int64),
+            'generation_date': pd.Series(dtype=f'datetime64[ns, {tz}]'),
+            'generation_kwh': pd.Series(dtype=float),
+            'num_readings': pd.Series(dtype=np.int8),
+        })
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,525 @@
+"""
+Canonical columnar store for the raw CSV log exports
+Each log in data/ is converted once to typed parquet (timestamps parsed,
+low-cardinality strings dictionary-encoded), partitioned by plant_id and
+month. Reads use partition pruning, column projection and predicate pushdown
+instead of re-parsing the CSV on every notebook run.
+
+Incremental mode keeps a per-plant, per-source high-water mark (created_at)
+and only ingests newer rows, deduplicating them against the affected
+partitions and refreshing the derived tables (weather hourly / daily,
+generator runtime, meter energy) for the affected days only.
+
+Usage:
+    python log_store.py                  # full conversion of every source
+    python log_store.py generator        # full conversion of selected sources
+    python log_store.py --incremental    # append new rows since the watermarks
+"""
+
+import json
+import shutil
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ingestion import GENERATION_5M_PATH, parse_amounts, parse_utc_timestamps
+from prediction_store import PARTITIONING, month_keys, range_bounds
+
+
+STORE_DIR = Path('data/store')
+WATERMARKS_FILE = '_watermarks.json'
+TIMEZONE = 'Asia/Dhaka'
+
+# Column types: 'int' / 'float' / 'amount' (thousands separators) /
+# 'category' (dictionary-encoded) / 'string' / 'timestamp' (UTC export -> plant tz)
+# key: columns identifying a row (later exports win); None = the whole row
+# watermark: ingestion time used for incremental appends
+SOURCES = {
+    'generator': {
+        'path': 'data/generator_data_logs.csv',
+        'time_column': 'timestamp',
+        'key': ['plant_id', 'device', 'timestamp'],
+        'watermark': 'created_at',
+        'columns': {
+            'plant_id': 'int', 'device': 'category', 'state': 'category', 'power': 'float',
+            'timestamp': 'timestamp', 'created_at': 'timestamp',
+        },
+    },
+    'meter_hourly': {
+        'path': 'data/plants_meter_data_logs_hourly.csv',
+        'time_column': 'date',
+        'key': ['plant_id', 'meter_id', 'date'],
+        'watermark': 'created_at',
+        'columns': {
+            'plant_id': 'int', 'meter_id': 'int', 'meter_reading': 'float',
+            'created_at': 'timestamp', 'data_availability': 'float', 'guid': 'string',
+            'date': 'timestamp',
+        },
+    },
+    'weather': {
+        'path': 'data/inverter_weather_logs.csv',
+        'time_column': 'created_at',
+        'key': None,  # several sensor readings share one created_at
+        'watermark': 'created_at',
+        'columns': {
+            'plant_id': 'int', 'created_at': 'timestamp', 'temperature': 'float',
+            'module_temperature': 'float', 'ambient_temperature': 'float',
+            'solar_irradiation': 'float',
+        },
+    },
+    'billing_meter': {
+        'path': 'data/plants_billing_meter_logs.csv',
+        'time_column': 'date',
+        'key': ['plant_id', 'meter_id', 'date'],
+        'watermark': 'created_at',
+        'columns': {
+            'plant_id': 'int', 'meter_id': 'int', 'meter_reading': 'float',
+            'date': 'timestamp', 'created_at': 'timestamp', 'data_availability': 'float',
+            'guid': 'category',  # repeated across rows (2131 unique of 4148)
+        },
+    },
+    'daily_generation': {
+        'path': 'data/inverter_daily_generation_logs.csv',
+        'time_column': 'generation_date',
+        'key': ['plant_id', 'generation_date'],
+        'watermark': 'generation_date',  # no created_at in this export
+        'columns': {
+            'plant_id': 'int', 'generation_date': 'timestamp', 'generation_amount': 'amount',
+        },
+    },
+    'generation_5m': {
+        'path': GENERATION_5M_PATH,
+        'time_column': 'generation_date',
+        'key': ['plant_id', 'generation_date'],
+        'watermark': 'generation_date',  # no created_at in this export
+        'columns': {
+            'plant_id': 'int', 'generation_date': 'timestamp', 'generation_amount': 'amount',
+        },
+    },
+}
+
+_ARROW_TYPES = {'int': pa.int64(), 'float': pa.float64()}
+
+WEATHER_VALUES = ['temperature', 'module_temperature', 'ambient_temperature', 'solar_irradiation']
+
+
+def mean_rollup(df, time_column, value_columns, freq):
+    """Mean of value_columns per plant and period (period start in plant time) + reading count"""
+    period = df[time_column].dt.floor(freq).rename('period')
+    grouped = df.groupby([df['plant_id'], period])
+    out = grouped[value_columns].mean()
+    out['num_readings'] = grouped.size()
+    return out.reset_index()
+
+
+def _generator_runtime(rows, freq):
+    from generator_runtime import runtime_table  # imports log_store
+    return runtime_table(rows, freq)
+
+
+def _meter_energy(rows, freq):
+    from meter_energy import energy_table  # imports log_store
+    return energy_table(rows, freq)
+
+
+def generation_rollup(df, freq):
+    """
+    generation_kwh per plant and period from 5-minute readings (Wh) + reading
+    count; the last reading of a 5-minute slot wins (as ingestion.hourly_generation)
+    """
+    df = df.assign(slot=df['generation_date'].dt.floor('5min'))
+    df = df.drop_duplicates(subset=['plant_id', 'slot'], keep='last')
+    grouped = df.groupby([df['plant_id'], df['slot'].dt.floor(freq).rename('period')])
+    out = (grouped['generation_amount'].sum() / 1000).rename('generation_kwh').to_frame()
+    out['num_readings'] = grouped['generation_amount'].count()
+    return out.reset_index()
+
+
+# Derived tables kept in sync with each source: source -> {name: builder(rows) -> DataFrame}
+# Builders return one row per plant_id and 'period' (tz-aware period start)
+DERIVED_TABLES = {
+    'weather': {
+        'hourly': partial(mean_rollup, time_column='created_at', value_columns=WEATHER_VALUES, freq='h'),
+        'daily': partial(mean_rollup, time_column='created_at', value_columns=WEATHER_VALUES, freq='D'),
+    },
+    'generator': {  # generator_runtime.py
+        'hourly': partial(_generator_runtime, freq='h'),
+        'daily': partial(_generator_runtime, freq='D'),
+    },
+    'meter_hourly': {'energy': partial(_meter_energy, freq='h')},  # meter_energy.py
+    'billing_meter': {'energy': partial(_meter_energy, freq='D')},
+    'generation_5m': {'hourly': partial(generation_rollup, freq='h')},  # model_refresh.py
+}
+
+# Days a row reaches into its neighbours' periods: a generator sample holds
+# until the next one (<= 15 minutes), meter energy is prorated over the
+# interval between readings (meter_energy.MAX_INTERVAL_HOURS)
+DERIVED_MARGIN_DAYS = {'generator': 1, 'meter_hourly': 8, 'billing_meter': 8}
+
+
+def source_dir(source, root=STORE_DIR):
+    """Store directory of one source"""
+    return Path(root) / source
+
+
+def derived_dir(source, name, root=STORE_DIR):
+    """Store directory of one derived table"""
+    return Path(root) / 'derived' / f'{source}_{name}'
+
+
+def read_csv_typed(source, path=None, tz=TIMEZONE, prefilter=None):
+    """
+    Parse a raw CSV export into a typed DataFrame (one pass, declared column types).
+    prefilter: optional callable(arrow table) -> boolean mask applied before any parsing
+    """
+    spec = SOURCES[source]
+    columns = spec['columns']
+
+    table = pv.read_csv(
+        path or spec['path'],
+        convert_options=pv.ConvertOptions(
+            include_columns=list(columns),
+            column_types={col: _ARROW_TYPES.get(kind, pa.string()) for col, kind in columns.items()},
+        ),
+    )
+    if prefilter is not None:
+        table = table.filter(prefilter(table))
+
+    data = {}
+    for col, kind in columns.items():
+        values = table[col]
+        if kind == 'timestamp':
+            data[col] = parse_utc_timestamps(values.to_pandas()).dt.tz_convert(tz).array
+        elif kind == 'amount':
+            data[col] = parse_amounts(values)
+        elif kind == 'category':
+            data[col] = values.to_pandas().astype('category').array
+        else:
+            data[col] = values.to_pandas().array
+
+    return pd.DataFrame(data)
+
+
+def _watermark_values(df, spec):
+    """Ingestion time of each row (falls back to the record time when missing)"""
+    values = df[spec['watermark']]
+    if spec['watermark'] != spec['time_column']:
+        values = values.fillna(df[spec['time_column']])
+    return values
+
+
+def _dedupe(df, spec):
+    """Drop repeated rows, keeping the most recently ingested one"""
+    order = _watermark_values(df, spec).argsort(kind='stable')
+    df = df.iloc[order].drop_duplicates(subset=spec['key'], keep='last')
+
+    for col, kind in spec['columns'].items():
+        if kind == 'category':
+            df[col] = df[col].astype(str).astype('category')
+    return df
+
+
+def _write_partitioned(df, out_dir, time_column):
+    """Write rows to out_dir/plant_id=<id>/month=<YYYY-MM>/, replacing those partitions"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    table_df = df.sort_values(['plant_id', time_column], kind='stable').reset_index(drop=True)
+    table_df['month'] = table_df[time_column].dt.strftime('%Y-%m')
+    table_df['plant_id'] = table_df['plant_id'].astype(str)
+
+    table = pa.Table.from_pandas(table_df, preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=str(out_dir),
+        partition_cols=['plant_id', 'month'],
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.parquet',
+    )
+
+    return len(table_df.groupby(['plant_id', 'month'], observed=True).size())
+
+
+def write_source(df, source, root=STORE_DIR):
+    """
+    Write a typed log to root/<source>/plant_id=<id>/month=<YYYY-MM>/.
+    Existing partitions for the same plants and months are replaced.
+    Returns the number of partitions written.
+    """
+    return _write_partitioned(df, source_dir(source, root), SOURCES[source]['time_column'])
+
+
+def write_derived(df, source, name, root=STORE_DIR):
+    """
+    Replace a derived table computed outside DERIVED_TABLES (one row per
+    plant_id and 'period'), so it is readable with read_derived.
+    Returns the number of partitions written.
+    """
+    out_dir = derived_dir(source, name, root)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    return _write_partitioned(df, out_dir, 'period')
+
+
+def _partition_files(out_dir, plant_ids, months):
+    plant_dirs = (
+        [out_dir / f'plant_id={p}' for p in plant_ids]
+        if plant_ids is not None else sorted(out_dir.glob('plant_id=*'))
+    )
+    files = []
+    for plant_dir in plant_dirs:
+        month_dirs = (
+            [plant_dir / f'month={m}' for m in months]
+            if months is not None else sorted(plant_dir.glob('month=*'))
+        )
+        for month_dir in month_dirs:
+            files.extend(str(f) for f in sorted(month_dir.glob('*.parquet')))
+    return files
+
+
+def _read_files(files, out_dir, time_column, columns=None, filter=None, bounds=None):
+    """Read partition files with projection and pushed-down filters (plant_id as int64)"""
+    dataset = ds.dataset(files, format='parquet', partitioning=PARTITIONING,
+                         partition_base_dir=str(out_dir))
+
+    expr = filter
+    if bounds is not None:
+        ts_type = dataset.schema.field(time_column).type
+        start_ts, end_ts = (pa.scalar(ts.to_pydatetime(), type=ts_type) for ts in bounds)
+        time_expr = (ds.field(time_column) >= start_ts) & (ds.field(time_column) < end_ts)
+        expr = time_expr if expr is None else expr & time_expr
+
+    if columns is not None:
+        columns = ['plant_id'] + [c for c in columns if c != 'plant_id']
+
+    df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+    df = df.drop(columns=[c for c in ('month',) if c in df.columns])
+    df['plant_id'] = df['plant_id'].astype('int64')
+
+    sort_cols = ['plant_id'] + ([time_column] if time_column in df.columns else [])
+    return df.sort_values(sort_cols, kind='stable').reset_index(drop=True)
+
+
+def _read_partitioned(out_dir, time_column, plant_ids=None, start_date=None, end_date=None,
+                      columns=None, filter=None, default_columns=None):
+    months = None
+    bounds = None
+    if start_date is not None or end_date is not None:
+        bounds = range_bounds(start_date or '2000-01-01', end_date or '2100-01-01', TIMEZONE)
+        if start_date is not None and end_date is not None:
+            months = month_keys(*bounds)
+
+    ids = None if plant_ids is None else [int(p) for p in plant_ids]
+    files = _partition_files(Path(out_dir), ids, months)
+    if not files:
+        return pd.DataFrame(columns=columns or default_columns)
+
+    return _read_files(files, out_dir, time_column, columns, filter, bounds)
+
+
+def read_log(source, plant_ids=None, start_date=None, end_date=None, columns=None,
+             root=STORE_DIR, filter=None):
+    """
+    Read a log from the canonical store.
+
+    plant_ids / [start_date, end_date] (whole local days) prune partition
+    directories; the time predicate and any extra `filter` expression are
+    pushed down to the parquet row groups; only `columns` are decoded.
+    Returns a DataFrame sorted by plant_id and time (plant_id as int64).
+    """
+    spec = SOURCES[source]
+    return _read_partitioned(source_dir(source, root), spec['time_column'], plant_ids,
+                             start_date, end_date, columns, filter, list(spec['columns']))
+
+
+def read_derived(source, name, plant_ids=None, start_date=None, end_date=None, columns=None,
+                 root=STORE_DIR):
+    """Read a derived table (e.g. read_derived('weather', 'daily')), same pruning as read_log"""
+    return _read_partitioned(derived_dir(source, name, root), 'period', plant_ids,
+                             start_date, end_date, columns, None, ['plant_id', 'period'])
+
+
+def load_watermarks(root=STORE_DIR):
+    """{source: {plant_id: ISO UTC timestamp}} of the newest ingested row"""
+    path = Path(root) / WATERMARKS_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _save_watermarks(source, marks, root=STORE_DIR):
+    all_marks = load_watermarks(root)
+    all_marks[source] = marks
+    path = Path(root) / WATERMARKS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(all_marks, indent=2, sort_keys=True))
+    tmp.replace(path)
+
+
+def _plant_watermarks(df, spec):
+    marks = _watermark_values(df, spec).groupby(df['plant_id']).max().dropna()
+    return {str(plant_id): ts.tz_convert('UTC').isoformat() for plant_id, ts in marks.items()}
+
+
+def _rebuild_derived(source, df, root=STORE_DIR):
+    """Recompute every derived table of a source from all of its rows"""
+    for name, builder in DERIVED_TABLES.get(source, {}).items():
+        out_dir = derived_dir(source, name, root)
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+        _write_partitioned(builder(df), out_dir, 'period')
+
+
+def _refresh_derived(source, days, root=STORE_DIR):
+    """
+    Recompute derived tables for the affected (plant_id, day) pairs only.
+    days: DataFrame with plant_id and day (local midnight) columns
+    Periods up to DERIVED_MARGIN_DAYS around the new rows are recomputed,
+    from the rows of another margin around them.
+    """
+    builders = DERIVED_TABLES.get(source, {})
+    if not builders or len(days) == 0:
+        return
+
+    margin = pd.Timedelta(days=DERIVED_MARGIN_DAYS.get(source, 0))
+    for plant_id, plant_days in days.groupby('plant_id'):
+        day_set = pd.DatetimeIndex(plant_days['day'].unique())
+        if margin:
+            day_set = day_set.union(pd.DatetimeIndex(
+                [d for day in day_set for d in pd.date_range(day - margin, day + margin, freq='D')]))
+        first, last = day_set.min().date(), day_set.max().date()
+
+        rows = read_log(source, [plant_id], (pd.Timestamp(first) - margin).date(),
+                        (pd.Timestamp(last) + margin).date(), root=root)
+
+        month_start = first.replace(day=1)
+        month_end = (pd.Timestamp(last) + pd.offsets.MonthEnd(0)).date()
+        months = pd.period_range(month_start, month_end, freq='M').strftime('%Y-%m')
+        for name, builder in builders.items():
+            table = builder(rows)
+            if len(table):
+                table = table[table['period'].dt.floor('D').isin(day_set)]
+            existing = read_derived(source, name, [plant_id], month_start, month_end, root=root)
+            if len(existing):
+                existing = existing[~existing['period'].dt.floor('D').isin(day_set)]
+
+            # The months are rewritten whole: drop them first so emptied months do not keep old rows
+            out_dir = derived_dir(source, name, root)
+            for f in _partition_files(out_dir, [plant_id], months):
+                Path(f).unlink()
+            parts = [df for df in (existing, table) if len(df)]
+            if parts:
+                _write_partitioned(pd.concat(parts, ignore_index=True), out_dir, 'period')
+
+
+def convert_source(source, root=STORE_DIR, path=None):
+    """
+    Full conversion of one raw CSV export (replaces the source in the store,
+    resets its watermarks and rebuilds its derived tables).
+    Returns (rows, partitions).
+    """
+    spec = SOURCES[source]
+    df = _dedupe(read_csv_typed(source, path), spec)
+
+    out_dir = source_dir(source, root)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    partitions = write_source(df, source, root)
+
+    _save_watermarks(source, _plant_watermarks(df, spec), root)
+    _rebuild_derived(source, df, root)
+    return len(df), partitions
+
+
+def ingest_incremental(source, root=STORE_DIR, path=None):
+    """
+    Append rows at or after each plant's watermark.
+
+    Rows are prefiltered on the raw timestamp strings (day level) before
+    parsing, compared exactly against the per-plant watermark (rows sharing
+    the watermark's created_at may arrive in a later export), merged with
+    the existing rows of the affected partitions only (later rows win) and
+    the derived tables are recomputed for the affected days only.
+    Returns (rows added, partitions rewritten).
+    """
+    spec = SOURCES[source]
+    marks = load_watermarks(root).get(source)
+    if marks is None:
+        return convert_source(source, root, path)
+
+    known = pa.array([int(p) for p in marks], pa.int64())
+    first_day = min(marks.values())[:10]
+
+    def prefilter(table):
+        recent = pc.fill_null(pc.greater_equal(table[spec['watermark']], first_day), True)
+        new_plant = pc.invert(pc.is_in(table['plant_id'], value_set=known))
+        return pc.or_(recent, new_plant)
+
+    df = read_csv_typed(source, path, prefilter=prefilter)
+
+    plant_marks = df['plant_id'].astype(str).map(marks)
+    plant_marks = pd.to_datetime(plant_marks, utc=True)
+    df = df[plant_marks.isna().to_numpy() | (_watermark_values(df, spec) >= plant_marks).to_numpy()]
+    if len(df) == 0:
+        return 0, 0
+
+    # Merge with the existing rows of the affected partitions only
+    time_column = spec['time_column']
+    out_dir = source_dir(source, root)
+    months = df[time_column].dt.strftime('%Y-%m')
+    files = [
+        f
+        for (plant_id, month), _ in df.groupby([df['plant_id'], months])
+        for f in _partition_files(out_dir, [plant_id], [month])
+    ]
+    existing = _read_files(files, out_dir, time_column) if files else df.iloc[:0]
+    merged = _dedupe(pd.concat([existing, df], ignore_index=True), spec)
+    partitions = write_source(merged, source, root)
+    added = len(merged) - len(existing)
+
+    _save_watermarks(source, {**marks, **_plant_watermarks(df, spec)}, root)
+
+    days = pd.DataFrame({'plant_id': df['plant_id'], 'day': df[time_column].dt.floor('D')})
+    _refresh_derived(source, days.drop_duplicates(), root)
+    return added, partitions
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    incremental = '--incremental' in args
+    sources = [a for a in args if a != '--incremental'] or list(SOURCES)
+    unknown = [s for s in sources if s not in SOURCES]
+    if unknown:
+        sys.exit(f"Unknown source(s): {unknown}. Available: {list(SOURCES)}")
+
+    print("=" * 80)
+    if incremental:
+        print("🗄️ APPENDING NEW LOG ROWS TO THE CANONICAL PARQUET STORE")
+    else:
+        print("🗄️ CONVERTING RAW LOGS TO THE CANONICAL PARQUET STORE")
+    print("=" * 80)
+
+    for source in sources:
+        path = Path(SOURCES[source]['path'])
+        if not path.exists():
+            print(f"⚠️ {source}: {path} not found, skipped")
+            continue
+
+        start = time.time()
+        if incremental:
+            rows, partitions = ingest_incremental(source)
+            print(f"✅ {source}: {rows:,} new rows, {partitions} partitions rewritten "
+                  f"({time.time() - start:.2f}s)")
+        else:
+            rows, partitions = convert_source(source)
+            print(f"✅ {source}: {rows:,} rows -> {partitions} partitions "
+                  f"in {source_dir(source)} ({time.time() - start:.2f}s)")
@@ -0,0 +1,284 @@
+"""
+Cumulative meter readings -> interval energy
+Turns the cumulative meter_reading (Wh) of plants_meter_data_logs_hourly.csv
+and plants_billing_meter_logs.csv into energy per meter and period:
+- rows flagged data_availability == 0 carry a frozen register and are dropped
+- single-sample dips (reading below its neighbours) are dropped as glitches
+- a drop in the register is a rollover when the previous reading was close to
+  the register size (next power of ten) and the new one wrapped to near zero,
+  a reset when the register restarted near zero, otherwise a backward step
+  (meter swap / correction, energy unknown)
+- the energy of an interval spanning several periods is prorated over them
+All steps are array operations over the whole fleet after one sort by meter.
+energy_table is the 'energy' derived table of both sources in log_store.py
+(rebuilt on a full conversion, refreshed for the affected days on --incremental).
+
+Usage:
+    python meter_energy.py               # hourly + billing meter energy tables
+    python meter_energy.py --check       # rollover / reset / backstep rules on small cases
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import log_store
+import time_grid
+from prediction_store import range_bounds
+
+
+TIMEZONE = 'Asia/Dhaka'
+READING_TO_KWH = 1e-3                 # registers count Wh
+ROLLOVER_FRACTION = 0.9               # previous reading >= 90% of the register size ...
+RESET_FRACTION = 0.1                  # ... and new one <= 10% of it -> rollover; new <= 10% of previous -> reset
+MAX_INTERVAL_HOURS = 8 * 24           # longer gaps between readings are not prorated
+SNAP = '1min'                         # reading times are snapped ('15:00:10' -> '15:00')
+
+# Interval status codes
+OK, ROLLOVER, RESET, BACKSTEP = 0, 1, 2, 3
+INTERVAL_STATUS = {OK: 'ok', ROLLOVER: 'rollover', RESET: 'reset', BACKSTEP: 'backstep'}
+
+# Source -> period of its energy table
+SOURCE_FREQ = {'meter_hourly': 'h', 'billing_meter': 'D'}
+
+READING_COLUMNS = ['plant_id', 'meter_id', 'meter_reading', 'data_availability', 'date']
+ENERGY_COLUMNS = ['plant_id', 'period', 'energy_kwh', 'num_meters', 'coverage', 'prorated']
+
+
+def _sorted_readings(df, time_column='date'):
+    """Valid readings sorted by meter and time, as plain arrays"""
+    available = df['data_availability'].fillna(1).to_numpy() != 0
+    valid = available & df['meter_reading'].notna().to_numpy() & df[time_column].notna().to_numpy()
+    df = df[valid]
+
+    times = df[time_column].dt.round(SNAP)
+    seconds = times.dt.tz_localize(None).dt.as_unit('s').astype('int64').to_numpy()
+    meters = df['meter_id'].to_numpy()
+
+    order = np.lexsort((seconds, meters))
+    return {
+        'plant_id': df['plant_id'].to_numpy()[order],
+        'meter_id': meters[order],
+        'seconds': seconds[order],
+        'reading': df['meter_reading'].to_numpy(dtype=float)[order],
+        'tz': times.dt.tz,
+    }
+
+
+def _drop_glitches(r):
+    """Drop single readings below both the previous and the next reading of the same meter"""
+    reading, meter = r['reading'], r['meter_id']
+    same_prev = np.r_[False, meter[1:] == meter[:-1]]
+    same_next = np.r_[meter[:-1] == meter[1:], False]
+
+    prev = np.r_[np.nan, reading[:-1]]
+    nxt = np.r_[reading[1:], np.nan]
+    glitch = same_prev & same_next & (reading < prev) & (nxt >= prev)
+
+    keep = ~glitch
+    return {k: (v[keep] if isinstance(v, np.ndarray) else v) for k, v in r.items()}, int(glitch.sum())
+
+
+def interval_energy(df, time_column='date'):
+    """
+    Energy between consecutive readings of every meter.
+
+    df: rows of a meter log (plant_id, meter_id, meter_reading, data_availability, time_column)
+    Returns a DataFrame with plant_id, meter_id, start, end (tz-aware),
+    energy_kwh (NaN on a backward step) and status (see INTERVAL_STATUS);
+    intervals longer than MAX_INTERVAL_HOURS are left out. The number of
+    dropped glitches is in attrs['glitches'].
+    """
+    r, glitches = _drop_glitches(_sorted_readings(df, time_column))
+    meter, seconds, reading = r['meter_id'], r['seconds'], r['reading']
+
+    # Consecutive pairs of the same meter
+    pair = np.flatnonzero(meter[1:] == meter[:-1])
+    prev, cur = reading[pair], reading[pair + 1]
+    start, end = seconds[pair], seconds[pair + 1]
+
+    # Register size per meter: next power of ten above its largest reading
+    meter_ids, meter_idx = np.unique(meter, return_inverse=True)
+    meter_max = np.zeros(len(meter_ids))
+    np.maximum.at(meter_max, meter_idx.ravel(), reading)
+    register = 10.0 ** np.ceil(np.log10(np.maximum(meter_max, 1) + 1))
+    register = register[meter_idx.ravel()[pair]]
+
+    delta = cur - prev
+    dropped = delta < 0
+    rollover = dropped & (prev >= ROLLOVER_FRACTION * register) & (cur <= RESET_FRACTION * register)
+    reset = dropped & ~rollover & (cur <= RESET_FRACTION * prev)
+    backstep = dropped & ~rollover & ~reset
+
+    energy = np.select([rollover, reset, backstep], [register - prev + cur, cur, np.nan], delta)
+    energy = energy * READING_TO_KWH
+    status = np.select([rollover, reset, backstep], [ROLLOVER, RESET, BACKSTEP], OK).astype(np.int8)
+
+    keep = (end > start) & (end - start <= MAX_INTERVAL_HOURS * 3600)
+    pair = pair[keep]
+    out = pd.DataFrame({
+        'plant_id': r['plant_id'][pair + 1],
+        'meter_id': meter[pair],
+        'start': _wall_times(start[keep], r['tz']),
+        'end': _wall_times(end[keep], r['tz']),
+        'energy_kwh': energy[keep],
+        'status': pd.Categorical.from_codes(status[keep], list(INTERVAL_STATUS.values())),
+    })
+    out.attrs['glitches'] = glitches
+    return out
+
+
+def _wall_times(seconds, tz):
+    times = pd.to_datetime(seconds, unit='s')
+    return times.tz_localize(tz) if tz is not None else times
+
+
+def prorate(intervals, freq='h'):
+    """
+    Spread interval energy over fixed periods (local wall clock) by time overlap.
+    Intervals of unknown energy are left out (they lower the coverage).
+
+    Returns one row per plant_id, meter_id and period: energy_kwh, coverage
+    (share of the period covered by intervals) and prorated (part of the
+    energy comes from an interval longer than one period).
+    """
+    intervals = intervals[intervals['energy_kwh'].notna()]
+    width = time_grid.period_seconds(freq)
+    start = intervals['start'].dt.tz_localize(None).dt.as_unit('s').astype('int64').to_numpy()
+    end = intervals['end'].dt.tz_localize(None).dt.as_unit('s').astype('int64').to_numpy()
+    energy = intervals['energy_kwh'].to_numpy()
+
+    idx, period, overlap = time_grid.split_intervals(start, end, width)
+    share = energy[idx] * overlap / (end - start)[idx]
+
+    tz = intervals['start'].dt.tz
+    binned = pd.DataFrame({
+        'plant_id': intervals['plant_id'].to_numpy()[idx],
+        'meter_id': intervals['meter_id'].to_numpy()[idx],
+        'period': period,
+        'energy_kwh': share,
+        'coverage': overlap / width,
+        'prorated': (end - start)[idx] > width,
+    })
+    out = binned.groupby(['plant_id', 'meter_id', 'period'], sort=True).agg(
+        energy_kwh=('energy_kwh', 'sum'), coverage=('coverage', 'sum'), prorated=('prorated', 'any'),
+    ).reset_index()
+    out['period'] = _wall_times(out['period'].to_numpy() * width, tz)
+    return out
+
+
+def plant_energy(meter_periods):
+    """Sum meter energy per plant and period (num_meters, lowest coverage, any proration)"""
+    grouped = meter_periods.groupby(['plant_id', 'period'], sort=True)
+    return grouped.agg(
+        energy_kwh=('energy_kwh', 'sum'),
+        num_meters=('meter_id', 'nunique'),
+        coverage=('coverage', 'min'),
+        prorated=('prorated', 'any'),
+    ).reset_index()
+
+
+def energy_table(readings, freq='h'):
+    """Plant energy table of raw readings (the 'energy' derived table of log_store)"""
+    intervals = interval_energy(readings)
+    if len(intervals) == 0:
+        return pd.DataFrame(columns=ENERGY_COLUMNS)
+    return plant_energy(prorate(intervals, freq))
+
+
+def meter_energy(source='meter_hourly', plant_ids=None, start_date=None, end_date=None,
+                 freq=None, root=log_store.STORE_DIR):
+    """
+    Energy per plant and period from the canonical log store.
+
+    Readings are read MAX_INTERVAL_HOURS around the window so the periods at
+    its edges get their whole interval; the result is trimmed to
+    [start_date, end_date] (whole local days).
+    """
+    freq = freq or SOURCE_FREQ[source]
+    margin = pd.Timedelta(hours=MAX_INTERVAL_HOURS)
+    read_start = (pd.Timestamp(start_date) - margin).date() if start_date is not None else None
+    read_end = (pd.Timestamp(end_date) + margin).date() if end_date is not None else None
+
+    readings = log_store.read_log(source, plant_ids, read_start, read_end, columns=READING_COLUMNS,
+                                  root=root)
+    if len(readings) == 0:
+        return pd.DataFrame(columns=ENERGY_COLUMNS)
+
+    out = energy_table(readings, freq)
+    if start_date is not None or end_date is not None:
+        start_ts, end_ts = range_bounds(start_date or '2000-01-01', end_date or '2100-01-01', TIMEZONE)
+        out = out[(out['period'] >= start_ts) & (out['period'] < end_ts)].reset_index(drop=True)
+    return out
+
+
+# (readings in Wh, expected status, expected energy_kwh) of one meter's consecutive readings
+CHECK_CASES = [
+    ([9_999_000, 500], 'rollover', 1.5),
+    ([9_500_500, 9_500_400], 'backstep', np.nan),   # backward step just below a power of ten
+    ([98_000_000, 97_999_000], 'backstep', np.nan),
+    ([5_000_000, 1_000], 'reset', 1.0),
+    ([5_000_000, 5_002_000], 'ok', 2.0),
+]
+
+
+def check_status_rules():
+    """Run CHECK_CASES through interval_energy. Returns the failing cases."""
+    failures = []
+    for readings, status, energy in CHECK_CASES:
+        df = pd.DataFrame({
+            'plant_id': 1, 'meter_id': 1, 'meter_reading': readings, 'data_availability': 1,
+            'date': pd.date_range('2024-01-01', periods=len(readings), freq='h', tz=TIMEZONE),
+        })
+        row = interval_energy(df).iloc[-1]
+        if row['status'] != status or not np.isclose(row['energy_kwh'], energy, equal_nan=True):
+            failures.append((readings, status, energy, row['status'], row['energy_kwh']))
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Meter readings -> energy tables")
+    parser.add_argument('--check', action='store_true', help="only check the interval status rules")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check_status_rules()
+        for readings, status, energy, got_status, got_energy in failures:
+            print(f"❌ {readings}: expected {status} / {energy} kWh, got {got_status} / {got_energy} kWh")
+        print(f"{'❌' if failures else '✅'} {len(CHECK_CASES) - len(failures)}/{len(CHECK_CASES)} status cases")
+        raise SystemExit(1 if failures else 0)
+
+    print("=" * 80)
+    print("⚡ METER READINGS -> ENERGY")
+    print("=" * 80)
+
+    for source, freq in SOURCE_FREQ.items():
+        start = time.time()
+        if log_store.source_dir(source).exists():
+            readings = log_store.read_log(source, columns=READING_COLUMNS)
+        else:
+            readings = log_store.read_csv_typed(source)
+        if len(readings) == 0:
+            print(f"⚠️ {source}: no readings, skipped")
+            continue
+
+        intervals = interval_energy(readings)
+        periods = prorate(intervals, freq)
+        plants = plant_energy(periods)
+        log_store.write_derived(plants, source, 'energy')
+
+        counts = intervals['status'].value_counts()
+        print(f"\n✅ {source}: {len(readings):,} readings -> {len(plants):,} plant periods ({freq}) "
+              f"in {log_store.derived_dir(source, 'energy')} ({time.time() - start:.2f}s)")
+        print(f"   glitches dropped: {intervals.attrs['glitches']}, resets: {counts.get('reset', 0)}, "
+              f"rollovers: {counts.get('rollover', 0)}, backward steps: {counts.get('backstep', 0)}")
+
+        summary = plants.groupby('plant_id').agg(
+            energy_mwh=('energy_kwh', lambda e: e.sum() / 1000),
+            periods=('period', 'size'),
+            prorated=('prorated', 'mean'),
+        )
+        print(summary.round(3).to_string())
+
@@ -0,0 +1,249 @@
+"""
+Versioned model bundle
+A linear model is a coefficient vector, an intercept and its column names:
+models/bundle/ holds them as a small JSON manifest plus .npy arrays that are
+memory-mapped on load, so the dashboard and batch scoring predict with NumPy
+without importing scikit-learn. Other models (tree ensembles) are kept as a
+pickle inside the bundle and unpickled only for them. Without a bundle the
+legacy pickles (models/ridge_model.pkl, feature_columns.pkl, model_metrics.pkl)
+are loaded, and so are they when ridge_model.pkl was rewritten after
+models/bundle/ (retrained in the notebook without exporting a bundle): the
+manifest records the sha256 of the pickle it was written next to.
+
+Usage:
+    python model_bundle.py           # convert the legacy pickles into models/bundle/
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+FORMAT_VERSION = 1
+BUNDLE_DIR = Path('models/bundle')
+MANIFEST_FILE = 'manifest.json'
+LEGACY_PATHS = {
+    'model': Path('models/ridge_model.pkl'),
+    'feature_columns': Path('models/feature_columns.pkl'),
+    'metrics': Path('models/model_metrics.pkl'),
+}
+
+
+class LinearModel:
+    """predict() of a fitted linear model from its coefficients (X @ coef + intercept)"""
+
+    def __init__(self, coef, intercept, feature_names):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def predict(self, X):
+        """DataFrames are matched by column name (KeyError on missing columns), arrays by position"""
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)].to_numpy(dtype=float)
+        return np.asarray(X) @ self.coef_ + self.intercept_
+
+
+def _jsonable(value):
+    """Metrics / params as plain JSON types (NumPy scalars -> Python)"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def is_linear(model):
+    """True for single-output linear models (coef_ vector + scalar intercept_)"""
+    coef = getattr(model, 'coef_', None)
+    return coef is not None and np.ndim(coef) == 1 and np.ndim(getattr(model, 'intercept_', None)) == 0
+
+
+def _file_sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _is_default_dir(bundle_dir):
+    return Path(bundle_dir).resolve() == BUNDLE_DIR.resolve()
+
+
+def _replace_file(path, write):
+    """Write through a temporary file + rename: memory-mapped readers keep the old file"""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def write_bundle(model, feature_columns, metrics=None, bundle_dir=BUNDLE_DIR, arrays=None, extra=None):
+    """
+    Write model + feature columns + metrics as a bundle. The manifest is
+    written last, so a reader never sees a manifest without its arrays.
+    arrays: extra named arrays saved next to the model (e.g. refresh statistics)
+    extra: extra manifest fields (JSON types)
+    Returns the manifest dict.
+    """
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'model_class': type(model).__name__,
+        'feature_columns': [str(col) for col in feature_columns],
+        'metrics': _jsonable(metrics or {}),
+        'created': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if hasattr(model, 'get_params'):
+        manifest['params'] = _jsonable(model.get_params())
+    manifest.update(_jsonable(extra or {}))
+    if _is_default_dir(bundle_dir) and LEGACY_PATHS['model'].exists():
+        manifest['legacy_model_sha256'] = _file_sha256(LEGACY_PATHS['model'])
+
+    manifest['arrays'] = {}
+    for name, values in (arrays or {}).items():
+        _replace_file(bundle_dir / f'{name}.npy', lambda f, values=values: np.save(f, np.asarray(values)))
+        manifest['arrays'][name] = f'{name}.npy'
+
+    if is_linear(model):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if len(coef) != len(manifest['feature_columns']):
+            raise ValueError(f"{len(coef)} coefficients for {len(manifest['feature_columns'])} feature columns")
+        _replace_file(bundle_dir / 'coef.npy', lambda f: np.save(f, coef))
+        manifest.update(kind='linear', intercept=float(model.intercept_))
+        manifest['arrays']['coef'] = 'coef.npy'
+    else:
+        _replace_file(bundle_dir / 'model.pkl', lambda f: pickle.dump(model, f))
+        manifest.update(kind='pickle', pickle='model.pkl')
+
+    _replace_file(bundle_dir / MANIFEST_FILE, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return manifest
+
+
+def manifest_path(bundle_dir=BUNDLE_DIR):
+    return Path(bundle_dir) / MANIFEST_FILE
+
+
+def has_bundle(bundle_dir=BUNDLE_DIR):
+    return manifest_path(bundle_dir).exists()
+
+
+def bundle_is_stale(bundle_dir=BUNDLE_DIR):
+    """
+    True when models/ridge_model.pkl was rewritten after the default bundle:
+    its sha256 differs from the one in the manifest (manifests without it:
+    the pickle is newer than manifest.json). Other bundle dirs are never stale.
+    """
+    legacy = LEGACY_PATHS['model']
+    if not (has_bundle(bundle_dir) and _is_default_dir(bundle_dir) and legacy.exists()):
+        return False
+    recorded = json.loads(manifest_path(bundle_dir).read_text()).get('legacy_model_sha256')
+    if recorded is None:
+        return legacy.stat().st_mtime > manifest_path(bundle_dir).stat().st_mtime
+    return _file_sha256(legacy) != recorded
+
+
+def _use_bundle(bundle_dir):
+    return has_bundle(bundle_dir) and not bundle_is_stale(bundle_dir)
+
+
+def artifact_path(bundle_dir=BUNDLE_DIR):
+    """File whose content versions the model: the bundle manifest, else the legacy pickle"""
+    return manifest_path(bundle_dir) if _use_bundle(bundle_dir) else LEGACY_PATHS['model']
+
+
+def load_bundle(bundle_dir=BUNDLE_DIR):
+    """
+    Load a bundle: {'model', 'feature_columns', 'metrics', 'manifest', 'arrays'}.
+    Linear coefficients and extra arrays are memory-mapped (read-only, shared
+    by the page cache).
+    """
+    bundle_dir = Path(bundle_dir)
+    manifest = json.loads(manifest_path(bundle_dir).read_text())
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model bundle format {manifest.get('format_version')} "
+                         f"(expected {FORMAT_VERSION})")
+
+    arrays = {name: np.load(bundle_dir / filename, mmap_mode='r')
+              for name, filename in manifest.get('arrays', {}).items()}
+    if manifest['kind'] == 'linear':
+        model = LinearModel(arrays.pop('coef'), manifest['intercept'], manifest['feature_columns'])
+    else:
+        with open(bundle_dir / manifest['pickle'], 'rb') as f:
+            model = pickle.load(f)
+
+    return {
+        'model': model,
+        'feature_columns': list(manifest['feature_columns']),
+        'metrics': manifest['metrics'] or None,
+        'manifest': manifest,
+        'arrays': arrays,
+    }
+
+
+def _read_pickle(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_legacy(paths=None):
+    """The separate pickles of the notebook export (missing files -> None)"""
+    paths = {**LEGACY_PATHS, **(paths or {})}
+    model = _read_pickle(paths['model'])
+    feature_columns = _read_pickle(paths['feature_columns'])
+    return {
+        'model': model,
+        'feature_columns': list(feature_columns) if feature_columns is not None else None,
+        'metrics': _read_pickle(paths['metrics']),
+        'manifest': None,
+        'arrays': {},
+    }
+
+
+def load_artifacts(bundle_dir=BUNDLE_DIR):
+    """
+    Model, feature columns and metrics from the bundle if present, else the
+    legacy pickles (with a warning when the bundle is older than the pickle)
+    """
+    if _use_bundle(bundle_dir):
+        return load_bundle(bundle_dir)
+    if has_bundle(bundle_dir):
+        warnings.warn(f"{LEGACY_PATHS['model']} was rewritten after {bundle_dir}/: loading the pickles "
+                      f"(run python model_bundle.py to refresh the bundle)")
+    return load_legacy()
+
+
+if __name__ == '__main__':
+    import time
+
+    from feature_pipeline import predict_matrix
+
+    print("=" * 80)
+    print("📦 MODEL BUNDLE")
+    print("=" * 80)
+
+    legacy = load_legacy()
+    if legacy['model'] is None or legacy['feature_columns'] is None:
+        raise SystemExit(f"❌ {LEGACY_PATHS['model']} / {LEGACY_PATHS['feature_columns']} not found")
+
+    manifest = write_bundle(legacy['model'], legacy['feature_columns'], legacy['metrics'])
+    print(f"✅ {manifest['model_class']} ({manifest['kind']}, {len(manifest['feature_columns'])} features) "
+          f"-> {BUNDLE_DIR}/")
+
+    start = time.perf_counter()
+    bundle = load_bundle()
+    print(f"✅ Bundle loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    X = np.random.default_rng(0).random((1000, len(bundle['feature_columns'])))
+    diff = np.abs(predict_matrix(bundle['model'], X) - predict_matrix(legacy['model'], X)).max()
+    print(f"✅ Max prediction difference vs pickle: {diff:.2e}")
@@ -0,0 +1,222 @@
+"""
+Incremental model refresh
+Updates a plant's model bundle with the hours that arrived since it was
+trained instead of refitting on the whole history:
+- Ridge: the bundle keeps the sufficient statistics of its training rows
+  (row count, sums, XᵀX and Xᵀy around a fixed shift). New rows are added to
+  them and the coefficients re-solved from a (features x features) system,
+  the same result as a refit on all rows with the same alpha
+- gradient boosting / random forest / XGBoost: warm start, REFRESH_ESTIMATORS
+  more trees fitted on the last REFRESH_WINDOW_DAYS
+- other models (SVR) need a full retrain (train_fleet.py)
+Hyper-parameters are not re-tuned. A Ridge bundle without statistics is
+initialised once from the plant's history up to its training end.
+Hours are read from the log store's hourly generation table (kept current by
+log_store.py --incremental), only the days since each plant's training end,
+and only whole local days before --until (default today): rows added to the
+statistics are never corrected, so the day whose log is still arriving waits.
+
+Usage:
+    python log_store.py --incremental generation_5m          # append the new 5-minute rows first
+    python model_refresh.py                                  # every plant in models/fleet/
+    python model_refresh.py 11838318 --bundle models/bundle  # the dashboard model
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import log_store
+from batch_scoring import HISTORY_HOURS, START_DATE, WEATHER_PATH, daytime_features, load_weather_history, plant_inputs
+from model_bundle import LinearModel, load_bundle, write_bundle
+from plants import load_plants
+
+
+TIMEZONE = 'Asia/Dhaka'
+FLEET_MODEL_DIR = Path('models/fleet')
+DEFAULT_TRAINED_UNTIL = '2024-08-31 23:00'  # notebook models: trained before train_test_split_date
+REFRESH_ESTIMATORS = 10      # trees added per warm-started refresh
+REFRESH_WINDOW_DAYS = 30     # warm-started trees are fitted on the most recent days
+WARM_START_MODELS = ('GradientBoostingRegressor', 'RandomForestRegressor', 'XGBRegressor')
+STATISTICS = ['shift', 'x_sum', 'xtx', 'xty']
+
+
+def ridge_statistics(X, y, shift=None):
+    """
+    Sufficient statistics of a Ridge fit. Sums are taken around `shift`
+    (default: the column means of X) to keep XᵀX well conditioned.
+    Returns ({'shift', 'x_sum', 'xtx', 'xty'} arrays, {'n', 'y_sum'}).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    shift = X.mean(axis=0) if shift is None else np.asarray(shift, dtype=np.float64)
+    Z = X - shift
+    arrays = {'shift': shift, 'x_sum': Z.sum(axis=0), 'xtx': Z.T @ Z, 'xty': Z.T @ y}
+    return arrays, {'n': len(y), 'y_sum': float(y.sum())}
+
+
+def update_statistics(arrays, scalars, X, y):
+    """Add rows to Ridge statistics (same shift)"""
+    new_arrays, new_scalars = ridge_statistics(X, y, arrays['shift'])
+    arrays = {name: (arrays[name] if name == 'shift' else arrays[name] + new_arrays[name]) for name in STATISTICS}
+    scalars = {'n': scalars['n'] + new_scalars['n'], 'y_sum': scalars['y_sum'] + new_scalars['y_sum']}
+    return arrays, scalars
+
+
+def solve_ridge(arrays, scalars, alpha):
+    """
+    Ridge coefficients and intercept from the statistics (fit_intercept=True):
+    (ZcᵀZc + alpha I) coef = Zcᵀyc with Zc, yc centered
+    """
+    n = scalars['n']
+    z_mean = arrays['x_sum'] / n
+    y_mean = scalars['y_sum'] / n
+
+    gram = arrays['xtx'] - n * np.outer(z_mean, z_mean)
+    gram[np.diag_indices_from(gram)] += alpha
+    coef = np.linalg.solve(gram, arrays['xty'] - n * z_mean * y_mean)
+    intercept = y_mean - (z_mean + arrays['shift']) @ coef
+    return coef, float(intercept)
+
+
+def statistics_bundle(arrays, scalars, alpha, trained_until):
+    """Bundle `arrays` / `extra` arguments that make a Ridge bundle refreshable"""
+    return arrays, {'statistics': {**scalars, 'alpha': float(alpha)}, 'trained_until': str(trained_until)}
+
+
+def stored_generation(plant_id, start_date, end_date, root=log_store.STORE_DIR):
+    """
+    Hourly generation of one plant for whole local days [start_date, end_date]
+    from the log store, in the ingestion.hourly_generation layout (hours
+    without readings between the first and last one are 0).
+    """
+    table = log_store.read_derived('generation_5m', 'hourly', [plant_id], start_date, end_date, root=root)
+    if len(table) == 0:
+        return pd.DataFrame(columns=['plant_id', 'generation_date', 'generation_kwh', 'num_readings'])
+    table = table.set_index('period').sort_index()
+    hours = pd.date_range(table.index[0], table.index[-1], freq='h', name='generation_date')
+    table = table[['generation_kwh', 'num_readings']].reindex(hours, fill_value=0)
+    return table.reset_index().assign(plant_id=plant_id)
+
+
+def plant_rows(generation, weather, plant, feature_columns):
+    """Daytime rows of one plant's hourly generation: (times, X, y)"""
+    rows, X = daytime_features(plant_inputs(generation, weather), plant, feature_columns)
+    return rows.index, X, rows['generation_kwh'].to_numpy(dtype=np.float64)
+
+
+def refresh_linear(bundle, bundle_dir, times, X, y, history=None):
+    """
+    Add the new rows to the Ridge statistics and re-solve the coefficients.
+    history: (X, y) of the training rows, only used when the bundle has no statistics yet.
+    """
+    manifest = bundle['manifest']
+    if 'statistics' in manifest:
+        arrays = {name: np.asarray(bundle['arrays'][name]) for name in STATISTICS}
+        scalars = {k: manifest['statistics'][k] for k in ('n', 'y_sum')}
+        alpha = manifest['statistics']['alpha']
+        arrays, scalars = update_statistics(arrays, scalars, X, y)
+    else:
+        if history is None:
+            raise ValueError(f"{bundle_dir}: no refresh statistics and no training history to build them")
+        alpha = manifest['params']['alpha']
+        arrays, scalars = ridge_statistics(np.vstack([history[0], X]), np.r_[history[1], y])
+
+    coef, intercept = solve_ridge(arrays, scalars, alpha)
+    model = LinearModel(coef, intercept, bundle['feature_columns'])
+    metrics = {**(bundle['metrics'] or {}), 'train_samples': scalars['n'],
+               'refreshed': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
+    arrays, extra = statistics_bundle(arrays, scalars, alpha, times[-1])
+    extra.update(model_class=manifest['model_class'], params=manifest.get('params', {}))
+    return write_bundle(model, bundle['feature_columns'], metrics, bundle_dir, arrays=arrays, extra=extra)
+
+
+def refresh_warm_start(bundle, bundle_dir, times, X, y):
+    """Fit REFRESH_ESTIMATORS more trees on the recent rows (X, y cover REFRESH_WINDOW_DAYS)"""
+    model = bundle['model']
+    n_estimators = model.get_params()['n_estimators']
+    if type(model).__name__ == 'XGBRegressor':
+        model.set_params(n_estimators=REFRESH_ESTIMATORS)
+        model.fit(X, y, xgb_model=model.get_booster())
+        model.set_params(n_estimators=n_estimators + REFRESH_ESTIMATORS)
+    else:
+        model.set_params(warm_start=True, n_estimators=n_estimators + REFRESH_ESTIMATORS)
+        model.fit(X, y)
+
+    metrics = {**(bundle['metrics'] or {}), 'refreshed': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
+    return write_bundle(model, bundle['feature_columns'], metrics, bundle_dir,
+                        extra={'trained_until': str(times[-1])})
+
+
+def trained_until(manifest):
+    """Local timestamp of the last training row (notebook bundles: before the split date)"""
+    ts = pd.Timestamp(manifest.get('trained_until', DEFAULT_TRAINED_UNTIL))
+    return ts.tz_localize(TIMEZONE) if ts.tz is None else ts.tz_convert(TIMEZONE)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Refresh plant models with the newest hours")
+    parser.add_argument('plant_ids', nargs='*', type=int, help="plants to refresh (default: all in models/fleet/)")
+    parser.add_argument('--bundle', help="bundle directory (default: models/fleet/<plant_id>/)")
+    parser.add_argument('--weather', default=WEATHER_PATH, help="OpenWeather history export")
+    parser.add_argument('--start', default=START_DATE, help="first training date (statistics initialisation)")
+    parser.add_argument('--until', help="first local date not added (default: today, still being logged)")
+    args = parser.parse_args()
+
+    if not log_store.derived_dir('generation_5m', 'hourly').exists():
+        raise SystemExit("❌ No hourly generation in the log store: run python log_store.py generation_5m")
+
+    plant_ids = args.plant_ids or sorted(int(p.name) for p in FLEET_MODEL_DIR.iterdir() if p.name.isdigit())
+    bundle_dirs = {plant_id: Path(args.bundle) if args.bundle else FLEET_MODEL_DIR / str(plant_id)
+                   for plant_id in plant_ids}
+
+    print("=" * 80)
+    print(f"🔄 REFRESHING {len(plant_ids)} PLANT MODEL(S)")
+    print("=" * 80)
+
+    bundles = {plant_id: load_bundle(bundle_dir) for plant_id, bundle_dir in bundle_dirs.items()}
+    since = {plant_id: trained_until(bundle['manifest']) for plant_id, bundle in bundles.items()}
+
+    until = pd.Timestamp(args.until or pd.Timestamp.now(tz=TIMEZONE).date())
+    last_day = (until - pd.Timedelta(days=1)).date()
+
+    fleet = load_plants()
+    weather = load_weather_history(args.weather)
+
+    for plant_id, bundle in bundles.items():
+        manifest = bundle['manifest']
+        start_time = time.perf_counter()
+
+        # Statistics are initialised from the training history once, afterwards only the
+        # new days are read (+ the lag history; warm starts refit on the last window)
+        if manifest['kind'] == 'linear' and 'statistics' not in manifest:
+            start = args.start
+        elif manifest['kind'] == 'linear':
+            start = (since[plant_id] - pd.Timedelta(hours=HISTORY_HOURS)).date()
+        else:
+            start = (since[plant_id] - pd.Timedelta(days=REFRESH_WINDOW_DAYS, hours=HISTORY_HOURS)).date()
+        generation = stored_generation(plant_id, start, last_day)
+        if len(generation) == 0:
+            print(f"✅ {plant_id}: no hours from {start} to {last_day} in the log store")
+            continue
+        times, X, y = plant_rows(generation, weather, fleet.loc[plant_id], bundle['feature_columns'])
+        new = times > since[plant_id]
+        if not new.any():
+            print(f"✅ {plant_id}: up to date (trained until {since[plant_id]}, complete days up to {last_day})")
+            continue
+
+        if manifest['kind'] == 'linear':
+            history = (X[~new], y[~new]) if 'statistics' not in manifest else None
+            refresh_linear(bundle, bundle_dirs[plant_id], times[new], X[new], y[new], history)
+        elif manifest['model_class'] in WARM_START_MODELS:
+            recent = times > times[-1] - pd.Timedelta(days=REFRESH_WINDOW_DAYS)
+            refresh_warm_start(bundle, bundle_dirs[plant_id], times[recent], X[recent], y[recent])
+        else:
+            print(f"⚠️ {plant_id}: {manifest['model_class']} cannot be refreshed, retrain with train_fleet.py")
+            continue
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"✅ {plant_id}: {manifest['model_class']} refreshed with {new.sum():,} new rows up to {times[-1]} "
+              f"({len(generation):,} hours read from {start}, {elapsed_ms:.1f} ms)")
@@ -1,6 +1,7 @@
 """
 COPY-PASTE THIS CELL AT THE END OF HKL_ML_comparison_v2.ipynb
 This will export all necessary files for the Streamlit dashboard
+(re-scoring with an already exported model: python batch_scoring.py)
 """
 
 # ==================================================================================
@@ -10,6 +11,12 @@ This will export all necessary files for the Streamlit dashboard
 import pickle
 from pathlib import Path
 
+from daily_metrics import update_fleet_rollup, write_rollups
+from model_bundle import write_bundle
+from prediction_store import write_partitioned
+
+PLANT_ID = 11838318  # HKL (GGI) in data/inverter_plants.csv
+
 print("=" * 80)
 print("EXPORTING PREDICTIONS FOR STREAMLIT DASHBOARD")
 print("=" * 80)
@@ -55,18 +62,20 @@ export_df_clean.to_parquet('data/predictions.parquet')
 print(f"✅ Exported {len(export_df_clean)} rows to data/predictions.parquet")
 print(f"   Date range: {export_df_clean.index.min()} to {export_df_clean.index.max()}")
 
-# 4. Export the trained Ridge model
-with open('models/ridge_model.pkl', 'wb') as f:
-    pickle.dump(best_ridge_model, f)
-print("✅ Exported trained Ridge model to models/ridge_model.pkl")
-print(f"   Model parameters: alpha={best_ridge_params['alpha']}")
+# Partitioned copy (plant_id / month) used for date-range reads
+num_months = write_partitioned(export_df_clean, PLANT_ID, 'data/predictions')
+print(f"✅ Exported {num_months} monthly partitions to data/predictions/plant_id={PLANT_ID}/")
 
-# 5. Export feature columns for future reference
-with open('models/feature_columns.pkl', 'wb') as f:
-    pickle.dump(feature_columns, f)
-print(f"✅ Exported {len(feature_columns)} feature columns to models/feature_columns.pkl")
+# 4. Export daily and monthly rollups (small tables read by the dashboard)
+daily_rollup, monthly_rollup = write_rollups(export_df_clean, 'data')
+print(f"✅ Exported {len(daily_rollup)} days to data/predictions_daily.parquet")
+print(f"✅ Exported {len(monthly_rollup)} months to data/predictions_monthly.parquet")
 
-# 6. Export model performance metrics
+# Fleet rollup: this plant's daily totals next to the other plants' (fleet overview)
+update_fleet_rollup(daily_rollup, PLANT_ID, 'data')
+print(f"✅ Updated plant {PLANT_ID} in data/predictions_daily_fleet.parquet")
+
+# 5. Export model performance metrics
 metrics_dict = {
     'model_name': 'Ridge Regression',
     'test_mae': test_mae_ridge,
@@ -80,9 +89,19 @@ metrics_dict = {
     'export_date': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
 }
 
+# 6. Export the model bundle (JSON manifest + coefficients, loaded by the dashboard without sklearn)
+manifest = write_bundle(best_ridge_model, feature_columns, metrics_dict, 'models/bundle')
+print(f"✅ Exported {manifest['model_class']} bundle ({manifest['kind']}) to models/bundle/")
+print(f"   Model parameters: alpha={best_ridge_params['alpha']}, {len(feature_columns)} features")
+
+# 7. Legacy pickles (older dashboards / notebooks)
+with open('models/ridge_model.pkl', 'wb') as f:
+    pickle.dump(best_ridge_model, f)
+with open('models/feature_columns.pkl', 'wb') as f:
+    pickle.dump(feature_columns, f)
 with open('models/model_metrics.pkl', 'wb') as f:
     pickle.dump(metrics_dict, f)
-print("✅ Exported model metrics to models/model_metrics.pkl")
+print("✅ Exported models/ridge_model.pkl, feature_columns.pkl and model_metrics.pkl")
 
 print("\n" + "=" * 80)
 print("✅ EXPORT COMPLETE - STREAMLIT DASHBOARD IS READY!")
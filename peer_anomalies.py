@@ -0,0 +1,179 @@
+"""
+Fleet-wide anomaly detection by peer comparison
+Plants in the same area (plant_address, missing = Gazipur) see the same
+weather: a drop shared by the group is weather, a plant falling behind its
+peers is a fault. Hourly generation is normalized by capacity (DC kWp from
+projects.csv, else plant_capacity) into a (hours x plants) specific yield
+matrix; for every block of BLOCK_HOURS rows and peer group:
+- reference = median specific yield of the group per hour, scale = 1.4826 * MAD
+- peer_ratio = plant / reference, peer_z = (plant - reference) / scale
+- is_peer_anomaly when peer_ratio < PEER_RATIO and peer_z < -PEER_Z, for hours
+  with a reference above MIN_REFERENCE and at least MIN_PEERS plants reporting
+Hours with fewer than MIN_READINGS of their 12 five-minute readings (logger /
+comms gaps) stay NaN: they are left out of the comparison, not reported as
+faults.
+Each block is a handful of column-wise NumPy operations whatever the number
+of plants. No model is involved: only the generation log.
+
+Usage:
+    python peer_anomalies.py                          # every active plant
+    python peer_anomalies.py --start 2024-06-01 --generation data/inverter_five_minutes_generation_logs.csv
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ingestion import GENERATION_5M_PATH, hourly_generation
+from plants import load_plants
+
+
+TIMEZONE = 'Asia/Dhaka'
+START_DATE = '2024-01-01'
+OUTPUT_PATH = 'data/peer_anomalies.parquet'
+
+BLOCK_HOURS = 7 * 24
+MIN_PEERS = 3            # plants reporting in the group for the hour to be compared
+MIN_REFERENCE = 0.05     # kWh/kWp: the group produces at least 5% of capacity (skips night / dawn)
+PEER_RATIO = 0.5         # plant below half of its peers' median
+PEER_Z = 3.0             # ... and more than 3 robust std below it
+MIN_SCALE = 0.01         # kWh/kWp floor of the MAD scale (identical peers)
+MIN_READINGS = 10        # 5-minute readings (of 12) for an hour to count as observed
+
+OUTPUT_COLUMNS = ['generation_kwh', 'specific_yield', 'peer_median', 'peer_ratio', 'peer_z', 'n_peers']
+
+
+def plant_capacity(plants):
+    """DC capacity (kWp) per plant, the inverter list capacity where projects.csv has none"""
+    return plants['capacity_dc_kwp'].fillna(plants['plant_capacity'])
+
+
+def yield_matrix(generation, plant_ids, capacity):
+    """
+    Specific yield (kWh/kWp) as a float32 (hours x plants) matrix, NaN where a
+    plant has no row or fewer than MIN_READINGS readings in the hour.
+    Returns (hourly DatetimeIndex, matrix).
+    """
+    utc = generation['generation_date'].dt.tz_convert('UTC')
+    first, last = utc.min(), utc.max()
+    hours = pd.date_range(first, last, freq='h').tz_convert(TIMEZONE)
+
+    rows = ((utc - first) // pd.Timedelta(hours=1)).to_numpy()
+    columns = pd.Index(plant_ids).get_indexer(generation['plant_id'])
+    Y = np.full((len(hours), len(plant_ids)), np.nan, dtype=np.float32)
+    kwh = generation['generation_kwh'].where(generation['num_readings'] >= MIN_READINGS).to_numpy()
+    Y[rows, columns] = kwh / capacity.reindex(plant_ids).to_numpy()[columns]
+    return hours, Y
+
+
+def peer_scores(Y, block_hours=BLOCK_HOURS):
+    """
+    Peer statistics of one group's (hours x plants) yield matrix, block by block.
+    Returns a dict of arrays: peer_median, n_peers (hours,), peer_ratio, peer_z,
+    is_peer_anomaly (hours x plants).
+    """
+    n_hours, n_plants = Y.shape
+    out = {
+        'peer_median': np.full(n_hours, np.nan, dtype=np.float32),
+        'n_peers': np.zeros(n_hours, dtype=np.int32),
+        'peer_ratio': np.full(Y.shape, np.nan, dtype=np.float32),
+        'peer_z': np.full(Y.shape, np.nan, dtype=np.float32),
+        'is_peer_anomaly': np.zeros(Y.shape, dtype=bool),
+    }
+    for begin in range(0, n_hours, block_hours):
+        block = Y[begin:begin + block_hours]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # hours without any reading
+            median = np.nanmedian(block, axis=1)
+            scale = 1.4826 * np.nanmedian(np.abs(block - median[:, None]), axis=1)
+        n_peers = (~np.isnan(block)).sum(axis=1)
+
+        comparable = (n_peers >= MIN_PEERS) & (median > MIN_REFERENCE)
+        median = np.where(comparable, median, np.nan)
+        ratio = block / median[:, None]
+        z = (block - median[:, None]) / np.maximum(scale, MIN_SCALE)[:, None]
+
+        rows = slice(begin, begin + len(block))
+        out['peer_median'][rows] = median
+        out['n_peers'][rows] = n_peers
+        out['peer_ratio'][rows] = ratio
+        out['peer_z'][rows] = z
+        out['is_peer_anomaly'][rows] = (ratio < PEER_RATIO) & (z < -PEER_Z)  # NaN compares False
+    return out
+
+
+def detect_peer_anomalies(generation, plants, block_hours=BLOCK_HOURS):
+    """
+    Hours where a plant falls behind its peer group.
+    generation: plant_id, generation_date, generation_kwh, num_readings
+    (ingestion.hourly_generation)
+    Returns a DataFrame (plant_id, generation_date, OUTPUT_COLUMNS) of the anomalous hours.
+    """
+    capacity = plant_capacity(plants)
+    frames = []
+    for address, group in plants.loc[plants.index.isin(generation['plant_id'])].groupby('plant_address'):
+        plant_ids = group.index.tolist()
+        if len(plant_ids) < MIN_PEERS:
+            continue
+        group_generation = generation[generation['plant_id'].isin(plant_ids)]
+        hours, Y = yield_matrix(group_generation, plant_ids, capacity)
+        scores = peer_scores(Y, block_hours)
+
+        hour_idx, plant_idx = np.nonzero(scores['is_peer_anomaly'])
+        specific_yield = Y[hour_idx, plant_idx]
+        frames.append(pd.DataFrame({
+            'plant_id': np.asarray(plant_ids)[plant_idx],
+            'generation_date': hours[hour_idx],
+            'generation_kwh': specific_yield * capacity.reindex(plant_ids).to_numpy()[plant_idx],
+            'specific_yield': specific_yield,
+            'peer_median': scores['peer_median'][hour_idx],
+            'peer_ratio': scores['peer_ratio'][hour_idx, plant_idx],
+            'peer_z': scores['peer_z'][hour_idx, plant_idx],
+            'n_peers': scores['n_peers'][hour_idx],
+            'plant_address': address,
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=['plant_id', 'generation_date'] + OUTPUT_COLUMNS + ['plant_address'])
+    return pd.concat(frames, ignore_index=True).sort_values(['plant_id', 'generation_date'], ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Flag plants that fall behind their peers")
+    parser.add_argument('plant_ids', nargs='*', type=int, help="plants to compare (default: every active plant)")
+    parser.add_argument('--start', default=START_DATE, help="first local date")
+    parser.add_argument('--generation', default=GENERATION_5M_PATH, help="5-minute generation log")
+    parser.add_argument('--output', default=OUTPUT_PATH, help="anomalous hours (parquet)")
+    args = parser.parse_args()
+
+    fleet = load_plants()
+    plant_ids = args.plant_ids or fleet.index[fleet['status'] == 'active'].tolist()
+
+    print("=" * 80)
+    print(f"👥 PEER COMPARISON OF {len(plant_ids)} PLANT(S) FROM {args.start}")
+    print("=" * 80)
+
+    start_time = time.time()
+    generation = hourly_generation(args.generation, plant_ids, TIMEZONE, args.start)
+    print(f"📥 {len(generation):,} plant-hours ({time.time() - start_time:.1f}s)")
+
+    start_time = time.perf_counter()
+    anomalies = detect_peer_anomalies(generation, fleet.loc[plant_ids])
+    elapsed = time.perf_counter() - start_time
+    anomalies.to_parquet(args.output, index=False)
+
+    for address, group in fleet.loc[plant_ids].groupby('plant_address'):
+        if len(group) < MIN_PEERS:
+            print(f"⚠️ {address}: {len(group)} plant(s), fewer than {MIN_PEERS} peers, not compared")
+    summary = anomalies.groupby('plant_id').agg(
+        hours=('generation_date', 'size'),
+        days=('generation_date', lambda t: t.dt.date.nunique()),
+        median_ratio=('peer_ratio', 'median'),
+    )
+    for row in summary.itertuples():
+        print(f"🚨 {row.Index} {fleet.at[row.Index, 'plant_name']}: {row.hours} hours on {row.days} days "
+              f"below peers (median {row.median_ratio:.0%} of peer yield)")
+    print(f"\n⏱️  {len(generation):,} plant-hours compared in {elapsed * 1000:.0f} ms -> {args.output}")
@@ -0,0 +1,104 @@
+"""
+Model performance metrics for the Solar Monitoring Dashboard
+Pure NumPy MAE / RMSE / R² / MAPE and error histogram, computed once per
+model + predictions version (keyed on file hashes)
+"""
+
+import hashlib
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Test set used by the dashboard (predictions after this date)
+TEST_SPLIT_DATE = '2024-12-31'
+HISTOGRAM_BINS = 50
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file ('' if it does not exist)"""
+    path = Path(path)
+    if not path.exists():
+        return ''
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def regression_metrics(y_true, y_pred):
+    """
+    MAE, RMSE, R² and MAPE (MAPE only over hours with actual production > 0)
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
+    errors = y_true - y_pred
+
+    mae = np.mean(np.abs(errors))
+    rmse = np.sqrt(np.mean(errors ** 2))
+
+    ss_res = np.sum(errors ** 2)
+    ss_tot = np.sum((y_true - y_true.mean()) ** 2)
+    r2 = 1 - ss_res / ss_tot if ss_tot > 0 else 0.0
+
+    # Calculate MAPE avoiding division by zero
+    mask_nonzero = y_true > 0
+    if mask_nonzero.sum() > 0:
+        mape = np.mean(np.abs(errors[mask_nonzero] / y_true[mask_nonzero])) * 100
+    else:
+        mape = 0.0
+
+    return {'mae': mae, 'rmse': rmse, 'r2': r2, 'mape': mape}
+
+
+def error_histogram(errors, bins=HISTOGRAM_BINS):
+    """Histogram of prediction errors: returns (counts, bin_edges)"""
+    errors = np.asarray(errors, dtype=float)
+    errors = errors[np.isfinite(errors)]
+    return np.histogram(errors, bins=bins)
+
+
+def compute_model_performance(df, split_date=TEST_SPLIT_DATE, bins=HISTOGRAM_BINS):
+    """
+    Test-set performance of the exported predictions.
+
+    Returns a dict with the metrics, the scatter arrays (predicted / actual),
+    the error histogram and the error mean / std.
+    """
+    split_ts = pd.Timestamp(split_date)
+    if df.index.tz is not None:
+        split_ts = split_ts.tz_localize(df.index.tz)
+
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    test_df = df.iloc[df.index.searchsorted(split_ts, side='left'):]
+
+    y_true = test_df['generation_kwh'].to_numpy(dtype=float)
+    y_pred = test_df['ml_predicted_kwh'].to_numpy(dtype=float)
+    errors = y_true - y_pred
+
+    counts, edges = error_histogram(errors, bins)
+
+    return {
+        'metrics': regression_metrics(y_true, y_pred),
+        'y_true': y_true,
+        'y_pred': y_pred,
+        'hist_counts': counts,
+        'hist_edges': edges,
+        'error_mean': float(np.mean(errors)) if len(errors) else 0.0,
+        'error_std': float(np.std(errors, ddof=1)) if len(errors) > 1 else 0.0,
+        'num_samples': len(test_df),
+    }
+
+
+def load_exported_metrics(path='models/model_metrics.pkl'):
+    """Metrics dict exported by notebook_export_cell.py (None if missing)"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,72 @@
+"""
+Fleet plant metadata
+Plant list from data/inverter_plants.csv, DC capacity from data/projects.csv
+and coordinates from data/plant_locations.csv (falls back to the address town)
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+
+DATA_PATHS = {
+    'inverter_plants': 'data/inverter_plants.csv',
+    'projects': 'data/projects.csv',
+    'plant_locations': 'data/plant_locations.csv',
+}
+
+DEFAULT_ADDRESS = 'Gazipur'  # missing plant_address values are Gazipur (GGI) sites
+TIMEZONE = 'Asia/Dhaka'
+
+# Approximate town coordinates, used when a plant has no surveyed location
+ADDRESS_COORDINATES = {
+    'Gazipur': (24.0023, 90.4264),
+    'Dhaka': (23.8103, 90.4125),
+    'Bogura': (24.8465, 89.3773),
+    'Narayangang': (23.6238, 90.5000),
+    'Rajshahi': (24.3745, 88.6042),
+}
+
+
+def load_plants(data_paths=None):
+    """
+    Load fleet metadata indexed by plant_id.
+
+    Columns: plant_name, plant_address, plant_capacity (kWp), capacity_dc_kwp,
+    capacity_ac_kw, status, latitude, longitude, location_source ('site' / 'address')
+    """
+    paths = {**DATA_PATHS, **(data_paths or {})}
+
+    plants = pd.read_csv(paths['inverter_plants'])
+    plants['plant_address'] = plants['plant_address'].fillna(DEFAULT_ADDRESS)
+
+    # DC / AC capacity from the projects list (customId == plant_id)
+    if Path(paths['projects']).exists():
+        projects = pd.read_csv(paths['projects'])[['customId', 'projectCapacityDc', 'projectCapacityAc']]
+        projects = projects.rename(columns={
+            'customId': 'plant_id',
+            'projectCapacityDc': 'capacity_dc_kwp',
+            'projectCapacityAc': 'capacity_ac_kw',
+        })
+        plants = plants.merge(projects, on='plant_id', how='left')
+    else:
+        plants['capacity_dc_kwp'] = float('nan')
+        plants['capacity_ac_kw'] = float('nan')
+
+    # Surveyed site coordinates
+    if Path(paths['plant_locations']).exists():
+        locations = pd.read_csv(paths['plant_locations'])
+        plants = plants.merge(locations, on='plant_id', how='left')
+    else:
+        plants['latitude'] = float('nan')
+        plants['longitude'] = float('nan')
+
+    plants['location_source'] = plants['latitude'].notna().map({True: 'site', False: 'address'})
+
+    # Town-level fallback
+    town = plants['plant_address'].map(ADDRESS_COORDINATES)
+    plants['latitude'] = plants['latitude'].fillna(town.str[0])
+    plants['longitude'] = plants['longitude'].fillna(town.str[1])
+
+    return plants.set_index('plant_id')
+
@@ -0,0 +1,182 @@
+"""
+Partitioned predictions store for the Solar Monitoring Dashboard
+Hourly predictions written as parquet partitioned by plant_id and month,
+with date-range reads that only touch the requested window
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+STORE_DIR = Path('data/predictions')
+TIMEZONE = 'Asia/Dhaka'
+INDEX_NAME = 'generation_date'
+STORE_COLUMNS = ['generation_kwh', 'ml_predicted_kwh', 'clearsky_expected_kwh']  # batch scoring output
+
+# Partition keys are kept as strings (plant ids are not summed, months are 'YYYY-MM')
+PARTITIONING = ds.partitioning(
+    pa.schema([('plant_id', pa.string()), ('month', pa.string())]),
+    flavor='hive',
+)
+
+
+def range_bounds(start_date, end_date, tz):
+    """Return [start, end) timestamps covering whole local days"""
+    start_ts = pd.Timestamp(start_date)
+    end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+
+    if tz is not None:
+        start_ts = start_ts.tz_localize(tz) if start_ts.tz is None else start_ts.tz_convert(tz)
+        end_ts = end_ts.tz_localize(tz) if end_ts.tz is None else end_ts.tz_convert(tz)
+
+    return start_ts, end_ts
+
+
+def month_keys(start_ts, end_ts):
+    """Month partition keys ('YYYY-MM') overlapping [start_ts, end_ts)"""
+    months = pd.period_range(start_ts.tz_localize(None).to_period('M'),
+                             (end_ts - pd.Timedelta(microseconds=1)).tz_localize(None).to_period('M'),
+                             freq='M')
+    return [str(m) for m in months]
+
+
+def slice_range(df, start_date, end_date):
+    """
+    Select whole days [start_date, end_date] from a frame with a sorted DatetimeIndex.
+
+    Uses binary search on the index (O(log n) + O(window)) and returns a
+    positional slice instead of a boolean mask over the full history.
+    """
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+
+    start_ts, end_ts = range_bounds(start_date, end_date, df.index.tz)
+    start_pos = df.index.searchsorted(start_ts, side='left')
+    end_pos = df.index.searchsorted(end_ts, side='left')
+
+    return df.iloc[start_pos:end_pos]
+
+
+def write_partitioned(df, plant_id, root=STORE_DIR):
+    """
+    Write hourly predictions for one plant to root/plant_id=<id>/month=<YYYY-MM>/.
+    Existing partitions for the same plant and months are replaced.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    table_df = df.sort_index().reset_index()
+    table_df = table_df.rename(columns={table_df.columns[0]: INDEX_NAME})
+    table_df['plant_id'] = str(plant_id)
+    table_df['month'] = table_df[INDEX_NAME].dt.strftime('%Y-%m')
+
+    table = pa.Table.from_pandas(table_df, preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=str(root),
+        partition_cols=['plant_id', 'month'],
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.parquet',
+    )
+
+    return table_df['month'].nunique()
+
+
+def has_plant(plant_id, root=STORE_DIR):
+    """True if the store holds a partition for plant_id"""
+    return (Path(root) / f'plant_id={plant_id}').is_dir()
+
+
+def list_plants(root=STORE_DIR):
+    """plant_ids (int) holding at least one partition, sorted"""
+    return sorted(int(d.name.split('=', 1)[1]) for d in Path(root).glob('plant_id=*') if d.is_dir())
+
+
+def plant_version(plant_id, root=STORE_DIR):
+    """Cheap version key of one plant's partitions (file count + newest mtime), '' if absent"""
+    files = list((Path(root) / f'plant_id={plant_id}').glob('month=*/*.parquet'))
+    if not files:
+        return ''
+    return f"{len(files)}-{max(f.stat().st_mtime_ns for f in files)}"
+
+
+def _empty_frame(root, columns=None):
+    """
+    Empty result with the store's columns (schema of any partition, else
+    STORE_COLUMNS), restricted to `columns` when given
+    """
+    first = next(Path(root).glob('plant_id=*/month=*/*.parquet'), None)
+    if first is not None:
+        df = pq.read_schema(first).empty_table().to_pandas()
+        df = df.drop(columns=[c for c in ('plant_id', 'month') if c in df.columns]).set_index(INDEX_NAME)
+    else:
+        df = pd.DataFrame({c: pd.Series(dtype=float) for c in STORE_COLUMNS},
+                          index=pd.DatetimeIndex([], tz=TIMEZONE, name=INDEX_NAME))
+    if columns is not None:
+        df = df.reindex(columns=[c for c in columns if c != INDEX_NAME])
+    return df
+
+
+def read_plant(plant_id, root=STORE_DIR, columns=None):
+    """Read the whole history of one plant (DataFrame indexed by generation_date, sorted)"""
+    root = Path(root)
+    files = sorted(str(f) for f in (root / f'plant_id={plant_id}').glob('month=*/*.parquet'))
+    if not files:
+        return _empty_frame(root, columns)
+
+    dataset = ds.dataset(files, format='parquet', partitioning=PARTITIONING,
+                         partition_base_dir=str(root))
+    if columns is not None:
+        columns = [INDEX_NAME] + [c for c in columns if c != INDEX_NAME]
+
+    df = dataset.to_table(columns=columns).to_pandas()
+    df = df.drop(columns=[c for c in ('plant_id', 'month') if c in df.columns])
+    return df.set_index(INDEX_NAME).sort_index()
+
+
+def read_range(plant_id, start_date, end_date, root=STORE_DIR, columns=None):
+    """
+    Read whole days [start_date, end_date] for one plant.
+
+    Partition pruning on plant_id / month skips files outside the window and
+    the timestamp predicate is pushed down to the parquet row groups.
+    Returns a DataFrame indexed by generation_date (sorted).
+    """
+    root = Path(root)
+    start_ts, end_ts = range_bounds(start_date, end_date, TIMEZONE)
+
+    # Only list files of the months overlapping the window
+    plant_dir = root / f'plant_id={plant_id}'
+    files = [
+        str(f)
+        for month in month_keys(start_ts, end_ts)
+        for f in sorted((plant_dir / f'month={month}').glob('*.parquet'))
+    ]
+    if not files:
+        return _empty_frame(root, columns)
+
+    dataset = ds.dataset(files, format='parquet', partitioning=PARTITIONING,
+                         partition_base_dir=str(root))
+
+    ts_type = dataset.schema.field(INDEX_NAME).type
+    tz = getattr(ts_type, 'tz', None)
+    if tz is not None and tz != TIMEZONE:
+        start_ts, end_ts = start_ts.tz_convert(tz), end_ts.tz_convert(tz)
+
+    expr = (
+        (ds.field(INDEX_NAME) >= pa.scalar(start_ts.to_pydatetime(), type=ts_type))
+        & (ds.field(INDEX_NAME) < pa.scalar(end_ts.to_pydatetime(), type=ts_type))
+    )
+
+    if columns is not None:
+        columns = [INDEX_NAME] + [c for c in columns if c != INDEX_NAME]
+
+    table = dataset.to_table(columns=columns, filter=expr)
+    df = table.to_pandas()
+    df = df.drop(columns=[c for c in ('plant_id', 'month') if c in df.columns])
+
+    return df.set_index(INDEX_NAME).sort_index()
@@ -0,0 +1,141 @@
+"""
+Ridge alpha path from one SVD per fold
+GridSearchCV refits Ridge for every alpha and fold. With the centered
+training matrix factorized once, Xc = U S Vᵀ, the coefficients of any alpha
+are V diag(s / (s² + alpha)) Uᵀ yc, so a dense alpha path costs one SVD plus
+a (validation rows x features) product per fold, computed in float64 (sklearn
+fits the float32 feature matrices in float32: Ridge refits and the GridSearchCV
+check cast to float64 to solve the same problem). Selection is the notebook's:
+lowest mean validation MAE over the TimeSeriesSplit folds (first alpha on ties,
+as GridSearchCV). RIDGE_ALPHAS contains the notebook grid (0.1, 1, 10, 100).
+
+Usage:
+    python ridge_path.py                         # HKL (GGI), whole training period + per season
+    python ridge_path.py 11838318 11605154 --check
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+
+TIMEZONE = 'Asia/Dhaka'
+SPLIT_DATE = '2024-09-01'
+RIDGE_ALPHAS = np.logspace(-2, 4, 49)  # 8 per decade
+NOTEBOOK_ALPHAS = [0.1, 1.0, 10.0, 100.0]
+SEASONS = {  # Bangladesh meteorological seasons (month numbers)
+    'winter': [12, 1, 2],
+    'pre-monsoon': [3, 4, 5],
+    'monsoon': [6, 7, 8, 9],
+    'post-monsoon': [10, 11],
+}
+
+
+def ridge_path(X_train, y_train, X_val, alphas=RIDGE_ALPHAS):
+    """Validation predictions of Ridge(alpha) fitted on the training rows, one column per alpha"""
+    X_train = np.asarray(X_train, dtype=np.float64)
+    y_train = np.asarray(y_train, dtype=np.float64)
+    x_mean = X_train.mean(axis=0)
+    y_mean = y_train.mean()
+
+    U, s, Vt = np.linalg.svd(X_train - x_mean, full_matrices=False)
+    uty = U.T @ (y_train - y_mean)
+    shrink = s / (s ** 2 + np.asarray(alphas, dtype=np.float64)[:, None])  # (alphas, components)
+
+    A = (np.asarray(X_val, dtype=np.float64) - x_mean) @ Vt.T
+    return A @ (shrink * uty).T + y_mean
+
+
+def path_mae(X, y, folds, alphas=RIDGE_ALPHAS):
+    """Validation MAE per fold and alpha: array (folds, alphas). folds: (train_end, val_start, val_end)"""
+    mae = np.empty((len(folds), len(alphas)))
+    for i, (train_end, val_start, val_end) in enumerate(folds):
+        pred = ridge_path(X[:train_end], y[:train_end], X[val_start:val_end], alphas)
+        mae[i] = np.abs(pred - np.asarray(y[val_start:val_end])[:, None]).mean(axis=0)
+    return mae
+
+
+def select_alpha(X, y, folds, alphas=RIDGE_ALPHAS):
+    """(best alpha, mean MAE per alpha)"""
+    mean_mae = path_mae(X, y, folds, alphas).mean(axis=0)
+    return float(alphas[int(np.argmin(mean_mae))]), mean_mae
+
+
+def season_rows(times, season):
+    """Boolean mask of the rows of a SEASONS entry"""
+    return np.isin(times.month, SEASONS[season])
+
+
+def _grid_search_alpha(X, y, alphas):
+    """The notebook's GridSearchCV selection (reference for --check)"""
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+
+    from train_fleet import CV_SPLITS
+
+    search = GridSearchCV(Ridge(), {'alpha': list(alphas)}, cv=TimeSeriesSplit(n_splits=CV_SPLITS),
+                          scoring='neg_mean_absolute_error')
+    search.fit(np.asarray(X, dtype=np.float64), y)  # sklearn fits float32 input in float32
+    return search.best_params_['alpha']
+
+
+if __name__ == '__main__':
+    from batch_scoring import START_DATE, WEATHER_PATH, load_weather_history
+    from feature_pipeline import FEATURE_COLUMNS
+    from ingestion import GENERATION_5M_PATH, hourly_generation
+    from model_refresh import plant_rows
+    from plants import load_plants
+    from train_fleet import MIN_TRAIN_ROWS, cv_folds
+
+    parser = argparse.ArgumentParser(description="Ridge alpha path per plant and season")
+    parser.add_argument('plant_ids', nargs='*', type=int, default=[11838318], help="plants (default: HKL)")
+    parser.add_argument('--start', default=START_DATE, help="first local date of the history")
+    parser.add_argument('--split-date', default=SPLIT_DATE, help="first local date of the test period")
+    parser.add_argument('--generation', default=GENERATION_5M_PATH, help="5-minute generation log")
+    parser.add_argument('--weather', default=WEATHER_PATH, help="OpenWeather history export")
+    parser.add_argument('--check', action='store_true', help="compare with GridSearchCV on the notebook grid")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"📐 RIDGE ALPHA PATH ({len(RIDGE_ALPHAS)} alphas, {RIDGE_ALPHAS[0]:g} to {RIDGE_ALPHAS[-1]:g})")
+    print("=" * 80)
+
+    fleet = load_plants()
+    weather = load_weather_history(args.weather)
+    generation = hourly_generation(args.generation, args.plant_ids, TIMEZONE, args.start)
+    split = pd.Timestamp(args.split_date).tz_localize(TIMEZONE)
+
+    results = []
+    for plant_id, plant_generation in generation.groupby('plant_id', sort=True):
+        times, X, y = plant_rows(plant_generation, weather, fleet.loc[plant_id], FEATURE_COLUMNS)
+        train = times < split
+        subsets = {'all': train, **{season: train & season_rows(times, season) for season in SEASONS}}
+
+        for name, rows in subsets.items():
+            if rows.sum() < MIN_TRAIN_ROWS:
+                print(f"⚠️ {plant_id} {name}: {rows.sum()} training rows, skipped")
+                continue
+            X_rows, y_rows = X[rows], y[rows]
+            folds = cv_folds(len(y_rows))
+
+            start = time.perf_counter()
+            alpha, mean_mae = select_alpha(X_rows, y_rows, folds)
+            seconds = time.perf_counter() - start
+            results.append({'plant_id': plant_id, 'rows': name, 'n_train': int(rows.sum()), 'alpha': alpha,
+                            'cv_mae': mean_mae.min(), 'seconds': seconds})
+
+            if args.check:
+                path_alpha, _ = select_alpha(X_rows, y_rows, folds, np.array(NOTEBOOK_ALPHAS))
+                start = time.perf_counter()
+                grid_alpha = _grid_search_alpha(X_rows, y_rows, NOTEBOOK_ALPHAS)
+                grid_seconds = time.perf_counter() - start
+                status = '✅' if path_alpha == grid_alpha else '❌'
+                print(f"{status} {plant_id} {name}: notebook grid -> path {path_alpha:g}, "
+                      f"GridSearchCV {grid_alpha:g} ({grid_seconds * 1000:.0f} ms for 4 alphas)")
+
+    if results:
+        summary = pd.DataFrame(results)
+        print(f"\n{summary.to_string(index=False, float_format=lambda v: f'{v:.4g}')}")
+        print(f"\n⏱️  {len(RIDGE_ALPHAS)} alphas x {len(summary)} subsets in {summary['seconds'].sum():.2f}s")
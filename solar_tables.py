@@ -0,0 +1,121 @@
+"""
+Precomputed solar geometry / clear-sky lookup tables
+One table per plant location: elevation, azimuth and clear-sky GHI (pvlib
+Ineichen) every 5 minutes of a reference leap year, saved once as a compact
+float32 .npy file. Forecast features and historical backfills index into it
+instead of recomputing solar position.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+TABLE_DIR = Path('cache/solar')
+STEP_MINUTES = 5
+REFERENCE_YEAR = 2024  # leap year, so every calendar day has a row
+TABLE_COLUMNS = ['elevation', 'azimuth', 'ghi']
+
+SLOTS_PER_DAY = 24 * 60 // STEP_MINUTES
+SLOTS_PER_YEAR = 366 * SLOTS_PER_DAY
+
+_tables = {}
+_lock = threading.Lock()
+
+
+def table_path(latitude, longitude, table_dir=TABLE_DIR):
+    """Table file for a location (coordinates rounded to ~10 m)"""
+    return Path(table_dir) / f'solar_{latitude:.4f}_{longitude:.4f}_{STEP_MINUTES}min.npy'
+
+
+def build_table(latitude, longitude):
+    """
+    Solar position and clear-sky GHI for every slot of the reference year (UTC).
+    Returns a float32 array of shape (SLOTS_PER_YEAR, 3) in TABLE_COLUMNS order.
+    """
+    from pvlib.location import Location
+
+    times = pd.date_range(f'{REFERENCE_YEAR}-01-01', periods=SLOTS_PER_YEAR,
+                          freq=f'{STEP_MINUTES}min', tz='UTC')
+    location = Location(latitude=latitude, longitude=longitude, tz='UTC')
+    solpos = location.get_solarposition(times)
+    clearsky = location.get_clearsky(times)
+
+    return np.column_stack([
+        solpos['elevation'].to_numpy(),
+        solpos['azimuth'].to_numpy(),
+        clearsky['ghi'].to_numpy(),
+    ]).astype(np.float32)
+
+
+def load_table(latitude, longitude, table_dir=TABLE_DIR):
+    """Table for a location: in-process cache, then .npy file, else built and saved"""
+    latitude, longitude = round(float(latitude), 4), round(float(longitude), 4)
+    path = table_path(latitude, longitude, table_dir)
+
+    with _lock:
+        table = _tables.get(path)
+        if table is not None:
+            return table
+
+        if path.exists():
+            table = np.load(path, mmap_mode='r')
+        else:
+            table = build_table(latitude, longitude)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp.npy')
+            np.save(tmp, table)
+            tmp.replace(path)
+
+        _tables[path] = table
+        return table
+
+
+def slot_index(times):
+    """
+    Row of the reference-year table for each timestamp (same UTC calendar day
+    and time of day, rounded down to the table step)
+    """
+    times = pd.DatetimeIndex(times)
+    if times.tz is None:
+        raise ValueError("solar table lookups need tz-aware timestamps")
+    utc = times.tz_convert('UTC')
+
+    day = utc.dayofyear.to_numpy() - 1
+    # Non-leap years: skip Feb 29 of the reference year from March onwards
+    day = day + ((~utc.is_leap_year) & (utc.month >= 3)).astype(int)
+    minute = utc.hour.to_numpy() * 60 + utc.minute.to_numpy()
+
+    return day * SLOTS_PER_DAY + minute // STEP_MINUTES
+
+
+def lookup(times, latitude, longitude, table_dir=TABLE_DIR):
+    """Elevation, azimuth and clear-sky GHI for tz-aware timestamps: float array (n, 3)"""
+    table = load_table(latitude, longitude, table_dir)
+    return np.asarray(table[slot_index(times)], dtype=float)
+
+
+def solar_frame(times, latitude, longitude, table_dir=TABLE_DIR):
+    """lookup() as a DataFrame indexed by times (notebook backfills)"""
+    return pd.DataFrame(lookup(times, latitude, longitude, table_dir),
+                        index=pd.DatetimeIndex(times), columns=TABLE_COLUMNS)
+
+
+if __name__ == '__main__':
+    import time
+
+    from plants import load_plants
+
+    print("=" * 80)
+    print("☀️ BUILDING SOLAR LOOKUP TABLES")
+    print("=" * 80)
+
+    plants = load_plants()
+    locations = plants[['latitude', 'longitude']].dropna().round(4).drop_duplicates()
+    for plant_id, row in locations.iterrows():
+        start = time.time()
+        load_table(row['latitude'], row['longitude'])
+        path = table_path(round(row['latitude'], 4), round(row['longitude'], 4))
+        print(f"✅ {plant_id}: {path} ({path.stat().st_size / 1e6:.1f} MB, {time.time() - start:.1f}s)")
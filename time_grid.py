@@ -0,0 +1,139 @@
+"""
+Fixed 5-minute integer time grid
+Timestamps are mapped to integer slot numbers (epoch seconds // 300), so
+deduplication and reindexing become integer operations: rows are scattered
+into a preallocated (plant, slot) NumPy array instead of aligning tz-aware
+DatetimeIndexes. Availability per plant and day falls out of the same array.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+SLOT_SECONDS = 300
+TIMEZONE = 'Asia/Dhaka'
+
+
+def to_slots(times, slot_seconds=SLOT_SECONDS):
+    """Integer slot numbers (UTC epoch seconds // slot_seconds) of tz-aware timestamps"""
+    times = pd.DatetimeIndex(times)
+    if times.tz is None:
+        raise ValueError("time grid needs tz-aware timestamps")
+    return times.as_unit('s').asi8 // slot_seconds
+
+
+def last_occurrence(keys):
+    """Positions of the last occurrence of every distinct key (ordered by key)"""
+    keys = np.asarray(keys)
+    first_in_reversed = np.unique(keys[::-1], return_index=True)[1]
+    return len(keys) - 1 - first_in_reversed
+
+
+def period_seconds(freq):
+    """Length of a fixed period ('5min', 'h', 'D') in seconds"""
+    epoch = pd.Timestamp(0)
+    return int((epoch + pd.tseries.frequencies.to_offset(freq) - epoch).total_seconds())
+
+
+def split_intervals(start, end, width):
+    """
+    Split [start, end) intervals (integer seconds) at multiples of width.
+    Returns (interval index, period number, overlap seconds), one entry per
+    (interval, period) pair.
+    """
+    start, end = np.asarray(start, dtype=np.int64), np.asarray(end, dtype=np.int64)
+    first, last = start // width, (end - 1) // width
+    counts = last - first + 1
+    idx = np.repeat(np.arange(len(start)), counts)
+    period = first[idx] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    overlap = np.minimum(end[idx], (period + 1) * width) - np.maximum(start[idx], period * width)
+    return idx, period, overlap
+
+
+def build_grid(plant_ids, times, values, slot_seconds=SLOT_SECONDS, first_slot=None, last_slot=None):
+    """
+    Scatter (plant_id, timestamp, value) rows into a (n_plants, n_slots) array.
+
+    Rows falling in the same plant and slot are duplicates: the last row in
+    input order wins. The grid spans first_slot..last_slot (default: first
+    to last reading of any plant).
+
+    Returns a dict with plant_ids (sorted), first_slot, slot_seconds,
+    values (float64, NaN where no row), observed (bool) and duplicates
+    (dropped rows per plant).
+    """
+    slots = to_slots(times, slot_seconds)
+    plants, rows = np.unique(np.asarray(plant_ids), return_inverse=True)
+    rows = rows.ravel()
+
+    if first_slot is None:
+        first_slot = int(slots.min()) if len(slots) else 0
+    if last_slot is None:
+        last_slot = int(slots.max()) if len(slots) else first_slot - 1
+    n_slots = last_slot - first_slot + 1
+
+    in_range = (slots >= first_slot) & (slots <= last_slot)
+    rows, cols = rows[in_range], slots[in_range] - first_slot
+    values = np.asarray(values, dtype=float)[in_range]
+
+    flat = rows * n_slots + cols
+    keep = last_occurrence(flat)
+
+    grid = np.full((len(plants), n_slots), np.nan)
+    grid.flat[flat[keep]] = values[keep]
+    observed = np.zeros((len(plants), n_slots), dtype=bool)
+    observed.flat[flat[keep]] = True
+
+    return {
+        'plant_ids': plants,
+        'first_slot': first_slot,
+        'slot_seconds': slot_seconds,
+        'values': grid,
+        'observed': observed,
+        'duplicates': np.bincount(rows, minlength=len(plants)) - observed.sum(axis=1),
+    }
+
+
+def grid_times(grid, tz=TIMEZONE):
+    """Timestamps of the grid columns"""
+    step = grid['slot_seconds']
+    start = pd.Timestamp(grid['first_slot'] * step, unit='s', tz='UTC')
+    return pd.date_range(start, periods=grid['values'].shape[1], freq=f'{step}s').tz_convert(tz)
+
+
+def daily_availability(grid, tz=TIMEZONE):
+    """
+    Share of 5-minute slots with a reading, per plant and local day.
+
+    Only days between each plant's first and last reading are reported.
+    Returns a DataFrame: plant_id, date, available_slots, expected_slots, availability.
+    """
+    observed = grid['observed']
+    n_plants, n_slots = observed.shape
+    if n_slots == 0 or n_plants == 0:
+        return pd.DataFrame(columns=['plant_id', 'date', 'available_slots', 'expected_slots', 'availability'])
+
+    # Local day of every column; columns of one day are contiguous
+    local_days = grid_times(grid, tz).normalize()
+    day_start = np.r_[0, np.flatnonzero(local_days[1:] != local_days[:-1]) + 1]
+    days = local_days[day_start]
+
+    available = np.add.reduceat(observed, day_start, axis=1)
+    day_seconds = (days + pd.offsets.Day(1)).normalize() - days
+    expected = (day_seconds.total_seconds().to_numpy() // grid['slot_seconds']).astype(np.int64)
+
+    # Days between each plant's first and last reading
+    day_of_col = np.repeat(np.arange(len(days)), np.diff(np.r_[day_start, n_slots]))
+    first = day_of_col[observed.argmax(axis=1)]
+    last = day_of_col[n_slots - 1 - observed[:, ::-1].argmax(axis=1)]
+    day_idx = np.arange(len(days))
+    active = (day_idx >= first[:, None]) & (day_idx <= last[:, None]) & observed.any(axis=1)[:, None]
+
+    plant_idx, d = np.nonzero(active)
+    return pd.DataFrame({
+        'plant_id': grid['plant_ids'][plant_idx],
+        'date': days[d].date,
+        'available_slots': available[plant_idx, d],
+        'expected_slots': expected[d],
+        'availability': available[plant_idx, d] / expected[d],
+    })
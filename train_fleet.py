@@ -0,0 +1,376 @@
+"""
+Fleet-wide model training with time-series cross-validation
+Same candidate models and search spaces as HKL_ML_comparison_v2.ipynb, run
+for every plant at once as a task graph on a process pool:
+- each plant's feature matrix is built once (batch_scoring recipe) and saved
+  as .npy under cache/training/; workers memory-map it read-only, tasks only
+  carry the path and row ranges
+- CV tasks: one (plant, model, parameter set, fold) fit each. Parameter sets
+  are a grid or a seeded random sample (as GridSearchCV / RandomizedSearchCV),
+  folds follow TimeSeriesSplit over the training period. Ridge has one task
+  per fold that scores its whole alpha path from a single SVD (ridge_path.py)
+- refit tasks: once all folds of a (plant, model) are done, its best
+  parameter set is refitted on the whole training period and scored on the
+  test period
+The model with the best test R² per plant (notebook rule) is written as a
+model bundle to models/fleet/<plant_id>/. Models are fitted single-threaded,
+the pool provides the parallelism. The LSTM stays in the notebook (sequence
+model, not a fit on the feature matrix).
+
+Usage:
+    python train_fleet.py                                    # every active plant, all models
+    python train_fleet.py 11838318 11605154 --models Ridge RandomForest --workers 8
+"""
+
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import START_DATE, WEATHER_PATH, daytime_features, load_weather_history, plant_inputs
+from feature_pipeline import FEATURE_COLUMNS
+from ingestion import GENERATION_5M_PATH, hourly_generation
+from model_bundle import is_linear, write_bundle
+from model_refresh import ridge_statistics, statistics_bundle
+from plants import load_plants
+from ridge_path import RIDGE_ALPHAS, path_mae
+
+
+TIMEZONE = 'Asia/Dhaka'
+SPLIT_DATE = '2024-09-01'
+CV_SPLITS = 3
+RANDOM_STATE = 42
+MIN_TRAIN_ROWS = 500  # plants with less daytime history are skipped
+
+DATASET_DIR = Path('cache/training')
+FLEET_MODEL_DIR = Path('models/fleet')
+
+# Notebook search spaces. n_iter=None: full grid (GridSearchCV), else a seeded sample (RandomizedSearchCV).
+# Listed from the most to the least expensive so long tasks start first.
+MODEL_SPECS = {
+    'SVR': {
+        'name': 'SVR',
+        'params': {'kernel': ['rbf', 'poly'], 'C': [10, 100, 1000], 'epsilon': [0.1, 1.0, 10.0],
+                   'gamma': ['scale', 'auto']},
+        'n_iter': 8,
+    },
+    'GradientBoosting': {
+        'name': 'Gradient Boosting',
+        'params': {'n_estimators': [100, 200], 'max_depth': [5, 7, 9], 'learning_rate': [0.05, 0.1, 0.2],
+                   'min_samples_split': [10, 20]},
+        'n_iter': 10,
+    },
+    'RandomForest': {
+        'name': 'Random Forest',
+        'params': {'n_estimators': [100, 200], 'max_depth': [15, 20, 25], 'min_samples_split': [5, 10],
+                   'min_samples_leaf': [2, 5]},
+        'n_iter': 10,
+    },
+    'XGBoost': {
+        'name': 'XGBoost',
+        'params': {'n_estimators': [100, 200], 'max_depth': [5, 7, 9], 'learning_rate': [0.05, 0.1, 0.2],
+                   'subsample': [0.8, 1.0], 'colsample_bytree': [0.8, 1.0]},
+        'n_iter': 10,
+    },
+    'Ridge': {
+        'name': 'Ridge Regression',
+        'params': {'alpha': [float(alpha) for alpha in RIDGE_ALPHAS]},  # contains the notebook grid
+        'n_iter': None,
+    },
+}
+
+
+def make_model(model, params):
+    """Unfitted estimator for a MODEL_SPECS key (single-threaded)"""
+    if model == 'Ridge':
+        from sklearn.linear_model import Ridge
+        return Ridge(**params)
+    if model == 'RandomForest':
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1, **params)
+    if model == 'GradientBoosting':
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(random_state=RANDOM_STATE, **params)
+    if model == 'XGBoost':
+        import xgboost as xgb
+        return xgb.XGBRegressor(random_state=RANDOM_STATE, n_jobs=1, **params)
+    if model == 'SVR':
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.svm import SVR
+        return make_pipeline(StandardScaler(), SVR(**params))  # SVR needs scaled features
+    raise ValueError(f"Unknown model: {model}")
+
+
+def available_models(models=None):
+    """Requested models (default: all) that can be built here (XGBoost is optional)"""
+    out = []
+    for model in models or list(MODEL_SPECS):
+        if model == 'XGBoost':
+            try:
+                import xgboost  # noqa: F401
+            except ImportError:
+                print("⚠️  Skipping XGBoost (not installed)")
+                continue
+        out.append(model)
+    return out
+
+
+def parameter_sets(model):
+    """Candidate parameter sets of a model (same sampling as the notebook searches)"""
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    spec = MODEL_SPECS[model]
+    if spec['n_iter'] is None:
+        return list(ParameterGrid(spec['params']))
+    return list(ParameterSampler(spec['params'], n_iter=spec['n_iter'], random_state=RANDOM_STATE))
+
+
+def cv_folds(n_train, n_splits=CV_SPLITS):
+    """TimeSeriesSplit folds of the training rows as (train_end, val_start, val_end)"""
+    from sklearn.model_selection import TimeSeriesSplit
+
+    folds = []
+    for train, val in TimeSeriesSplit(n_splits=n_splits).split(np.empty((n_train, 1))):
+        folds.append((int(train[-1]) + 1, int(val[0]), int(val[-1]) + 1))
+    return folds
+
+
+def build_dataset(plant_id, plant_generation, weather, plant, split_date=SPLIT_DATE,
+                  feature_columns=FEATURE_COLUMNS, dataset_dir=DATASET_DIR):
+    """
+    Daytime feature matrix and target of one plant saved as X.npy / y.npy
+    (rows in time order). Returns {'plant_id', 'path', 'n_train', 'n_rows', 'trained_until'}.
+    """
+    hourly = plant_inputs(plant_generation, weather)
+    rows, X = daytime_features(hourly, plant, feature_columns)
+    y = rows['generation_kwh'].to_numpy(dtype=np.float64)
+
+    path = Path(dataset_dir) / str(plant_id)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / 'X.npy', X)
+    np.save(path / 'y.npy', y)
+
+    split = pd.Timestamp(split_date).tz_localize(TIMEZONE)
+    n_train = int(np.searchsorted(rows.index, split))
+    return {'plant_id': int(plant_id), 'path': str(path), 'n_train': n_train, 'n_rows': len(y),
+            'trained_until': str(rows.index[n_train - 1]) if n_train else None}
+
+
+# Worker side: memory-mapped datasets, opened once per process
+_datasets = {}
+
+
+def _init_worker():
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)  # one BLAS thread per worker, the pool is the parallelism
+
+
+def _dataset(path):
+    if path not in _datasets:
+        _datasets[path] = (np.load(Path(path) / 'X.npy', mmap_mode='r'),
+                           np.load(Path(path) / 'y.npy', mmap_mode='r'))
+    return _datasets[path]
+
+
+def _scores(y_true, y_pred):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    mae = mean_absolute_error(y_true, y_pred)
+    return {
+        'mae': mae,
+        'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'r2': r2_score(y_true, y_pred),
+        'mape': mae / np.mean(y_true) * 100,  # notebook definition (MAE relative to mean production)
+    }
+
+
+def fit_fold(task):
+    """CV task: fit on rows [0, train_end), MAE on [val_start, val_end)"""
+    X, y = _dataset(task['path'])
+    train_end, val_start, val_end = task['fold']
+
+    start = time.time()
+    model = make_model(task['model'], task['params'])
+    model.fit(X[:train_end], y[:train_end])
+    mae = float(np.mean(np.abs(model.predict(X[val_start:val_end]) - y[val_start:val_end])))
+    return {**task, 'mae': mae, 'seconds': time.time() - start}
+
+
+def fit_ridge_path(task):
+    """CV task for every alpha of task['params'] on one fold (one SVD): a list of fit_fold results"""
+    X, y = _dataset(task['path'])
+    alphas = np.array([params['alpha'] for params in task['params']])
+
+    start = time.time()
+    mae = path_mae(X, y, [task['fold']], alphas)[0]
+    seconds = (time.time() - start) / len(alphas)
+    return [{**task, 'params_id': params_id, 'params': params, 'mae': float(mae[params_id]), 'seconds': seconds}
+            for params_id, params in enumerate(task['params'])]
+
+
+def refit(task):
+    """
+    Refit task: fit on the training rows, score on the test rows and write the
+    fitted model as a bundle to <dataset path>/<model>/ (the winner is copied later)
+    """
+    X, y = _dataset(task['path'])
+    n_train = task['n_train']
+
+    if task['model'] == 'Ridge':
+        X = np.asarray(X, dtype=np.float64)  # same problem as the float64 SVD path of the alpha selection
+
+    start = time.time()
+    model = make_model(task['model'], task['params'])
+    model.fit(X[:n_train], y[:n_train])
+    seconds = time.time() - start
+
+    test = _scores(y[n_train:], model.predict(X[n_train:]))
+    metrics = {
+        'model_name': MODEL_SPECS[task['model']]['name'],
+        'test_mae': test['mae'],
+        'test_rmse': test['rmse'],
+        'test_r2': test['r2'],
+        'test_mape': test['mape'],
+        'best_params': task['params'],
+        'num_features': X.shape[1],
+        'train_samples': n_train,
+        'test_samples': len(y) - n_train,
+        'export_date': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    # Ridge bundles keep their sufficient statistics so model_refresh.py can update them
+    arrays, extra = None, {'trained_until': task['trained_until']}
+    if is_linear(model):
+        arrays, extra = statistics_bundle(*ridge_statistics(X[:n_train], y[:n_train]),
+                                          model.alpha, task['trained_until'])
+    bundle_dir = Path(task['path']) / task['model']
+    write_bundle(model, task['feature_columns'], metrics, bundle_dir, arrays=arrays, extra=extra)
+    return {**task, **metrics, 'train_seconds': seconds, 'bundle_dir': str(bundle_dir)}
+
+
+def run_graph(datasets, models, feature_columns=FEATURE_COLUMNS, workers=None):
+    """
+    Run the CV and refit tasks of every (plant, model) on a process pool.
+    A (plant, model) refit is submitted as soon as its last fold finishes.
+    Returns (cv_results, test_results) DataFrames.
+    """
+    cv_tasks = []
+    remaining = {}
+    for model in models:
+        candidates = parameter_sets(model)
+        for ds in datasets:
+            folds = cv_folds(ds['n_train'])
+            if model == 'Ridge':  # one path task per fold
+                remaining[(ds['plant_id'], model)] = len(folds)
+                for fold_id, fold in enumerate(folds):
+                    cv_tasks.append({
+                        'plant_id': ds['plant_id'], 'path': ds['path'], 'n_train': ds['n_train'],
+                        'trained_until': ds['trained_until'], 'model': model,
+                        'params_id': None, 'params': candidates,
+                        'fold_id': fold_id, 'fold': fold, 'feature_columns': list(feature_columns),
+                    })
+                continue
+
+            remaining[(ds['plant_id'], model)] = len(candidates) * len(folds)
+            for params_id, params in enumerate(candidates):
+                for fold_id, fold in enumerate(folds):
+                    cv_tasks.append({
+                        'plant_id': ds['plant_id'], 'path': ds['path'], 'n_train': ds['n_train'],
+                        'trained_until': ds['trained_until'], 'model': model,
+                        'params_id': params_id, 'params': params,
+                        'fold_id': fold_id, 'fold': fold, 'feature_columns': list(feature_columns),
+                    })
+
+    cv_results, test_results = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = {pool.submit(fit_ridge_path if task['params_id'] is None else fit_fold, task)
+                   for task in cv_tasks}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if isinstance(result, dict) and 'fold' not in result:
+                    test_results.append(result)
+                    continue
+
+                fold_results = result if isinstance(result, list) else [result]  # Ridge path: one per alpha
+                cv_results.extend(fold_results)
+                key = (fold_results[0]['plant_id'], fold_results[0]['model'])
+                remaining[key] -= 1
+                if remaining[key] == 0:
+                    folds = pd.DataFrame([r for r in cv_results if (r['plant_id'], r['model']) == key])
+                    best_id = folds.groupby('params_id')['mae'].mean().idxmin()
+                    best = folds[folds['params_id'] == best_id].iloc[0].to_dict()
+                    task = {k: best[k] for k in ('plant_id', 'path', 'n_train', 'trained_until', 'model',
+                                                 'params_id', 'params', 'feature_columns')}
+                    pending.add(pool.submit(refit, task))
+
+    cv = pd.DataFrame(cv_results).drop(columns=['path', 'feature_columns'])
+    test = pd.DataFrame(test_results).drop(columns=['path', 'feature_columns'])
+    return cv, test
+
+
+def export_best(test_results, model_dir=FLEET_MODEL_DIR):
+    """Copy the best bundle per plant (highest test R²) to model_dir/<plant_id>/. Returns the winners."""
+    best = test_results.sort_values('test_r2', ascending=False).groupby('plant_id', sort=True).head(1)
+    for row in best.itertuples():
+        out_dir = Path(model_dir) / str(row.plant_id)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        shutil.copytree(row.bundle_dir, out_dir)
+    return best.sort_values('plant_id')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the candidate models for every plant")
+    parser.add_argument('plant_ids', nargs='*', type=int, help="plants to train (default: every active plant)")
+    parser.add_argument('--models', nargs='*', choices=list(MODEL_SPECS), help="models to compare (default: all)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--start', default=START_DATE, help="first local date of the history")
+    parser.add_argument('--split-date', default=SPLIT_DATE, help="first local date of the test period")
+    parser.add_argument('--generation', default=GENERATION_5M_PATH, help="5-minute generation log")
+    parser.add_argument('--weather', default=WEATHER_PATH, help="OpenWeather history export")
+    args = parser.parse_args()
+
+    fleet = load_plants()
+    plant_ids = args.plant_ids or fleet.index[fleet['status'] == 'active'].tolist()
+    models = available_models(args.models)
+
+    print("=" * 80)
+    print(f"🏋️ TRAINING {len(models)} MODEL(S) FOR {len(plant_ids)} PLANT(S) ON {args.workers} WORKER(S)")
+    print("=" * 80)
+
+    start_time = time.time()
+    weather = load_weather_history(args.weather)
+    generation = hourly_generation(args.generation, plant_ids, TIMEZONE, args.start)
+    datasets = []
+    for plant_id, plant_generation in generation.groupby('plant_id', sort=True):
+        ds = build_dataset(plant_id, plant_generation, weather, fleet.loc[plant_id], args.split_date)
+        if ds['n_train'] < MIN_TRAIN_ROWS or ds['n_rows'] == ds['n_train']:
+            print(f"⚠️ {plant_id}: {ds['n_train']} training / {ds['n_rows'] - ds['n_train']} test rows, skipped")
+            continue
+        datasets.append(ds)
+    print(f"📥 {len(datasets)} plant datasets in {DATASET_DIR}/ ({time.time() - start_time:.1f}s)")
+
+    start_time = time.time()
+    cv, test = run_graph(datasets, models, workers=args.workers)
+    elapsed = time.time() - start_time
+    task_seconds = cv['seconds'].sum() + test['train_seconds'].sum()
+    print(f"\n⏱️  {len(cv) + len(test)} fits in {elapsed:.1f}s ({task_seconds:.1f}s summed over tasks)")
+
+    FLEET_MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    cv.assign(params=cv['params'].astype(str)).to_parquet(FLEET_MODEL_DIR / 'cv_results.parquet')
+    test.assign(params=test['params'].astype(str), best_params=test['best_params'].astype(str)) \
+        .to_parquet(FLEET_MODEL_DIR / 'test_results.parquet')
+
+    summary = test.pivot(index='plant_id', columns='model', values='test_r2')
+    print(f"\nTest R² per plant and model:\n{summary.round(4).to_string()}")
+
+    best = export_best(test)
+    for row in best.itertuples():
+        print(f"🏆 {row.plant_id}: {row.model_name} {row.params} "
+              f"(MAE {row.test_mae:.2f} kWh, R² {row.test_r2:.4f}) -> {FLEET_MODEL_DIR / str(row.plant_id)}/")
@@ -0,0 +1,407 @@
+"""
+OpenWeather 5 Day / 3 Hour forecast client with on-disk cache
+- cache keyed by (lat, lon), TTL matching the 3-hour upstream refresh
+- persisted as JSON so restarts reuse it
+- stale-while-revalidate: an expired entry is served while a refresh runs,
+  and kept as fallback when the API is down or rate limited
+- daily call budget (free tier: 1,000 calls/day) and Retry-After on HTTP 429
+- fleet refresh: all plant locations fetched concurrently over one pooled
+  session, with a per-host concurrency limit and retries with backoff
+
+Usage (refresh the forecast cache for every active plant):
+    python weather_forecast.py [--force]
+
+Set OPENWEATHER_BASE_URL (or pass base_url) to point at a local stub server.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+OPENWEATHER_BASE_URL = 'https://api.openweathermap.org'
+FORECAST_PATH = '/data/2.5/forecast'
+
+CACHE_DIR = Path('cache/forecast')
+FORECAST_TTL_SECONDS = 3 * 3600       # upstream refreshes the 3-hourly forecast
+MAX_STALE_SECONDS = 24 * 3600         # older entries are refreshed synchronously
+DAILY_CALL_LIMIT = 1000               # OpenWeather free tier
+REQUEST_TIMEOUT = 10
+
+# Fleet refresh
+FLEET_MAX_WORKERS = 16
+PER_HOST_LIMIT = 8
+RETRIES = 3
+BACKOFF_FACTOR = 0.5                  # 0.5s, 1s, 2s between retries
+
+# Forecast columns interpolated linearly when upsampling
+INTERPOLATED_COLUMNS = ['temperature', 'feels_like', 'pressure', 'humidity', 'dew_point',
+                        'clouds', 'wind_speed', 'visibility']
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+_refreshing = set()
+
+
+def _base_url(base_url=None):
+    return (base_url or os.getenv('OPENWEATHER_BASE_URL') or OPENWEATHER_BASE_URL).rstrip('/')
+
+
+def _cache_key(lat, lon):
+    return f"{float(lat):.4f}_{float(lon):.4f}"
+
+
+def _key_lock(key):
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    """Atomic write (tmp file + rename) so readers never see partial files"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def parse_forecast(data):
+    """
+    Parse an OpenWeather forecast payload to a DataFrame
+    Returns 3-hourly weather predictions (40 data points = 5 days) indexed by timestamp
+    """
+    forecast_data = []
+
+    for item in data.get('list', []):  # 40 data points (5 days * 8 per day)
+        forecast_data.append({
+            'timestamp': pd.to_datetime(item['dt'], unit='s'),
+            'temperature': item['main']['temp'],
+            'feels_like': item['main']['feels_like'],
+            'pressure': item['main']['pressure'],
+            'humidity': item['main']['humidity'],
+            'dew_point': item['main'].get('dew_point', item['main']['temp'] - 5),  # Estimate if not available
+            'clouds': item['clouds']['all'],
+            'wind_speed': item['wind']['speed'],
+            'wind_deg': item['wind'].get('deg', 0),
+            'visibility': item.get('visibility', 10000),
+            'rain_3h': item.get('rain', {}).get('3h', 0.0),
+            'weather_main': item['weather'][0]['main'],
+            'weather_description': item['weather'][0]['description'],
+        })
+
+    df = pd.DataFrame(forecast_data)
+    if len(df) > 0:
+        df.set_index('timestamp', inplace=True)
+
+    return df
+
+
+def upsample_forecast(forecast_df, freq='1h'):
+    """
+    Interpolate a 3-hourly forecast onto a regular `freq` grid (the model is hourly)
+    - numeric weather: linear in time
+    - rain_3h: the 3 h accumulation applies to every step of its window
+    - wind direction / conditions: carried forward from the previous forecast step
+    """
+    if len(forecast_df) == 0:
+        return forecast_df
+
+    grid = pd.date_range(forecast_df.index[0], forecast_df.index[-1], freq=freq)
+    out = forecast_df.reindex(forecast_df.index.union(grid))
+
+    numeric = [col for col in INTERPOLATED_COLUMNS if col in out.columns]
+    out[numeric] = out[numeric].astype(float).interpolate(method='time')
+    if 'rain_3h' in out.columns:
+        out['rain_3h'] = out['rain_3h'].bfill()
+    carried = [col for col in out.columns if col not in numeric and col != 'rain_3h']
+    out[carried] = out[carried].ffill()
+
+    out = out.reindex(grid)
+    out.index.name = forecast_df.index.name
+    return out
+
+
+def forecast_model_inputs(forecast_df, tz='Asia/Dhaka'):
+    """
+    Forecast rows as feature_pipeline weather inputs (temp, visibility, rain_1h,
+    clouds_all), indexed by local plant time
+    """
+    inputs = pd.DataFrame({
+        'temp': forecast_df['temperature'],
+        'visibility': forecast_df['visibility'],
+        'rain_1h': forecast_df['rain_3h'] / 3,
+        'clouds_all': forecast_df['clouds'],
+    }, index=forecast_df.index)
+    inputs.index = inputs.index.tz_localize('UTC').tz_convert(tz)
+    return inputs
+
+
+class RateLimited(Exception):
+    """Raised when the daily budget is spent or the API asked us to back off"""
+
+
+def _usage_path(cache_dir):
+    return Path(cache_dir) / '_usage.json'
+
+
+def _reserve_call(cache_dir, daily_limit, now):
+    """
+    Count one call against the daily budget, or raise RateLimited if the budget
+    is spent or a Retry-After is pending. Check and update run under one lock,
+    so concurrent fleet workers cannot overshoot the budget (within a process;
+    separate processes sharing the cache can).
+    """
+    path = _usage_path(cache_dir)
+    with _key_lock('_usage'):
+        usage = _read_json(path) or {}
+        today = datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%d')
+
+        if usage.get('retry_after', 0) > now:
+            raise RateLimited(f"API asked to retry after {int(usage['retry_after'] - now)}s")
+        if usage.get('day') != today:
+            usage = {'day': today, 'calls': 0}
+        if usage['calls'] >= daily_limit:
+            raise RateLimited(f"daily call budget reached ({daily_limit} calls)")
+
+        usage['calls'] += 1
+        _write_json(path, usage)
+
+
+def _record_usage(cache_dir, now, retried=0, retry_after=None):
+    """Add retried attempts and / or a Retry-After deadline to the usage record"""
+    if not retried and retry_after is None:
+        return
+    path = _usage_path(cache_dir)
+    with _key_lock('_usage'):
+        usage = _read_json(path) or {}
+        today = datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%d')
+        if usage.get('day') != today:
+            usage = {'day': today, 'calls': 0}
+        usage['calls'] = usage.get('calls', 0) + retried
+        if retry_after is not None:
+            usage['retry_after'] = now + retry_after
+        _write_json(path, usage)
+
+
+def fetch_forecast_payload(api_key, lat, lon, base_url=None, session=None,
+                           cache_dir=CACHE_DIR, daily_limit=DAILY_CALL_LIMIT,
+                           timeout=REQUEST_TIMEOUT):
+    """
+    One call to the 5 Day / 3 Hour forecast API (counts against the daily budget)
+    The call is counted before it is sent; attempts retried by the session
+    (make_session) are added from the response's retry history. Retries that
+    end in a connection error leave no response and are not counted, so the
+    budget is approximate when the API is unreachable.
+    Raises RateLimited or requests.exceptions.RequestException
+    """
+    now = time.time()
+    _reserve_call(cache_dir, daily_limit, now)
+
+    url = f"{_base_url(base_url)}{FORECAST_PATH}"
+    params = {'lat': lat, 'lon': lon, 'appid': api_key, 'units': 'metric'}
+    response = (session or requests).get(url, params=params, timeout=timeout)
+
+    retries = getattr(response.raw, 'retries', None)
+    retried = len(retries.history) if retries is not None else 0
+    if response.status_code == 429:
+        retry_after = response.headers.get('Retry-After', '60')
+        _record_usage(cache_dir, now, retried, retry_after=int(retry_after) if retry_after.isdigit() else 60)
+        raise RateLimited("HTTP 429 Too Many Requests")
+
+    _record_usage(cache_dir, now, retried)
+    response.raise_for_status()
+    return response.json()
+
+
+def _refresh(api_key, lat, lon, path, base_url, session, cache_dir, daily_limit):
+    """Fetch and persist one cache entry; returns the stored entry"""
+    payload = fetch_forecast_payload(api_key, lat, lon, base_url=base_url, session=session,
+                                     cache_dir=cache_dir, daily_limit=daily_limit)
+    parse_forecast(payload)  # validate before overwriting a good entry
+
+    entry = {'fetched_at': time.time(), 'lat': lat, 'lon': lon, 'payload': payload}
+    _write_json(path, entry)
+    return entry
+
+
+def _refresh_in_background(api_key, lat, lon, path, base_url, session, cache_dir, daily_limit):
+    key = str(path)
+    with _locks_guard:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            with _key_lock(key):
+                _refresh(api_key, lat, lon, path, base_url, session, cache_dir, daily_limit)
+        except (RateLimited, requests.exceptions.RequestException, KeyError, IndexError, ValueError):
+            pass  # keep serving the stale entry
+        finally:
+            with _locks_guard:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_forecast(api_key, lat, lon, cache_dir=CACHE_DIR, ttl=FORECAST_TTL_SECONDS,
+                 max_stale=MAX_STALE_SECONDS, base_url=None, session=None,
+                 daily_limit=DAILY_CALL_LIMIT, background=True):
+    """
+    Forecast for (lat, lon), served from the on-disk cache when possible.
+
+    Returns (df, info). info has 'source' ('cache', 'api', 'stale' or None),
+    'fetched_at' (UTC Timestamp) and 'error' (message or None).
+    df is None only when nothing is cached and the API call failed.
+    """
+    path = Path(cache_dir) / f"{_cache_key(lat, lon)}.json"
+    entry = _read_json(path)
+    age = time.time() - entry['fetched_at'] if entry else None
+
+    def result(entry, source, error=None):
+        if entry is None:
+            return None, {'source': None, 'fetched_at': None, 'error': error}
+        fetched_at = pd.Timestamp(entry['fetched_at'], unit='s', tz='UTC')
+        return parse_forecast(entry['payload']), {'source': source, 'fetched_at': fetched_at, 'error': error}
+
+    # Fresh hit
+    if entry and age < ttl:
+        return result(entry, 'cache')
+
+    # Stale-while-revalidate
+    if entry and background and age < max_stale:
+        _refresh_in_background(api_key, lat, lon, path, base_url, session, cache_dir, daily_limit)
+        return result(entry, 'stale')
+
+    # Missing (or too old): refresh now, fall back to whatever is on disk
+    try:
+        with _key_lock(str(path)):
+            # Another session may have refreshed while we waited
+            latest = _read_json(path)
+            if latest and time.time() - latest['fetched_at'] < ttl:
+                return result(latest, 'cache')
+            return result(_refresh(api_key, lat, lon, path, base_url, session, cache_dir, daily_limit), 'api')
+    except (RateLimited, requests.exceptions.RequestException, KeyError, IndexError, ValueError) as e:
+        # Never surface the API key (it is part of the request URL)
+        error = str(e).replace(api_key, '***') if api_key else str(e)
+        return result(entry, 'stale', error=error)
+
+
+def make_session(per_host_limit=PER_HOST_LIMIT, retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+    """
+    Pooled HTTP session: keep-alive connections (pool sized to the per-host
+    limit) and retries with exponential backoff on connection errors and 5xx.
+    429 is not retried here, it is handled by the daily budget / Retry-After.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=('GET',),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=per_host_limit, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def fetch_fleet_forecasts(api_key, plants, cache_dir=CACHE_DIR, base_url=None,
+                          max_workers=FLEET_MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                          retries=RETRIES, backoff_factor=BACKOFF_FACTOR, **kwargs):
+    """
+    Forecasts for every plant, fetched concurrently.
+
+    plants: DataFrame indexed by plant_id with latitude / longitude (plants.load_plants()).
+    Plants sharing a location (same cache key) share one request. At most
+    per_host_limit requests are in flight to the API host at any time.
+    Returns {plant_id: (df, info)} as returned by get_forecast.
+    """
+    located = plants.dropna(subset=['latitude', 'longitude'])
+
+    # One request per unique location
+    locations = {}
+    for plant_id, row in located.iterrows():
+        key = _cache_key(row['latitude'], row['longitude'])
+        locations.setdefault(key, (row['latitude'], row['longitude'], []))[2].append(plant_id)
+
+    session = make_session(per_host_limit, retries, backoff_factor)
+    host_slots = threading.BoundedSemaphore(per_host_limit)  # single API host
+
+    def fetch(lat, lon):
+        with host_slots:
+            return get_forecast(api_key, lat, lon, cache_dir=cache_dir, base_url=base_url,
+                                session=session, background=False, **kwargs)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            key: pool.submit(fetch, lat, lon)
+            for key, (lat, lon, _) in locations.items()
+        }
+        for key, future in futures.items():
+            forecast = future.result()
+            for plant_id in locations[key][2]:
+                results[plant_id] = forecast
+
+    session.close()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+    from plants import load_plants
+
+    parser = argparse.ArgumentParser(description="Refresh the forecast cache for the fleet")
+    parser.add_argument('--force', action='store_true', help="ignore the cache TTL")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv('ow_key', '')
+    if not api_key:
+        raise SystemExit("❌ OpenWeather API key not found in .env file (variable: ow_key)")
+
+    fleet = load_plants()
+    fleet = fleet[fleet['status'] == 'active']
+
+    print("=" * 80)
+    print(f"REFRESHING FORECASTS FOR {len(fleet)} PLANTS")
+    print("=" * 80)
+
+    start_time = time.time()
+    forecasts = fetch_fleet_forecasts(api_key, fleet, **({'ttl': 0} if args.force else {}))
+    elapsed = time.time() - start_time
+
+    for plant_id, (df, info) in forecasts.items():
+        status = '✅' if info['error'] is None else '⚠️'
+        rows = 0 if df is None else len(df)
+        print(f"{status} {fleet.loc[plant_id, 'plant_name']:<30} {rows:>3} points  "
+              f"source={info['source']}  {info['error'] or ''}")
+
+    print(f"\n⏱️  Fleet refreshed in {elapsed:.2f}s "
+          f"({len(fleet[['latitude', 'longitude']].drop_duplicates())} unique locations)")